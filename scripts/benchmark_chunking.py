@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Chunking Benchmark
+Compare the fixed character slicer (get_text_chunks) with the structure-aware
+token chunker (iter_structured_chunks) on the same extracted pages:
+
+    python scripts/benchmark_chunking.py business_info.pdf
+    python scripts/benchmark_chunking.py --generate 1000   # needs reportlab
+
+Extraction runs once and is not timed; build time covers chunking plus the
+BM25 index over the chunks.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chunker import StructuredChunker
+from pdf_processor import PDFProcessor
+from retrieval import BM25Index, chunk_text
+from token_budget import TokenEstimator
+
+def generate_pdf(pages: int) -> str:
+    """Write a synthetic manual PDF with headings and paragraphs of sentences."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    path = os.path.join(tempfile.gettempdir(), f"benchmark_manual_{pages}.pdf")
+    if os.path.exists(path):
+        return path
+    rng = random.Random(0)
+    words = ("our service includes installation support and training for every product we sell "
+             "customers can contact the team by phone or email during business hours").split()
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for number in range(pages):
+        y = 740
+        for section in range(3):
+            pdf.setFont('Helvetica-Bold', 12)
+            pdf.drawString(72, y, f"{number + 1}.{section + 1} PRODUCT DETAILS")
+            y -= 22
+            pdf.setFont('Helvetica', 10)
+            for _ in range(rng.randint(3, 5)):
+                sentence = " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+                line = sentence[0].upper() + sentence[1:] + "."
+                pdf.drawString(72, y, line[:110])
+                y -= 13
+            y -= 13
+        pdf.showPage()
+    pdf.save()
+    return path
+
+def measure(name: str, build, text_length: int):
+    estimator = TokenEstimator()
+    started = time.perf_counter()
+    chunks = build()
+    chunked = time.perf_counter()
+    BM25Index(chunks)
+    indexed = time.perf_counter()
+    characters = sum(len(chunk) for chunk in chunks)
+    tokens = sum(estimator.estimate(chunk) for chunk in chunks)
+    print(f"{name:>10}: {len(chunks):>6} chunks, {tokens:>8} tokens indexed "
+          f"({characters / max(1, text_length):.2f}x the document), "
+          f"chunking {chunked - started:.3f}s + BM25 {indexed - chunked:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk counts and build time of the PDF chunkers")
+    parser.add_argument('pdf', nargs='?', help="PDF to benchmark")
+    parser.add_argument('--generate', type=int, help="Benchmark a generated PDF with this many pages")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Fixed slicer window in characters")
+    parser.add_argument('--overlap', type=int, default=100, help="Fixed slicer overlap in characters")
+    parser.add_argument('--max-tokens', type=int, default=256, help="Structured chunk token budget")
+    args = parser.parse_args()
+
+    pdf_path = generate_pdf(args.generate) if args.generate else args.pdf
+    if not pdf_path:
+        parser.error("pass a PDF path or --generate PAGES")
+    processor = PDFProcessor(pdf_path)
+    text = processor.extract_text()
+    pages = list(processor.iter_pages())
+    print(f"Benchmarking {pdf_path}: {len(pages)} pages, {len(text)} characters")
+    measure("fixed", lambda: chunk_text(text, args.chunk_size, args.overlap), len(text))
+    measure("structured", lambda: [chunk.text for chunk in StructuredChunker(args.max_tokens).chunks(pages)],
+            len(text))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+PDF Memory Benchmark
+Compare peak RSS of whole-document extraction + chunk slicing with the
+streaming page/chunk iterators of PDFProcessor.
+
+Each mode runs in its own process so peak RSS is measured independently:
+
+    python scripts/benchmark_pdf_memory.py business_info.pdf
+    python scripts/benchmark_pdf_memory.py --generate 1000   # needs reportlab
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def run_before(pdf_path: str, chunk_size: int, overlap: int) -> dict:
+    """Previous behaviour: concatenate every page with +=, then slice overlapping copies."""
+    import pdfplumber
+
+    text = ""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text + "\n"
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size - overlap)]
+    return {"chunks": len(chunks), "characters": sum(len(chunk) for chunk in chunks)}
+
+def run_after(pdf_path: str, chunk_size: int, overlap: int) -> dict:
+    """Streaming: pages are parsed one at a time and chunks consumed as they are produced."""
+    from pdf_processor import PDFProcessor
+
+    processor = PDFProcessor(pdf_path, cache=False)
+    count = characters = 0
+    # The default method (PDF_EXTRACT_METHOD, 'race' unless set), as served in production
+    for chunk in processor.iter_chunks(chunk_size, overlap, processor.iter_pages()):
+        count += 1
+        characters += len(chunk.text)
+    return {"chunks": count, "characters": characters}
+
+MODES = {"before": run_before, "after": run_after}
+
+def generate_pdf(pages: int) -> str:
+    """Write a synthetic catalog PDF with the given number of text-dense pages."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    path = os.path.join(tempfile.gettempdir(), f"benchmark_catalog_{pages}.pdf")
+    if os.path.exists(path):
+        return path
+    words = "service product support pricing warranty delivery installation consulting training".split()
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for number in range(pages):
+        pdf.setFont('Helvetica-Bold', 14)
+        pdf.drawString(72, 740, f"PRODUCT {number + 1}")
+        pdf.setFont('Helvetica', 10)
+        for line in range(50):
+            pdf.drawString(72, 715 - 13 * line,
+                           " ".join(words[(number + line + i) % len(words)] for i in range(12)))
+        pdf.showPage()
+    pdf.save()
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of PDF extraction and chunking")
+    parser.add_argument('pdf', nargs='?', help="PDF to benchmark")
+    parser.add_argument('--generate', type=int, help="Benchmark a generated PDF with this many pages")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--overlap', type=int, default=100)
+    parser.add_argument('--mode', choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Child process: run one mode and report as JSON
+        started = time.perf_counter()
+        result = MODES[args.mode](args.pdf, args.chunk_size, args.overlap)
+        result.update(seconds=round(time.perf_counter() - started, 2), peak_rss_mb=peak_rss_mb())
+        print(json.dumps(result))
+        return
+
+    pdf_path = generate_pdf(args.generate) if args.generate else args.pdf
+    if not pdf_path:
+        parser.error("pass a PDF path or --generate PAGES")
+    print(f"Benchmarking {pdf_path}")
+    for mode in ("before", "after"):
+        output = subprocess.run(
+            [sys.executable, __file__, pdf_path, '--mode', mode,
+             '--chunk-size', str(args.chunk_size), '--overlap', str(args.overlap)],
+            capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>6}: peak RSS {result['peak_rss_mb']:>7} MB, {result['seconds']:>7}s, "
+              f"{result['chunks']} chunks ({result['characters']} characters)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Load Testing Script
+Fire concurrent /ask requests and report throughput and latency percentiles.
+
+Without --url the Flask app is loaded in-process with LLM_BACKEND=fake and
+the examples/ directory as its document corpus (unless PDF_PATH or
+CORPUS_DIR is set), so capacity can be measured offline without Gemini quota:
+
+    python scripts/load_test.py --requests 500 --concurrency 32
+    FAKE_LLM_ERROR_RATE=0.05 python scripts/load_test.py --unique 100
+    python scripts/load_test.py --url http://localhost:5000
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+QUESTIONS = [
+    "What services do you offer?",
+    "What are your business hours?",
+    "How can I contact support?",
+    "Where are you located?",
+    "What are your prices?",
+    "Do you offer refunds?"
+]
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+def make_sender(url):
+    """Return a function posting one question and returning (status, source)."""
+    if url:
+        import requests
+        session = requests.Session()
+
+        def send(payload):
+            response = session.post(f"{url.rstrip('/')}/ask", json=payload, timeout=60)
+            return response.status_code, response.json().get('source', '') if response.ok else ''
+        return send
+
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    # Webhook credentials are not used by /ask; placeholders let the app start offline
+    os.environ.setdefault('TWILIO_ACCOUNT_SID', 'ACload-test')
+    os.environ.setdefault('TWILIO_AUTH_TOKEN', 'load-test')
+    # All in-process requests share one client address; use --senders to exercise per-sender limits
+    os.environ.setdefault('SENDER_RATE_PER_MINUTE', '0')
+    if not os.getenv('PDF_PATH'):
+        # Without business information every answer would be the canned no_context reply
+        os.environ.setdefault('CORPUS_DIR', os.path.join(os.path.dirname(__file__), '..', 'examples'))
+        os.environ.setdefault('CORPUS_WATCH', 'false')
+    from main import app
+
+    def send(payload):
+        response = app.test_client().post('/ask', json=payload)
+        return response.status_code, (response.get_json() or {}).get('source', '')
+    return send
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /ask load test")
+    parser.add_argument('--url', help="Base URL of a running server (default: in-process app)")
+    parser.add_argument('--requests', type=int, default=200, help="Total requests to send")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients")
+    parser.add_argument('--unique', type=int, default=0,
+                        help="Number of distinct questions (0 = the fixed sample set)")
+    parser.add_argument('--sessions', type=int, default=0,
+                        help="Spread requests over this many session ids (0 = stateless)")
+    parser.add_argument('--senders', type=int, default=0,
+                        help="Spread requests over this many from_number values (0 = none)")
+    args = parser.parse_args()
+
+    send = make_sender(args.url)
+
+    def run(index):
+        question = (f"{QUESTIONS[index % len(QUESTIONS)]} (variant {index % args.unique})"
+                    if args.unique else QUESTIONS[index % len(QUESTIONS)])
+        payload = {'question': question}
+        if args.sessions:
+            payload['session_id'] = f"load-{index % args.sessions}"
+        if args.senders:
+            payload['from_number'] = f"+1555{index % args.senders:07d}"
+        started = time.perf_counter()
+        try:
+            status, source = send(payload)
+        except Exception as e:
+            status, source = 0, type(e).__name__
+        return time.perf_counter() - started, status, source
+
+    print(f"Sending {args.requests} requests with concurrency {args.concurrency} "
+          f"to {args.url or 'in-process app'}...")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _, _ in results)
+    statuses = Counter(status for _, status, _ in results)
+    sources = Counter(source for _, _, source in results)
+    print(f"Elapsed:     {elapsed:.2f}s")
+    print(f"Throughput:  {args.requests / elapsed:.1f} req/s")
+    print("Latency (ms): " + ", ".join(
+        f"{name}={percentile(latencies, fraction) * 1000:.0f}"
+        for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))))
+    print(f"Status:      {dict(statuses)}")
+    print(f"Sources:     {dict(sources)}")
+    if sources['no_context'] * 2 > args.requests:
+        print("Most answers were no_context: the server has no business information loaded, "
+              "so these numbers do not measure the answer path")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
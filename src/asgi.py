@@ -0,0 +1,105 @@
+"""
+ASGI entry point serving /ask, /whatsapp and /health on an event loop.
+
+Run with:
+    cd src && uvicorn asgi:app --port 5000
+
+Components are shared with the Flask app in main.py; LLM calls go through
+GeminiAgent.agenerate_response, which caps in-flight upstream requests at
+LLM_MAX_CONCURRENCY and queues the rest by channel priority.
+"""
+import asyncio
+import logging
+import math
+from urllib.parse import parse_qsl
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from main import (RATE_LIMITED_MESSAGE, client_key, client_limiter, gemini_agent, resolve_channel, sender_limiter,
+                  whatsapp_bot, vapi_integration)
+
+logger = logging.getLogger(__name__)
+
+TWIML_HEADERS = {'Content-Type': 'text/xml'}
+
+async def whatsapp_webhook(request: Request) -> Response:
+    """Webhook endpoint for WhatsApp messages."""
+    try:
+        # Twilio posts application/x-www-form-urlencoded bodies
+        form = dict(parse_qsl((await request.body()).decode('utf-8'), keep_blank_values=True))
+        form.update(request.query_params)
+        message_info = whatsapp_bot.get_message_info(form)
+
+        if not whatsapp_bot.is_valid_webhook(form):
+            return Response("Invalid webhook", status_code=400)
+
+        incoming_message = message_info['message_body']
+        from_number = message_info['from_number']
+
+        logger.info(f"Received message from {from_number}: {incoming_message}")
+
+        if incoming_message:
+            allowed, retry_after = sender_limiter.check(from_number)
+            if not allowed:
+                logger.warning(f"Rate limited {from_number} (retry after {retry_after:.1f}s)")
+                return Response(whatsapp_bot.create_response(RATE_LIMITED_MESSAGE), headers=TWIML_HEADERS)
+            ai_response = await gemini_agent.agenerate_response(incoming_message, session_id=from_number,
+                                                             channel='whatsapp')
+            logger.info(f"Sent response: {ai_response}")
+            return Response(whatsapp_bot.create_response(ai_response), headers=TWIML_HEADERS)
+        return Response(whatsapp_bot.create_response("Hello! How can I help you today?"), headers=TWIML_HEADERS)
+
+    except Exception as e:
+        logger.error(f"Error processing WhatsApp message: {e}")
+        error_response = whatsapp_bot.create_response("I'm sorry, I'm having trouble processing your message right now. Please try again later.")
+        return Response(error_response, headers=TWIML_HEADERS)
+
+async def ask_question(request: Request) -> JSONResponse:
+    """Endpoint to handle user questions."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    data = data or {}
+    user_question = data.get('question')
+    if not isinstance(user_question, str) or not user_question.strip():
+        return JSONResponse({'error': 'Missing question'}, status_code=400)
+    try:
+        # Callers without a session get a standalone answer: no shared history, nothing remembered
+        session_id = data.get('session_id') or data.get('from_number')
+        token = request.headers.get('x-channel-token')
+        address = request.client.host if request.client else 'unknown'
+        allowed, retry_after = client_limiter.check(client_key(data, token, address))
+        if not allowed:
+            return JSONResponse({'error': 'rate_limited', 'message': RATE_LIMITED_MESSAGE,
+                                 'retry_after': round(retry_after, 1)},
+                                status_code=429, headers={'Retry-After': str(math.ceil(retry_after))})
+        result = await gemini_agent.aanswer_question(user_question, include_history=session_id is not None,
+                                                     session_id=session_id,
+                                                     channel=resolve_channel(data.get('channel'), token))
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({'error': str(e), 'message': "An error occurred handling the request."}, status_code=500)
+
+async def health_check(request: Request) -> JSONResponse:
+    """Endpoint for health checks."""
+    # Twilio and VAPI health checks make blocking HTTP calls
+    whatsapp_health = await asyncio.to_thread(whatsapp_bot.get_health_status) if whatsapp_bot else {'status': 'unavailable'}
+    vapi_health = await asyncio.to_thread(vapi_integration.health_check) if vapi_integration else {'status': 'unavailable'}
+
+    return JSONResponse({
+        'gemini': gemini_agent.health_check(),
+        'whatsapp': whatsapp_health,
+        'vapi': vapi_health,
+        'sender_rate_limit': sender_limiter.stats(),
+        'client_rate_limit': client_limiter.stats()
+    })
+
+app = Starlette(routes=[
+    Route('/whatsapp', whatsapp_webhook, methods=['POST']),
+    Route('/ask', ask_question, methods=['POST']),
+    Route('/health', health_check, methods=['GET']),
+])
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+from token_budget import TokenEstimator
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[IVX]+\.)\s+[A-Z]")
+_UNDERLINE = re.compile(r"^\s*([=\-_~*])\1{2,}\s*$")
+
+def is_heading(line: str, next_line: str = "") -> bool:
+    """
+    Guess whether a line is a heading.
+
+    Markdown headings, underlined lines, short ALL-CAPS lines and short
+    numbered titles ("2. Software Development") count; lines ending like
+    a sentence or clause do not.
+
+    Args:
+        line (str): Line to test
+        next_line (str): Following line (an underline marks a heading)
+
+    Returns:
+        bool: True for a heading
+    """
+    text = line.strip()
+    if not text or len(text) > 80 or _UNDERLINE.match(text):
+        return False
+    if text.startswith('#') or _UNDERLINE.match(next_line):
+        return True
+    if text[-1] in ".!?,;":
+        return False
+    if sum(1 for ch in text if ch.isalpha()) >= 3 and text.upper() == text:
+        return True
+    return bool(_NUMBERED_HEADING.match(text)) and len(text.split()) <= 8
+
+class TextChunk:
+    """A chunk of whole sentences with its stable id and source pages."""
+
+    __slots__ = ("id", "index", "text", "tokens", "page_start", "page_end", "heading")
+
+    def __init__(self, id: str, index: int, text: str, tokens: int, page_start: int, page_end: int,
+                 heading: Optional[str] = None):
+        """
+        Args:
+            id (str): Stable id derived from the chunk's content
+            index (int): Chunk number in the document
+            text (str): Chunk text
+            tokens (int): Estimated tokens
+            page_start (int): First page the chunk draws from
+            page_end (int): Last page the chunk draws from
+            heading (str): Heading of the section the chunk starts in
+        """
+        self.id = id
+        self.index = index
+        self.text = text
+        self.tokens = tokens
+        self.page_start = page_start
+        self.page_end = page_end
+        self.heading = heading
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class StructuredChunker:
+    """
+    Single-pass chunker that cuts at headings, paragraphs and sentences.
+
+    Text is read as a stream of units (headings, paragraphs, and the lines
+    or sentences of paragraphs too large for one chunk) which are packed
+    greedily up to max_tokens. A heading starts a new chunk once the
+    current one holds min_tokens, so tiny sections are merged instead of
+    indexed alone. Chunks never overlap: they end on a sentence boundary,
+    so there is nothing cut in half to repeat.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, min_tokens: Optional[int] = None,
+                 estimator: Optional[TokenEstimator] = None):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_tokens (int): Token budget per chunk (default CHUNK_MAX_TOKENS or 256)
+            min_tokens (int): Size at which a heading starts a new chunk (default half of max_tokens)
+            estimator (TokenEstimator): Token estimator (a new one if omitted)
+        """
+        self.max_tokens = max_tokens or int(os.getenv('CHUNK_MAX_TOKENS', '256'))
+        self.min_tokens = self.max_tokens // 2 if min_tokens is None else min_tokens
+        self.estimator = estimator or TokenEstimator()
+
+    def _units(self, pages: Iterable) -> Iterator[Tuple[str, str, int, int, bool]]:
+        """Yield (separator, text, tokens, page number, is heading) in document order."""
+        estimate = self.estimator.estimate
+        for number, page in enumerate(pages, start=1):
+            # PageText-like objects carry their own number; plain strings are numbered here
+            text = getattr(page, "text", page)
+            number = getattr(page, "number", number)
+            lines = text.splitlines()
+            paragraph: List[str] = []
+            for i, line in enumerate(lines):
+                next_line = lines[i + 1] if i + 1 < len(lines) else ""
+                if not line.strip() or _UNDERLINE.match(line):
+                    yield from self._paragraph(paragraph, number)
+                    paragraph = []
+                elif is_heading(line, next_line):
+                    yield from self._paragraph(paragraph, number)
+                    paragraph = []
+                    heading = line.strip().lstrip('#').strip()
+                    yield "\n\n", heading, estimate(heading), number, True
+                else:
+                    paragraph.append(line.rstrip())
+            # Pages end paragraphs: a PDF page break rarely falls mid-paragraph in business documents
+            yield from self._paragraph(paragraph, number)
+
+    def _paragraph(self, lines: List[str], number: int) -> Iterator[Tuple[str, str, int, int, bool]]:
+        """Yield a paragraph whole, or split into lines, sentences and words until each piece fits."""
+        if not lines:
+            return
+        estimate = self.estimator.estimate
+        text = "\n".join(lines)
+        tokens = estimate(text)
+        if tokens <= self.max_tokens:
+            yield "\n\n", text, tokens, number, False
+            return
+        separator = "\n\n"
+        for line in lines:
+            tokens = estimate(line)
+            if tokens <= self.max_tokens:
+                yield separator, line, tokens, number, False
+                separator = "\n"
+                continue
+            for sentence in _SENTENCE_END.split(line.strip()):
+                tokens = estimate(sentence)
+                if tokens <= self.max_tokens:
+                    yield separator, sentence, tokens, number, False
+                    separator = " "
+                    continue
+                # A run-on "sentence" longer than a chunk is cut between words
+                words: List[str] = []
+                used = 0
+                for word in sentence.split():
+                    cost = estimate(word) + 1
+                    if words and used + cost > self.max_tokens:
+                        yield separator, " ".join(words), used, number, False
+                        separator, words, used = " ", [], 0
+                    words.append(word)
+                    used += cost
+                if words:
+                    yield separator, " ".join(words), used, number, False
+                separator = " "
+            separator = "\n"
+
+    def chunks(self, pages: Iterable) -> Iterator[TextChunk]:
+        """
+        Chunk a document in one pass.
+
+        Args:
+            pages (iterable): PageText objects (e.g. PDFProcessor.iter_pages()) or page strings
+
+        Yields:
+            TextChunk: Chunks in document order
+        """
+        parts: List[str] = []
+        tokens = 0
+        page_start = page_end = None
+        heading: Optional[str] = None
+        chunk_heading: Optional[str] = None
+        index = 0
+        seen = {}
+
+        def flush() -> TextChunk:
+            nonlocal parts, tokens, index
+            text = "".join(parts)
+            digest = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+            # Repeated text (e.g. a footer on every page) still gets distinct, stable ids
+            seen[digest] = seen.get(digest, 0) + 1
+            chunk_id = digest if seen[digest] == 1 else f"{digest}-{seen[digest]}"
+            chunk = TextChunk(chunk_id, index, text, tokens, page_start, page_end, chunk_heading)
+            parts, tokens = [], 0
+            index += 1
+            return chunk
+
+        for separator, text, cost, number, heading_unit in self._units(pages):
+            if parts and ((heading_unit and tokens >= self.min_tokens) or tokens + cost > self.max_tokens):
+                yield flush()
+            if heading_unit:
+                heading = text
+            if not parts:
+                page_start, chunk_heading = number, heading
+                parts.append(text)
+            else:
+                parts.append(separator + text)
+            tokens += cost
+            page_end = number
+        if parts:
+            yield flush()
+
+    def split_text(self, text: str) -> List[TextChunk]:
+        """
+        Chunk a plain-text document (form feeds separate pages).
+
+        Args:
+            text (str): Document text
+
+        Returns:
+            list: TextChunk objects
+        """
+        return list(self.chunks(text.split("\f")))
@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker around an upstream dependency."""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            recovery_timeout (float): Seconds the circuit stays open before allowing a trial call
+            half_open_max_calls (int): Trial calls allowed at once while half-open
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "opened": 0,
+            "closed": 0,
+            "half_opened": 0,
+            "rejected": 0,
+            "successes": 0,
+            "failures": 0
+        }
+
+    def _transition(self, state: str):
+        """Move to a new state. Caller must hold the lock."""
+        if state == self.state:
+            return
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.counters["opened"] += 1
+        elif state == HALF_OPEN:
+            self._half_open_calls = 0
+            self.counters["half_opened"] += 1
+        else:
+            self.counters["closed"] += 1
+        print(f"LLM circuit breaker is now {state}")
+
+    def allow_request(self) -> bool:
+        """
+        Decide whether a call may go upstream.
+
+        Returns:
+            bool: False when the call should fast-fail
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self.counters["rejected"] += 1
+            return False
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected (open and not yet due, or half-open with every trial taken)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                return self._half_open_calls >= self.half_open_max_calls
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def release_trial(self):
+        """Give back a half-open trial slot whose call ended without a verdict (e.g. an abandoned stream)."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        """Report a successful call."""
+        with self._lock:
+            self.counters["successes"] += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        """Report a failed call."""
+        with self._lock:
+            self.counters["failures"] += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def stats(self) -> Dict:
+        """
+        Get breaker state and transition counts.
+
+        Returns:
+            dict: State, consecutive failures, settings and counters
+        """
+        with self._lock:
+            return dict(self.counters,
+                        state=self.state,
+                        consecutive_failures=self.consecutive_failures,
+                        half_open_calls=self._half_open_calls,
+                        failure_threshold=self.failure_threshold,
+                        recovery_timeout=self.recovery_timeout)
@@ -0,0 +1,221 @@
+import datetime
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+class LocalContextCache:
+    """
+    Offline stand-in for Gemini context caching.
+
+    Keeps the static prefix locally and prepends it to each request before
+    calling the wrapped model. Nothing is saved: the prefix is sent every
+    time and reported as prefix_tokens_sent, tokens_saved stays 0.
+    """
+
+    name = "local"
+
+    def __init__(self, model, ttl_seconds: float = 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            model: Model object with generate_content / generate_content_async
+            ttl_seconds (float): Lifetime of the cached prefix
+        """
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.prefix = ""
+        self.prefix_hash = ""
+        self.expires_at = 0.0
+        self.refreshes = 0
+        self.requests = 0
+        self.tokens_saved = 0
+        self.last_tokens_saved = 0
+        self.prefix_tokens_sent = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, prefix: str):
+        """
+        Register the static prefix, replacing the previous one if it changed.
+
+        Args:
+            prefix (str): System prompt plus business context
+        """
+        prefix_hash = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        with self._lock:
+            if prefix_hash == self.prefix_hash and time.time() < self.expires_at:
+                return
+            self._create(prefix)
+            self.prefix = prefix
+            self.prefix_hash = prefix_hash
+            self.expires_at = time.time() + self.ttl_seconds
+            self.refreshes += 1
+
+    def _create(self, prefix: str):
+        """Register the prefix with the backend. Caller must hold the lock."""
+
+    def _delete(self):
+        """Drop the prefix registered with the backend. Caller must hold the lock."""
+
+    def clear(self):
+        """Stop caching: forget the prefix (e.g. when it no longer fits the prompt budget)."""
+        with self._lock:
+            self._delete()
+            self.prefix = ""
+            self.prefix_hash = ""
+            self.expires_at = 0.0
+
+    def _ensure_fresh(self):
+        """Re-register the prefix if its TTL has run out."""
+        if self.prefix and time.time() >= self.expires_at:
+            self.refresh(self.prefix)
+
+    def _record(self, response) -> None:
+        """Count the prompt tokens the cached prefix saved (or did not save) on a response."""
+        saved = self._saved_tokens(response)
+        with self._lock:
+            self.requests += 1
+            self.tokens_saved += saved
+            self.last_tokens_saved = saved
+            self.prefix_tokens_sent += self._sent_prefix_tokens()
+
+    def _saved_tokens(self, response) -> int:
+        return 0
+
+    def _sent_prefix_tokens(self) -> int:
+        return estimate_tokens(self.prefix)
+
+    def generate_content(self, suffix: str, **kwargs):
+        """
+        Generate a response for the dynamic suffix on top of the cached prefix.
+
+        Args:
+            suffix (str): History plus current question
+            **kwargs: Passed to the model (generation_config, stream, ...)
+
+        Returns:
+            Model response
+        """
+        self._ensure_fresh()
+        response = self.model.generate_content(self.prefix + suffix, **kwargs)
+        self._record(response)
+        return response
+
+    async def generate_content_async(self, suffix: str, **kwargs):
+        """Async variant of generate_content."""
+        self._ensure_fresh()
+        response = await self.model.generate_content_async(self.prefix + suffix, **kwargs)
+        self._record(response)
+        return response
+
+    def stats(self) -> Dict:
+        """
+        Get context cache statistics.
+
+        Returns:
+            dict: Backend, prefix size, refreshes, prompt tokens saved and prefix tokens still sent
+        """
+        with self._lock:
+            return {
+                "backend": self.name,
+                "prefix_tokens": estimate_tokens(self.prefix),
+                "ttl_seconds": self.ttl_seconds,
+                "refreshes": self.refreshes,
+                "requests": self.requests,
+                "tokens_saved": self.tokens_saved,
+                "last_tokens_saved": self.last_tokens_saved,
+                "avg_tokens_saved": round(self.tokens_saved / self.requests, 1) if self.requests else 0.0,
+                "prefix_tokens_sent": self.prefix_tokens_sent
+            }
+
+class GeminiContextCache(LocalContextCache):
+    """Gemini explicit context caching: the static prefix is stored server-side as a CachedContent."""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str, ttl_seconds: float = 3600):
+        """
+        Initialize the cache. Expects genai.configure() to have been called.
+
+        Args:
+            model_name (str): Gemini model the cache is created for
+            ttl_seconds (float): Lifetime of the cached content
+        """
+        super().__init__(None, ttl_seconds)
+        self.model_name = model_name if model_name.startswith('models/') else f"models/{model_name}"
+        self.cached_content = None
+
+    def _create(self, prefix: str):
+        import google.generativeai as genai
+        from google.generativeai import caching
+
+        previous = self.cached_content
+        self.cached_content = caching.CachedContent.create(
+            model=self.model_name,
+            display_name="business-context",
+            system_instruction=prefix,
+            ttl=datetime.timedelta(seconds=self.ttl_seconds)
+        )
+        self.model = genai.GenerativeModel.from_cached_content(cached_content=self.cached_content)
+        if previous is not None:
+            try:
+                previous.delete()
+            except Exception as e:
+                print(f"Error deleting previous cached content: {e}")
+
+    def _delete(self):
+        if self.cached_content is None:
+            return
+        try:
+            self.cached_content.delete()
+        except Exception as e:
+            print(f"Error deleting cached content: {e}")
+        self.cached_content = None
+        self.model = None
+
+    def _saved_tokens(self, response) -> int:
+        usage = getattr(response, 'usage_metadata', None)
+        return getattr(usage, 'cached_content_token_count', 0) or 0
+
+    def _sent_prefix_tokens(self) -> int:
+        return 0
+
+    def generate_content(self, suffix: str, **kwargs):
+        self._ensure_fresh()
+        response = self.model.generate_content(suffix, **kwargs)
+        self._record(response)
+        return response
+
+    async def generate_content_async(self, suffix: str, **kwargs):
+        self._ensure_fresh()
+        response = await self.model.generate_content_async(suffix, **kwargs)
+        self._record(response)
+        return response
+
+def get_context_cache(model, model_name: str) -> Optional[LocalContextCache]:
+    """
+    Create the context cache selected by CONTEXT_CACHE.
+
+    Args:
+        model: Plain model (or LLM backend) used by the local stand-in
+        model_name (str): Gemini model name for server-side caching
+
+    Returns:
+        Context cache, or None when CONTEXT_CACHE is 'off' (default)
+    """
+    backend = os.getenv('CONTEXT_CACHE', 'off').lower()
+    ttl_seconds = float(os.getenv('CONTEXT_CACHE_TTL', '3600'))
+    if backend == 'gemini' and getattr(model, 'supports_context_cache', True):
+        return GeminiContextCache(model_name, ttl_seconds)
+    if backend == 'gemini':
+        # Backends without server-side caching (e.g. the fake) use the local stand-in
+        backend = 'local'
+    if backend == 'local':
+        return LocalContextCache(model, ttl_seconds)
+    return None
@@ -0,0 +1,248 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+from chunker import StructuredChunker, TextChunk
+from extraction_cache import file_hash
+from pdf_processor import PDFProcessor
+from response_cache import fingerprint
+from retrieval import BM25Index, SegmentedBM25Index
+
+DEFAULT_EXTENSIONS = (".pdf", ".txt", ".md")
+
+class CorpusDocument:
+    """One extracted, chunked and indexed file of the corpus."""
+
+    __slots__ = ("path", "name", "signature", "content_hash", "text", "chunks", "index")
+
+    def __init__(self, path: str, name: str, signature: Tuple[int, int], content_hash: str,
+                 text: str, chunks: List[TextChunk]):
+        """
+        Args:
+            path (str): File path
+            name (str): Path relative to the corpus directory
+            signature (tuple): (mtime_ns, size) when the file was read
+            content_hash (str): SHA-256 of the file's bytes
+            text (str): Extracted text
+            chunks (list): Chunks, with ids prefixed by the document name
+        """
+        self.path = path
+        self.name = name
+        self.signature = signature
+        self.content_hash = content_hash
+        self.text = text
+        self.chunks = chunks
+        # BM25 segment over this document's chunks only
+        self.index = BM25Index([chunk.text for chunk in chunks])
+
+class CorpusSnapshot:
+    """
+    Immutable version of the corpus: documents, combined text and BM25 index.
+
+    Unchanged documents are shared with the previous snapshot, so building
+    one costs the changed documents plus a pass over the document list.
+    """
+
+    def __init__(self, documents: List[CorpusDocument], version: int):
+        """
+        Args:
+            documents (list): Documents in name order
+            version (int): Increases with every change
+        """
+        self.documents = tuple(documents)
+        self.version = version
+        self.context_hash = fingerprint([(doc.name, doc.content_hash) for doc in self.documents])
+        self.retriever = SegmentedBM25Index([doc.index for doc in self.documents])
+        self.text = "\n\n".join(f"=== {doc.name} ===\n{doc.text}" for doc in self.documents if doc.text.strip())
+
+    def chunk(self, chunk_id: int) -> TextChunk:
+        """Chunk (with its id and pages) for a retriever chunk id."""
+        document = bisect_right(self.retriever.offsets, chunk_id) - 1
+        return self.documents[document].chunks[chunk_id - self.retriever.offsets[document]]
+
+    def stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "documents": len(self.documents),
+            "chunks": len(self.retriever.chunks),
+            "characters": len(self.text)
+        }
+
+class Corpus:
+    """
+    A directory of PDF and text documents, re-read incrementally.
+
+    refresh() compares file modification times and sizes with the last
+    scan and only extracts, chunks and indexes files that were added or
+    whose content changed; removed files are dropped. PDFs go through
+    PDFProcessor, so its extraction cache makes unchanged content free.
+    """
+
+    def __init__(self, directory: str, extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS,
+                 max_tokens: Optional[int] = None, settle_seconds: Optional[float] = None):
+        """
+        Initialize the corpus (nothing is read until refresh()).
+
+        Args:
+            directory (str): Directory scanned recursively (hidden files are ignored)
+            extensions (tuple): File extensions to include
+            max_tokens (int): Token budget per chunk (default CHUNK_MAX_TOKENS)
+            settle_seconds (float): Files modified more recently than this are left for the
+                next refresh, so half-written files are not read (default CORPUS_SETTLE_SECONDS or 1)
+        """
+        self.directory = directory
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.chunker = StructuredChunker(max_tokens)
+        self.settle_seconds = (float(os.getenv('CORPUS_SETTLE_SECONDS', '1'))
+                               if settle_seconds is None else settle_seconds)
+        self.snapshot = CorpusSnapshot([], 0)
+        self.last_change: Dict = {}
+        self._lock = threading.Lock()
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """
+        List the corpus files.
+
+        Returns:
+            dict: Relative name -> (mtime_ns, size)
+        """
+        files = {}
+        for root, directories, names in os.walk(self.directory):
+            directories[:] = [name for name in directories if not name.startswith('.')]
+            for name in names:
+                if name.startswith('.') or not name.lower().endswith(self.extensions):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files[os.path.relpath(path, self.directory)] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def _load(self, name: str, signature: Tuple[int, int], content_hash: str) -> CorpusDocument:
+        """Extract and chunk one file."""
+        path = os.path.join(self.directory, name)
+        if name.lower().endswith(".pdf"):
+            processor = PDFProcessor(path)
+            text = processor.extract_text()
+            pages = processor.iter_pages()
+        else:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            pages = text.split("\f")
+        chunks = list(self.chunker.chunks(pages))
+        for chunk in chunks:
+            # Chunk ids stay unique and stable across the whole corpus
+            chunk.id = f"{name}#{chunk.id}"
+        return CorpusDocument(path, name, signature, content_hash, text, chunks)
+
+    def refresh(self, settle: bool = True) -> Optional[Dict]:
+        """
+        Bring the snapshot up to date with the directory.
+
+        Args:
+            settle (bool): Leave recently modified files for the next refresh (False at startup)
+
+        Returns:
+            dict: Added, changed and removed names and the time taken, or None when nothing changed
+        """
+        with self._lock:
+            started = time.perf_counter()
+            current = {doc.name: doc for doc in self.snapshot.documents}
+            files = self.scan()
+            settled_before = time.time_ns() - int(self.settle_seconds * 1e9 if settle else 0)
+            documents, added, changed = [], [], []
+            for name in sorted(files):
+                signature = files[name]
+                previous = current.get(name)
+                if previous is not None and previous.signature == signature:
+                    documents.append(previous)
+                    continue
+                if signature[0] > settled_before:
+                    # Still being written: keep the old version (if any) until the next refresh
+                    if previous is not None:
+                        documents.append(previous)
+                    continue
+                try:
+                    content_hash = file_hash(os.path.join(self.directory, name))
+                    if previous is not None and previous.content_hash == content_hash:
+                        # Touched but identical: keep the extraction, remember the new signature
+                        previous.signature = signature
+                        documents.append(previous)
+                        continue
+                    documents.append(self._load(name, signature, content_hash))
+                    (changed if previous is not None else added).append(name)
+                except Exception as e:
+                    print(f"Error loading corpus document {name}: {e}")
+                    if previous is not None:
+                        documents.append(previous)
+            removed = sorted(set(current) - set(files))
+            if not (added or changed or removed):
+                return None
+            self.snapshot = CorpusSnapshot(documents, self.snapshot.version + 1)
+            self.last_change = {
+                "version": self.snapshot.version,
+                "added": added,
+                "changed": changed,
+                "removed": removed,
+                "seconds": round(time.perf_counter() - started, 3)
+            }
+            return self.last_change
+
+    def stats(self) -> Dict:
+        """
+        Get corpus statistics.
+
+        Returns:
+            dict: Directory, snapshot size and the last change
+        """
+        return dict(self.snapshot.stats(), directory=self.directory, last_change=self.last_change)
+
+class CorpusWatcher:
+    """Background thread that polls a corpus and hands each new snapshot to a callback."""
+
+    def __init__(self, corpus: Corpus, on_change: Callable[[CorpusSnapshot, Dict], None],
+                 interval: Optional[float] = None):
+        """
+        Initialize the watcher.
+
+        Args:
+            corpus (Corpus): Corpus to refresh
+            on_change (callable): Called with (snapshot, change) after every change
+            interval (float): Seconds between polls (default CORPUS_POLL_SECONDS or 2)
+        """
+        self.corpus = corpus
+        self.on_change = on_change
+        self.interval = interval if interval is not None else float(os.getenv('CORPUS_POLL_SECONDS', '2'))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> Optional[Dict]:
+        """Refresh once and notify on a change."""
+        change = self.corpus.refresh()
+        if change:
+            self.on_change(self.corpus.snapshot, change)
+        return change
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error refreshing corpus {self.corpus.directory}: {e}")
+
+    def start(self) -> "CorpusWatcher":
+        """Start polling in a daemon thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="corpus-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
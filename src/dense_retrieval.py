@@ -0,0 +1,309 @@
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from retrieval import tokenize
+
+@lru_cache(maxsize=65536)
+def _hash_token(token: str) -> int:
+    """Stable 64-bit hash of a token (Python's hash() is randomized per process)."""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class HashingEmbedder:
+    """Offline embedder using the hashing trick over word unigrams and bigrams."""
+
+    def __init__(self, dim: int = 512):
+        """
+        Initialize the embedder.
+
+        Args:
+            dim (int): Embedding dimension
+        """
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts into L2-normalized float32 vectors.
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            np.ndarray: Matrix of shape (len(texts), dim)
+        """
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((_hash_token(f) for f in features), dtype=np.uint64, count=len(features))
+            indices = (hashes % np.uint64(self.dim)).astype(np.intp)
+            signs = np.where((hashes >> np.uint64(63)) == 0, 1.0, -1.0).astype(np.float32)
+            np.add.at(matrix[row], indices, signs)
+        # Sublinear term weighting, then unit length so dot product is cosine similarity
+        np.copysign(np.log1p(np.abs(matrix)), matrix, out=matrix)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+class GeminiEmbedder:
+    """Embedder backed by the Gemini embedding API."""
+
+    def __init__(self, model_name: str = "models/text-embedding-004"):
+        """
+        Initialize the embedder. Expects genai.configure() to have been called.
+
+        Args:
+            model_name (str): Gemini embedding model
+        """
+        import google.generativeai as genai
+        self._genai = genai
+        self.model_name = model_name
+        self.name = f"gemini-{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with the Gemini API.
+
+        Args:
+            texts (list): Texts to embed
+
+        Returns:
+            np.ndarray: L2-normalized float32 matrix
+        """
+        result = self._genai.embed_content(model=self.model_name, content=texts)
+        matrix = np.asarray(result['embedding'], dtype=np.float32).reshape(len(texts), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+def get_embedder(name: Optional[str] = None):
+    """
+    Create an embedder by name.
+
+    Args:
+        name (str): 'hashing' (default) or 'gemini'; read from EMBEDDER if omitted
+
+    Returns:
+        Embedder instance
+    """
+    name = (name or os.getenv('EMBEDDER', 'hashing')).lower()
+    if name == 'gemini':
+        return GeminiEmbedder(os.getenv('GEMINI_EMBEDDING_MODEL', 'models/text-embedding-004'))
+    return HashingEmbedder(int(os.getenv('HASHING_EMBEDDER_DIM', '512')))
+
+class DenseIndex:
+    """Dense retriever over a contiguous float32 embedding matrix stored as a memory-mapped .npy file."""
+
+    def __init__(self, chunks: List[str], matrix: np.ndarray, embedder):
+        """
+        Initialize the index. Use build() or open_or_build() instead of calling this directly.
+
+        Args:
+            chunks (list): Indexed text chunks
+            matrix (np.ndarray): Embedding matrix of shape (len(chunks), dim)
+            embedder: Object with an embed(texts) method used for queries
+        """
+        self.chunks = chunks
+        self.matrix = matrix
+        self.embedder = embedder
+
+    @staticmethod
+    def fingerprint(chunks: List[str], embedder) -> str:
+        """Identify an index by its chunks and embedder so stale files are rebuilt."""
+        digest = hashlib.sha256(embedder.name.encode('utf-8'))
+        for chunk in chunks:
+            digest.update(b'\0')
+            digest.update(chunk.encode('utf-8'))
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, chunks: List[str], embedder, path: Optional[str] = None,
+              batch_size: int = 64) -> "DenseIndex":
+        """
+        Embed chunks and optionally persist the matrix.
+
+        Args:
+            chunks (list): Text chunks
+            embedder: Embedder instance
+            path (str): Index path prefix; writes <path>.npy and <path>.json when given
+            batch_size (int): Chunks embedded per call
+
+        Returns:
+            DenseIndex: The new index (memory-mapped when persisted)
+        """
+        parts = [embedder.embed(chunks[i:i + batch_size]) for i in range(0, len(chunks), batch_size)]
+        matrix = np.ascontiguousarray(np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32),
+                                      dtype=np.float32)
+        if not path:
+            return cls(chunks, matrix, embedder)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to temporary files and rename so other workers never see a partial index
+        pid = os.getpid()
+        with open(f"{path}.{pid}.tmp.npy", 'wb') as f:
+            np.save(f, matrix)
+        with open(f"{path}.{pid}.tmp.json", 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': cls.fingerprint(chunks, embedder),
+                       'embedder': embedder.name, 'chunks': chunks}, f)
+        os.replace(f"{path}.{pid}.tmp.npy", f"{path}.npy")
+        os.replace(f"{path}.{pid}.tmp.json", f"{path}.json")
+        return cls.load(path, embedder)
+
+    @classmethod
+    def load(cls, path: str, embedder) -> "DenseIndex":
+        """
+        Memory-map a persisted index read-only so worker processes share the page cache.
+
+        Args:
+            path (str): Index path prefix
+            embedder: Embedder instance used for queries
+
+        Returns:
+            DenseIndex: Loaded index
+        """
+        with open(f"{path}.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        matrix = np.load(f"{path}.npy", mmap_mode='r')
+        return cls(meta['chunks'], matrix, embedder)
+
+    @classmethod
+    def open_or_build(cls, chunks: List[str], embedder, path: Optional[str]) -> "DenseIndex":
+        """
+        Reuse the on-disk index when it matches the chunks and embedder, otherwise rebuild it.
+
+        Args:
+            chunks (list): Text chunks
+            embedder: Embedder instance
+            path (str): Index path prefix (None keeps the index in memory only)
+
+        Returns:
+            DenseIndex: Ready index
+        """
+        if path and os.path.exists(f"{path}.npy") and os.path.exists(f"{path}.json"):
+            try:
+                with open(f"{path}.json", 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if meta.get('fingerprint') == cls.fingerprint(chunks, embedder):
+                    return cls.load(path, embedder)
+            except (OSError, ValueError) as e:
+                print(f"Dense index at {path} unreadable, rebuilding: {e}")
+        return cls.build(chunks, embedder, path)
+
+    @staticmethod
+    def prune(directory: str, keep) -> int:
+        """
+        Delete persisted indexes in a directory that are no longer used.
+
+        Args:
+            directory (str): Directory of index files (<name>.npy and <name>.json)
+            keep: Names still in use
+
+        Returns:
+            int: Number of files deleted
+        """
+        removed = 0
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return 0
+        for filename in names:
+            name, ext = os.path.splitext(filename)
+            # Temporary files belong to a build in progress, possibly in another worker
+            if ext not in ('.npy', '.json') or '.tmp' in name or name in keep:
+                continue
+            try:
+                os.remove(os.path.join(directory, filename))
+                removed += 1
+            except OSError as e:
+                print(f"Error removing stale dense index {filename}: {e}")
+        return removed
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the chunks most similar to a query.
+
+        Args:
+            query (str): Search query
+            top_k (int): Maximum number of results
+
+        Returns:
+            list: (chunk_id, score) pairs, best first
+        """
+        if len(self.chunks) == 0 or top_k <= 0:
+            return []
+        return _top_k(self.matrix @ self.embedder.embed([query])[0], top_k)
+
+class SegmentedDenseIndex:
+    """
+    Dense search over per-document DenseIndex segments.
+
+    Segment matrices are searched in place rather than stacked into one,
+    so memory-mapped segments stay shared with the other workers and
+    changing a document only embeds its own segment. Chunk ids run
+    through the segments in order.
+    """
+
+    def __init__(self, segments: List[DenseIndex], chunks, embedder):
+        """
+        Combine segments.
+
+        Args:
+            segments (list): One DenseIndex per document, in chunk order
+            chunks: All chunks, in the same order (e.g. a ChunkSequence)
+            embedder: Embedder instance used for queries
+        """
+        self.segments = tuple(segment for segment in segments if len(segment.chunks))
+        self.chunks = chunks
+        self.embedder = embedder
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the chunks most similar to a query.
+
+        Args:
+            query (str): Search query
+            top_k (int): Maximum number of results
+
+        Returns:
+            list: (chunk_id, score) pairs, best first
+        """
+        if not self.segments or top_k <= 0:
+            return []
+        query_vector = self.embedder.embed([query])[0]
+        return _top_k(np.concatenate([segment.matrix @ query_vector for segment in self.segments]), top_k)
+
+def _top_k(scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+    """Positive scores among the top_k highest, best first, as (index, score) pairs."""
+    n = len(scores)
+    if top_k < n:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(n)
+    best = candidates[np.argsort(-scores[candidates])]
+    return [(int(i), float(scores[i])) for i in best if scores[i] > 0]
+
+def reciprocal_rank_fusion(*rankings: List[Tuple[int, float]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Merge several rankings into one using reciprocal rank fusion.
+
+    Args:
+        rankings: (chunk_id, score) lists, best first
+        k (int): Rank smoothing constant
+
+    Returns:
+        list: Fused (chunk_id, score) pairs, best first
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, (chunk_id, _) in enumerate(ranking):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional
+
+# Bump when the stored layout or the extraction output format changes
+CACHE_FORMAT_VERSION = 1
+HEADER_SIZE = struct.Struct("<Q")
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's contents, read in blocks.
+
+    Args:
+        path (str): File to hash
+        block_size (int): Bytes read per block
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+class CachedPages:
+    """
+    Page texts of a cache entry, memory-mapped from disk.
+
+    Pages are decoded on access, so a hit costs no parsing and no more
+    memory than the pages actually read.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a cache entry file.
+
+        Args:
+            path (str): Entry written by ExtractionCache.put()
+        """
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (header_length,) = HEADER_SIZE.unpack_from(self._mmap, 0)
+        header_end = HEADER_SIZE.size + header_length
+        header = json.loads(self._mmap[HEADER_SIZE.size:header_end].decode('utf-8'))
+        self.meta = header["meta"]
+        # Byte offsets of page boundaries within the mapped file
+        self.offsets = [header_end + offset for offset in header["offsets"]]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.page(index)
+
+    def page(self, index: int) -> str:
+        """Decode one page."""
+        return self._mmap[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self.page(index)
+
+    def text(self) -> str:
+        """Decode the whole document in one pass."""
+        return self._mmap[self.offsets[0]:self.offsets[-1]].decode('utf-8')
+
+    def close(self):
+        self._mmap.close()
+
+class ExtractionCache:
+    """
+    Content-addressed on-disk cache of extracted page texts.
+
+    Entries are keyed by the PDF's content hash plus the extractor name and
+    version, written atomically and evicted least-recently-used once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            directory (str): Directory holding the entries
+            max_bytes (int): Total size kept before the least recently used entries are deleted
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(content_hash: str, extractor: str, version: str) -> str:
+        """
+        Cache key for one document and extractor.
+
+        Args:
+            content_hash (str): Hash of the source file's bytes
+            extractor (str): Extraction method name
+            version (str): Extractor library version(s)
+
+        Returns:
+            str: Hex key
+        """
+        raw = f"{CACHE_FORMAT_VERSION}|{content_hash}|{extractor}|{version}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pages")
+
+    def get(self, key: str) -> Optional[CachedPages]:
+        """
+        Map a cached entry.
+
+        Args:
+            key (str): Key from key()
+
+        Returns:
+            CachedPages, or None on a miss or unreadable entry
+        """
+        path = self._path(key)
+        try:
+            pages = CachedPages(path)
+            # Mark as recently used for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            pages = None
+        except Exception as e:
+            print(f"Error reading extraction cache entry {path}: {e}")
+            pages = None
+        with self._lock:
+            if pages is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return pages
+
+    def put(self, key: str, pages: List[str], meta: Optional[Dict] = None):
+        """
+        Store page texts atomically, then evict old entries if over budget.
+
+        Args:
+            key (str): Key from key()
+            pages (list): Page texts in order
+            meta (dict): Extra information stored with the entry
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        encoded = [page.encode('utf-8') for page in pages]
+        offsets = [0]
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        header = json.dumps({"meta": meta or {}, "offsets": offsets}).encode('utf-8')
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER_SIZE.pack(len(header)))
+                f.write(header)
+                for data in encoded:
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the directory fits in max_bytes."""
+        try:
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".pages"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                # Readers holding a mapping keep their pages; the name just disappears
+                os.remove(path)
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+            except OSError as e:
+                print(f"Error evicting extraction cache entry {path}: {e}")
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Directory, budget and hit / miss / eviction counts
+        """
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """
+    Create the extraction cache configured by PDF_CACHE, PDF_CACHE_DIR and PDF_CACHE_MAX_MB.
+
+    Returns:
+        ExtractionCache, or None when PDF_CACHE is 'false'
+    """
+    if os.getenv('PDF_CACHE', 'true').lower() != 'true':
+        return None
+    directory = os.getenv('PDF_CACHE_DIR', os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), 'data', 'extracted'))
+    return ExtractionCache(directory, int(float(os.getenv('PDF_CACHE_MAX_MB', '512')) * 1024 * 1024))
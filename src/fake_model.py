@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import math
+import random
+import threading
+import time
+from typing import Optional
+
+from llm_backend import LLMBackend
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+
+class TransientModelError(Exception):
+    """Injected upstream failure (treated as transient, like a 503)."""
+
+    code = 503
+
+class FakeResponse:
+    """Minimal stand-in for a Gemini response."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeModel(LLMBackend):
+    """
+    Local model double that injects latency and failures.
+
+    Answers are deterministic for a given prompt, so caches and coalescing
+    behave as they would against the real API.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, failure_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_latency: float = 5.0, seed: Optional[int] = None,
+                 distribution: str = "constant", latency_std: float = 0.0,
+                 first_chunk_latency: Optional[float] = None, chunk_interval: float = 0.0,
+                 chunk_words: int = 4, answer_words: int = 0):
+        """
+        Initialize the fake.
+
+        Args:
+            latency (float): Base (mean, or median for lognormal) latency in seconds
+            jitter (float): Uniform random latency added on top
+            failure_rate (float): Probability a call raises TransientModelError
+            slow_rate (float): Probability a call takes slow_latency instead (tail latency)
+            slow_latency (float): Latency of slow calls
+            seed (int): Seed for reproducible fault injection
+            distribution (str): 'constant', 'uniform' (latency +/- latency_std),
+                'normal' (std latency_std) or 'lognormal' (sigma latency_std)
+            latency_std (float): Spread parameter of the distribution
+            first_chunk_latency (float): Time to first chunk when streaming
+                (defaults to the drawn latency)
+            chunk_interval (float): Delay between streamed chunks
+            chunk_words (int): Words per streamed chunk
+            answer_words (int): Pad answers with filler up to this many words (0 = no padding)
+        """
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.model_name = "fake-model"
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.distribution = distribution
+        self.latency_std = latency_std
+        self.first_chunk_latency = first_chunk_latency
+        self.chunk_interval = chunk_interval
+        self.chunk_words = max(1, chunk_words)
+        self.answer_words = answer_words
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _draw_latency(self) -> float:
+        """Draw a base latency from the configured distribution. Caller must hold the lock."""
+        if self.distribution == "uniform":
+            value = self._random.uniform(self.latency - self.latency_std, self.latency + self.latency_std)
+        elif self.distribution == "normal":
+            value = self._random.gauss(self.latency, self.latency_std)
+        elif self.distribution == "lognormal":
+            value = self._random.lognormvariate(math.log(max(self.latency, 1e-6)), self.latency_std)
+        else:
+            value = self.latency
+        return max(0.0, value)
+
+    def _plan(self):
+        """Draw this call's latency and whether it fails."""
+        with self._lock:
+            self.calls += 1
+            slow = self._random.random() < self.slow_rate
+            delay = self.slow_latency if slow else self._draw_latency() + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+        return delay, fail
+
+    @staticmethod
+    def answer_for(prompt: str) -> str:
+        """Deterministic answer text for a prompt."""
+        marker = "CURRENT CUSTOMER QUESTION:"
+        question = prompt.split(marker, 1)[1].split("\n", 1)[0].strip() if marker in prompt else prompt[-80:].strip()
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:6]
+        return f"[fake answer {digest}] {question}"
+
+    def _answer(self, prompt) -> str:
+        text = self.answer_for(str(prompt))
+        missing = self.answer_words - len(text.split())
+        if missing > 0:
+            text += " " + " ".join("lorem" for _ in range(missing))
+        return text
+
+    def _chunks(self, text: str):
+        words = text.split(" ")
+        for start in range(0, len(words), self.chunk_words):
+            piece = " ".join(words[start:start + self.chunk_words])
+            yield piece if start == 0 else " " + piece
+
+    def _stream(self, prompt, delay: float, fail: bool):
+        time.sleep(self.first_chunk_latency if self.first_chunk_latency is not None else delay)
+        if fail:
+            raise TransientModelError("Injected upstream failure")
+        for index, piece in enumerate(self._chunks(self._answer(prompt))):
+            if index:
+                time.sleep(self.chunk_interval)
+            yield FakeResponse(piece)
+
+    async def _astream(self, prompt, delay: float, fail: bool):
+        await asyncio.sleep(self.first_chunk_latency if self.first_chunk_latency is not None else delay)
+        if fail:
+            raise TransientModelError("Injected upstream failure")
+        for index, piece in enumerate(self._chunks(self._answer(prompt))):
+            if index:
+                await asyncio.sleep(self.chunk_interval)
+            yield FakeResponse(piece)
+
+    @staticmethod
+    def _timeout(request_options) -> Optional[float]:
+        """Transport timeout requested by the caller, like the Gemini client's request_options."""
+        return (request_options or {}).get('timeout')
+
+    def generate_content(self, prompt, stream: bool = False, request_options=None, **kwargs):
+        delay, fail = self._plan()
+        if stream:
+            return self._stream(prompt, delay, fail)
+        timeout = self._timeout(request_options)
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Fake request timed out after {timeout:.2f}s")
+        time.sleep(delay)
+        if fail:
+            raise TransientModelError("Injected upstream failure")
+        return FakeResponse(self._answer(prompt))
+
+    async def generate_content_async(self, prompt, stream: bool = False, request_options=None, **kwargs):
+        delay, fail = self._plan()
+        if stream:
+            return self._astream(prompt, delay, fail)
+        timeout = self._timeout(request_options)
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError(f"Fake request timed out after {timeout:.2f}s")
+        await asyncio.sleep(delay)
+        if fail:
+            raise TransientModelError("Injected upstream failure")
+        return FakeResponse(self._answer(prompt))
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from response_cache import content_words, same_content, shingles
+
+FAQ_PROMPT = """From the business information below, write the questions customers are most likely to ask
+(opening hours, address, phone, email, services, pricing tiers, payment, refunds, warranty, support and other policies)
+together with complete, accurate answers taken only from the information.
+
+Return ONLY a JSON array. Each item must be an object with:
+- "questions": 3 to 5 different phrasings of the same question
+- "answer": the answer, written as a friendly reply to the customer
+
+Only include questions the information clearly answers. At most {max_items} items.
+
+Business name: {business_name}
+
+Business Information:
+{text}
+"""
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the extracted text, used to key the stored bank."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class FAQBank:
+    """Precomputed question/answer bank with a fast local matcher."""
+
+    def __init__(self, entries: List[Dict], source_hash: str = ""):
+        """
+        Build the matcher.
+
+        Args:
+            entries (list): Items with 'questions' (list of phrasings) and 'answer'
+            source_hash (str): Content hash of the text the bank was generated from
+        """
+        self.entries = entries
+        self.source_hash = source_hash
+        # Each phrasing is a separate candidate pointing at its entry
+        self._phrasings = []  # (entry index, shingle set, content words)
+        self._index = defaultdict(list)  # shingle -> phrasing ids
+        for entry_id, entry in enumerate(entries):
+            for question in entry.get('questions', []):
+                phrase_shingles = shingles(question)
+                if not phrase_shingles:
+                    continue
+                phrasing_id = len(self._phrasings)
+                self._phrasings.append((entry_id, phrase_shingles, content_words(question)))
+                for shingle in phrase_shingles:
+                    self._index[shingle].append(phrasing_id)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def match(self, question: str, threshold: float = 0.6) -> Optional[Dict]:
+        """
+        Find the bank entry that answers a question.
+
+        Only phrasings sharing a shingle with the question are scored
+        (Jaccard similarity of shingle sets). A phrasing above the threshold
+        is still refused when its content words differ from the question's,
+        so "Basic plan" never gets the "Premium plan" answer.
+
+        Args:
+            question (str): User question
+            threshold (float): Minimum similarity to count as confident
+
+        Returns:
+            dict: {'answer', 'question', 'score'} for a confident match, otherwise None
+        """
+        query_shingles = shingles(question)
+        if not query_shingles:
+            return None
+        overlaps = defaultdict(int)
+        for shingle in query_shingles:
+            for phrasing_id in self._index.get(shingle, ()):
+                overlaps[phrasing_id] += 1
+
+        query_words = content_words(question)
+        best_id, best_score = None, 0.0
+        for phrasing_id, overlap in overlaps.items():
+            _, phrase_shingles, phrase_words = self._phrasings[phrasing_id]
+            score = overlap / (len(query_shingles) + len(phrase_shingles) - overlap)
+            if score < threshold or score <= best_score:
+                continue
+            if not same_content(query_words, phrase_words):
+                continue
+            best_id, best_score = phrasing_id, score
+
+        if best_id is None:
+            return None
+        entry = self.entries[self._phrasings[best_id][0]]
+        return {"answer": entry['answer'], "question": entry['questions'][0], "score": round(best_score, 3)}
+
+    @staticmethod
+    def parse(response_text: str) -> List[Dict]:
+        """
+        Parse the model's JSON output into validated entries.
+
+        Args:
+            response_text (str): Raw model output (may be wrapped in a code fence)
+
+        Returns:
+            list: Entries with non-empty 'questions' and 'answer'
+        """
+        match = re.search(r"\[.*\]", response_text, re.DOTALL)
+        if not match:
+            return []
+        try:
+            items = json.loads(match.group(0))
+        except ValueError:
+            return []
+        entries = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            questions = [q for q in item.get('questions', []) if isinstance(q, str) and q.strip()]
+            answer = item.get('answer')
+            if questions and isinstance(answer, str) and answer.strip():
+                entries.append({"questions": questions, "answer": answer.strip()})
+        return entries
+
+    @classmethod
+    def generate(cls, model, text: str, business_name: str = "Our Business",
+                 max_items: int = 25) -> "FAQBank":
+        """
+        Generate a bank with one model call.
+
+        Args:
+            model: Model with generate_content
+            text (str): Extracted business text
+            business_name (str): Name of the business
+            max_items (int): Maximum number of questions
+
+        Returns:
+            FAQBank: Generated bank
+        """
+        prompt = FAQ_PROMPT.format(max_items=max_items, business_name=business_name, text=text)
+        response = model.generate_content(prompt)
+        return cls(cls.parse(response.text), content_hash(text))
+
+    def save(self, path: str):
+        """Write the bank atomically as JSON."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"source_hash": self.source_hash, "entries": self.entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FAQBank":
+        """Read a bank written by save()."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('entries', []), data.get('source_hash', ''))
+
+    @classmethod
+    def merge(cls, banks: List["FAQBank"], source_hash: str = "") -> "FAQBank":
+        """
+        Combine banks (e.g. one per corpus document) into one matcher.
+
+        Args:
+            banks (list): Banks to combine
+            source_hash (str): Content hash of the combined text
+
+        Returns:
+            FAQBank: Bank holding every entry
+        """
+        return cls([entry for bank in banks for entry in bank.entries], source_hash)
+
+    @staticmethod
+    def path(directory: str, text: str) -> str:
+        """File holding the bank generated from a text."""
+        return os.path.join(directory, f"{content_hash(text)}.faq.json")
+
+    @staticmethod
+    def prune(directory: str, keep) -> int:
+        """
+        Delete stored banks whose text is no longer served.
+
+        Args:
+            directory (str): Directory holding banks
+            keep: Content hashes still in use
+
+        Returns:
+            int: Number of banks deleted
+        """
+        removed = 0
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return 0
+        for name in names:
+            if name.endswith('.faq.json') and name[:-len('.faq.json')] not in keep:
+                try:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+                except OSError as e:
+                    print(f"Error removing stale FAQ bank {name}: {e}")
+        return removed
+
+    @classmethod
+    def load_or_generate(cls, model, text: str, directory: str, business_name: str = "Our Business") -> "FAQBank":
+        """
+        Load the stored bank for this text, generating and storing it on first use.
+
+        Args:
+            model: Model with generate_content
+            text (str): Extracted business text
+            directory (str): Directory holding banks, one file per content hash
+            business_name (str): Name of the business
+
+        Returns:
+            FAQBank: Bank for the text
+        """
+        path = cls.path(directory, text)
+        if os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError) as e:
+                print(f"FAQ bank at {path} unreadable, regenerating: {e}")
+        bank = cls.generate(model, text, business_name)
+        if len(bank):
+            bank.save(path)
+        return bank
@@ -1,8 +1,31 @@
-import google.generativeai as genai
 import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional
 import json
+import re
+from retrieval import BM25Index, chunk_text
+from chunker import StructuredChunker
+from response_cache import ResponseCache, SemanticCache, fingerprint, normalize_question
+from singleflight import SingleFlight
+from context_cache import get_context_cache
+from llm_backend import get_backend
+from token_budget import TokenBudget
+from faq_bank import FAQBank, content_hash
+from resilience import ResilientCaller, is_transient, iter_with_timeouts
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from rate_limit import QuotaScheduler, get_bucket_store
+from priority_scheduler import PriorityScheduler
+
+DEFAULT_SESSION = "default"
+NO_CONTEXT_MESSAGE = "I'm sorry, but I don't have access to business information yet. Please contact the business directly for assistance."
+# Language names or codes ("spanish", "pt-br", "español"): letters separated by single spaces or hyphens
+_LANGUAGE_RE = re.compile(r"^[^\W\d_]+(?:[ -][^\W\d_]+)*$")
+ERROR_MESSAGE = "I apologize, but I'm having trouble processing your request right now. Please try again later or contact us directly."
+DEGRADED_SNIPPET_INTRO = "I can't give a full answer right now, but here is what our business information says:"
 
 class ConversationMemory:
     """Simple conversation memory to maintain context."""
@@ -10,26 +33,245 @@ class ConversationMemory:
     def __init__(self, max_history: int = 10):
         self.history = []
         self.max_history = max_history
+        self.size = 0  # Characters held in history, used for global memory accounting
+        self.last_access = time.time()
+        self.summary = ""  # Running summary of exchanges folded out of history
+        self.compacting = False
     
     def add_exchange(self, question: str, answer: str):
         """Add a question-answer pair to history."""
         self.history.append({
             'question': question,
             'answer': answer,
-            'timestamp': None  # You can add timestamp if needed
+            'timestamp': time.time()
         })
+        self.size += len(question) + len(answer)
         
         # Keep only recent history
         if len(self.history) > self.max_history:
+            for exchange in self.history[:-self.max_history]:
+                self.size -= len(exchange['question']) + len(exchange['answer'])
             self.history = self.history[-self.max_history:]
     
     def get_context(self, limit: int = 5) -> List[Dict]:
         """Get recent conversation context."""
         return self.history[-limit:]
     
+    def apply_compaction(self, folded: List[Dict], summary: str):
+        """
+        Replace folded exchanges at the start of history with an updated summary.
+        
+        Args:
+            folded (list): Exchanges that were summarized
+            summary (str): Summary covering the previous summary and the folded exchanges
+        """
+        count = 0
+        while count < len(folded) and count < len(self.history) and self.history[count] is folded[count]:
+            count += 1
+        for exchange in self.history[:count]:
+            self.size -= len(exchange['question']) + len(exchange['answer'])
+        self.history = self.history[count:]
+        self.size += len(summary) - len(self.summary)
+        self.summary = summary
+    
     def clear_history(self):
         """Clear conversation history."""
         self.history = []
+        self.summary = ""
+        self.size = 0
+
+class SessionStore:
+    """Per-session conversation memories with LRU eviction, idle TTL and a global size cap."""
+    
+    def __init__(self, max_sessions: int = 10000, max_total_chars: int = 50_000_000,
+                 ttl_seconds: float = 3600, max_history: int = 10):
+        """
+        Initialize the session store.
+        
+        Args:
+            max_sessions (int): Maximum number of live sessions
+            max_total_chars (int): Global cap on characters held across all sessions
+            ttl_seconds (float): Idle time after which a session is dropped
+            max_history (int): Exchanges kept per session
+        """
+        self.max_sessions = max_sessions
+        self.max_total_chars = max_total_chars
+        self.ttl_seconds = ttl_seconds
+        self.max_history = max_history
+        self.total_chars = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Ordered from least to most recently used
+        self._sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _expire(self, now: float):
+        """Drop idle sessions from the LRU end. Caller must hold the lock."""
+        while self._sessions:
+            session_id, memory = next(iter(self._sessions.items()))
+            if now - memory.last_access < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.total_chars -= memory.size
+            self.expirations += 1
+    
+    def _evict(self, keep: str):
+        """Evict least recently used sessions until within limits. Caller must hold the lock."""
+        while self._sessions and (len(self._sessions) > self.max_sessions
+                                  or self.total_chars > self.max_total_chars):
+            session_id, memory = next(iter(self._sessions.items()))
+            if session_id == keep:
+                break
+            self._sessions.popitem(last=False)
+            self.total_chars -= memory.size
+            self.evictions += 1
+    
+    def get(self, session_id: str) -> ConversationMemory:
+        """
+        Get the memory for a session, creating it if needed.
+        
+        Args:
+            session_id (str): Session key (e.g. a WhatsApp number)
+            
+        Returns:
+            ConversationMemory: Memory for the session
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = ConversationMemory(self.max_history)
+                self._sessions[session_id] = memory
+                self._evict(session_id)
+            else:
+                self._sessions.move_to_end(session_id)
+            memory.last_access = now
+            return memory
+    
+    def get_context(self, session_id: str, limit: int = 5) -> List[Dict]:
+        """Get recent conversation context for a session without creating it."""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None or time.time() - memory.last_access >= self.ttl_seconds:
+                return []
+            return list(memory.get_context(limit))
+    
+    def add_exchange(self, session_id: str, question: str, answer: str):
+        """Add a question-answer pair to a session's history."""
+        memory = self.get(session_id)
+        with self._lock:
+            before = memory.size
+            memory.add_exchange(question, answer)
+            if self._sessions.get(session_id) is memory:
+                self.total_chars += memory.size - before
+                self._evict(session_id)
+    
+    def get_summary(self, session_id: str) -> str:
+        """Get the running summary of a session's older exchanges."""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            return memory.summary if memory else ""
+    
+    def begin_compaction(self, session_id: str, keep_raw: int, min_batch: int = 2):
+        """
+        Claim a session's oldest exchanges for compaction.
+        
+        Args:
+            session_id (str): Session key
+            keep_raw (int): Most recent exchanges to keep verbatim
+            min_batch (int): Minimum exchanges worth folding
+            
+        Returns:
+            tuple: (previous summary, exchanges to fold), or None if nothing to do
+        """
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None or memory.compacting or len(memory.history) - keep_raw < min_batch:
+                return None
+            memory.compacting = True
+            return memory.summary, list(memory.history[:len(memory.history) - keep_raw])
+    
+    def finish_compaction(self, session_id: str, folded: List[Dict], summary: Optional[str]):
+        """
+        Apply a compaction result (or release the claim when summary is None).
+        
+        Args:
+            session_id (str): Session key
+            folded (list): Exchanges returned by begin_compaction
+            summary (str): Updated running summary
+        """
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                return
+            memory.compacting = False
+            if summary is None:
+                return
+            before = memory.size
+            memory.apply_compaction(folded, summary)
+            self.total_chars += memory.size - before
+    
+    def clear(self, session_id: str):
+        """Remove a single session."""
+        with self._lock:
+            memory = self._sessions.pop(session_id, None)
+            if memory is not None:
+                self.total_chars -= memory.size
+    
+    def history(self, session_id: str) -> List[Dict]:
+        """Get the full history of a session."""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            return list(memory.history) if memory else []
+    
+    def stats(self) -> Dict:
+        """
+        Get store statistics.
+        
+        Returns:
+            dict: Session counts, memory usage and eviction counters
+        """
+        with self._lock:
+            self._expire(time.time())
+            return {
+                "active_sessions": len(self._sessions),
+                "total_chars": self.total_chars,
+                "max_sessions": self.max_sessions,
+                "max_total_chars": self.max_total_chars,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+class BusinessKnowledge:
+    """
+    Business context and its retrieval indexes, replaced as one object.
+    
+    GeminiAgent swaps the whole object in a single assignment, so a request
+    that takes a reference keeps a consistent text, retriever and dense
+    index even if a new version is loaded while it runs.
+    """
+    
+    __slots__ = ("text", "name", "context_hash", "retriever", "dense_retriever", "corpus")
+    
+    def __init__(self, text: str = "", name: str = "Our Business", context_hash: str = "",
+                 retriever=None, dense_retriever=None, corpus=None):
+        """
+        Args:
+            text (str): Full business text
+            name (str): Business name
+            context_hash (str): Fingerprint of the text and name (keys caches)
+            retriever: BM25Index or SegmentedBM25Index over the chunks
+            dense_retriever: DenseIndex over the same chunks, or None
+            corpus: CorpusSnapshot the knowledge was built from, or None
+        """
+        self.text = text
+        self.name = name
+        self.context_hash = context_hash
+        self.retriever = retriever
+        self.dense_retriever = dense_retriever
+        self.corpus = corpus
 
 class GeminiAgent:
     """AI Agent powered by Google's Gemini model for business inquiries."""
@@ -44,19 +286,46 @@ class GeminiAgent:
         # Load environment variables from config folder
         load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config', '.env'))
         
-        # Configure Gemini
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key or api_key == "your_gemini_api_key_here":
-            raise ValueError("Please set your GEMINI_API_KEY in the .env file")
+        # Initialize the LLM backend ('gemini', or 'fake' for offline load tests)
+        self.model = get_backend(model_name)
+        
+        # Optional explicit caching of the static prompt prefix ('gemini', 'local' or off)
+        self.context_cache = get_context_cache(self.model, model_name)
+        self.prefix_cached = False
+        
+        # Business context and memory; the context and its indexes are swapped as one object
+        self.knowledge = BusinessKnowledge()
+        self._knowledge_lock = threading.RLock()
+        # Dense indexes of corpus documents, reused while a document is unchanged
+        self._dense_segments: Dict[tuple, object] = {}
+        # FAQ banks of corpus documents by text hash, reused while a document is unchanged
+        self._faq_segments: Dict[str, FAQBank] = {}
+        self._embedder = None
+        self.sessions = SessionStore(
+            max_sessions=int(os.getenv('SESSION_MAX_SESSIONS', '10000')),
+            max_total_chars=int(os.getenv('SESSION_MAX_CHARS', '50000000')),
+            ttl_seconds=float(os.getenv('SESSION_TTL_SECONDS', '3600'))
+        )
         
-        genai.configure(api_key=api_key)
+        # Rolling history compaction: older exchanges are folded into a running summary
+        # in the background, and prompts carry the summary plus the last few raw turns
+        self.history_compaction = os.getenv('HISTORY_COMPACTION', 'true').lower() == 'true'
+        self.history_raw_turns = int(os.getenv('HISTORY_RAW_TURNS', '4'))
+        self.history_summary_max_words = int(os.getenv('HISTORY_SUMMARY_MAX_WORDS', '150'))
+        self._compaction_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="compaction")
+        self.compactions = 0
+        self.compaction_failures = 0
         
-        # Initialize model
-        self.model = genai.GenerativeModel(model_name)
+        # Retrieval settings: only the most relevant chunks are sent per request
+        self.retrieval_top_k = int(os.getenv('RETRIEVAL_TOP_K', '5'))
+        self.context_char_budget = int(os.getenv('CONTEXT_CHAR_BUDGET', '6000'))
+        # 'bm25', 'dense' or 'hybrid'; dense retrieval needs numpy
+        self.retrieval_mode = os.getenv('RETRIEVAL_MODE', 'bm25').lower()
+        self.dense_index_path = os.getenv('DENSE_INDEX_PATH', os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), 'data', 'dense_index'))
         
-        # Business context and memory
-        self.business_context = ""
-        self.memory = ConversationMemory()
+        # Per-request prompt token ceiling; lowest-value context and history are dropped first
+        self.token_budget = TokenBudget(max_tokens=int(os.getenv('PROMPT_TOKEN_BUDGET', '8000')))
         
         # Generation config for better responses
         self.generation_config = {
@@ -65,32 +334,376 @@ class GeminiAgent:
             "top_k": 40,
             "max_output_tokens": 1024,
         }
+        
+        # Cap on concurrent LLM calls, shared by channel priority classes with weighted fair queuing
+        self.max_concurrency = int(os.getenv('LLM_MAX_CONCURRENCY', '32'))
+        self.llm_scheduler = PriorityScheduler(
+            max_concurrency=self.max_concurrency,
+            classes=PriorityScheduler.parse_classes(os.getenv('LLM_PRIORITY_CLASSES', ''))
+        )
+        
+        # Deadline budget, retries with jittered backoff and optional hedging around model calls
+        self.resilience = ResilientCaller(
+            deadline_seconds=float(os.getenv('LLM_DEADLINE_SECONDS', '12')),
+            max_retries=int(os.getenv('LLM_MAX_RETRIES', '2')),
+            base_delay=float(os.getenv('LLM_RETRY_BASE_DELAY', '0.25')),
+            max_delay=float(os.getenv('LLM_RETRY_MAX_DELAY', '4')),
+            hedging=os.getenv('LLM_HEDGING', 'false').lower() == 'true',
+            hedge_delay=float(os.getenv('LLM_HEDGE_DELAY', '2'))
+        )
+        # A stream must start within the deadline and may then stall this long between chunks
+        self.stream_idle_timeout = float(os.getenv('LLM_STREAM_IDLE_SECONDS', '10'))
+        
+        # Circuit breaker: during an outage calls fast-fail to degraded answers
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('LLM_BREAKER_FAILURES', '5')),
+            recovery_timeout=float(os.getenv('LLM_BREAKER_RECOVERY_SECONDS', '30'))
+        )
+        self.degraded_snippet_chars = int(os.getenv('DEGRADED_SNIPPET_CHARS', '500'))
+        
+        # Global requests/tokens-per-minute quota: calls queue for capacity instead of hitting 429s
+        self.quota = QuotaScheduler(
+            rpm=float(os.getenv('LLM_RPM', '0')),
+            tpm=float(os.getenv('LLM_TPM', '0')),
+            max_wait=float(os.getenv('LLM_QUOTA_MAX_WAIT', os.getenv('LLM_DEADLINE_SECONDS', '12'))),
+            store=get_bucket_store(os.getenv('RATE_LIMIT_BACKEND', 'memory'), os.getenv('REDIS_URL'))
+        )
+        
+        # Identical history-free requests in flight share one upstream call
+        self.single_flight = SingleFlight()
+        
+        # Exact-match answer cache for history-free questions
+        self.response_cache = ResponseCache(
+            max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1000')),
+            ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL', '3600'))
+        )
+        # Second tier: reuse answers to near-duplicate (paraphrased) questions
+        self.semantic_cache = SemanticCache(
+            max_entries=int(os.getenv('SEMANTIC_CACHE_SIZE', '2000')),
+            ttl_seconds=float(os.getenv('SEMANTIC_CACHE_TTL', '3600')),
+            threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.75')),
+            sample_rate=float(os.getenv('SEMANTIC_CACHE_SAMPLE_RATE', '0.05')),
+            sample_text=os.getenv('SEMANTIC_CACHE_SAMPLE_TEXT', 'false').lower() == 'true'
+        )
+        
+        # Precomputed FAQ answers served without an LLM call
+        self.faq_bank: Optional[FAQBank] = None
+        self.faq_threshold = float(os.getenv('FAQ_MATCH_THRESHOLD', '0.6'))
+        self.faq_bank_dir = os.getenv('FAQ_BANK_DIR', os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), 'data', 'faq'))
+        
+        # How each answer was produced: llm, coalesced (shared an identical in-flight call), exact_cache,
+        # semantic_cache, faq, degraded, error, no_context
+        self.answer_sources = Counter()
+        self._sources_lock = threading.Lock()
+        
+        # Business summaries memoized per (context hash, length, language), computed in the background;
+        # at most SUMMARY_MAX_VARIANTS are cached (least recently used dropped) or being computed
+        self._summaries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._summary_jobs: Dict[tuple, Future] = {}
+        self.summary_max_variants = max(1, int(os.getenv('SUMMARY_MAX_VARIANTS', '16')))
+        self.summary_languages = {language.strip().lower() for language in
+                                  os.getenv('SUMMARY_LANGUAGES', '').split(',') if language.strip()}
+        self._summary_lock = threading.Lock()
+        self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+        self.summary_prewarm = os.getenv('SUMMARY_PREWARM', 'true').lower() == 'true'
     
-    def set_business_context(self, pdf_content: str, business_name: str = "Our Business"):
+    def set_business_context(self, pdf_content: str, business_name: str = "Our Business",
+                             chunks: Optional[List[str]] = None):
         """
         Set the business context from PDF content.
         
         Args:
             pdf_content (str): Text content from business PDF
             business_name (str): Name of the business
+            chunks (list): Pre-split chunks (e.g. PDFProcessor.iter_structured_chunks()); split here
+                by CHUNK_STRATEGY if omitted
         """
-        self.business_context = pdf_content
-        self.business_name = business_name
-        print(f"Business context loaded. Content length: {len(pdf_content)} characters")
+        if chunks is None:
+            if os.getenv('CHUNK_STRATEGY', 'structured').lower() == 'structured':
+                chunks = [chunk.text for chunk in StructuredChunker().split_text(pdf_content)]
+            else:
+                chunks = chunk_text(pdf_content)
+        retriever = BM25Index(chunks)
+        dense_retriever = None
+        if self.retrieval_mode in ('dense', 'hybrid'):
+            from dense_retrieval import DenseIndex
+            dense_retriever = DenseIndex.open_or_build(retriever.chunks, self._get_embedder(), self.dense_index_path)
+        self._swap_knowledge(BusinessKnowledge(
+            pdf_content, business_name, fingerprint(pdf_content, business_name), retriever, dense_retriever))
+        print(f"Business context loaded. Content length: {len(pdf_content)} characters, "
+              f"{len(retriever.chunks)} chunks indexed")
     
-    def _build_prompt(self, user_query: str, include_history: bool = True) -> str:
+    def set_corpus(self, snapshot, business_name: str = "Our Business"):
         """
-        Build the prompt for Gemini including context and history.
+        Set the business context from a corpus snapshot (see corpus.Corpus).
+        
+        The snapshot's per-document BM25 segments are used as they are, and
+        dense indexes are only embedded for documents that changed, so the
+        cost follows the size of the change. Requests already running finish
+        on the previous knowledge.
+        
+        Args:
+            snapshot (CorpusSnapshot): Corpus version to serve
+            business_name (str): Name of the business
+        """
+        with self._knowledge_lock:
+            dense_retriever = None
+            if self.retrieval_mode in ('dense', 'hybrid'):
+                from dense_retrieval import DenseIndex, SegmentedDenseIndex
+                # One memory-mapped file per document content, shared by every worker
+                directory = f"{self.dense_index_path}_segments" if self.dense_index_path else None
+                segments = {}
+                for document in snapshot.documents:
+                    key = (document.name, document.content_hash)
+                    segments[key] = self._dense_segments.get(key) or DenseIndex.open_or_build(
+                        [chunk.text for chunk in document.chunks], self._get_embedder(),
+                        os.path.join(directory, document.content_hash) if directory else None)
+                self._dense_segments = segments
+                if directory:
+                    DenseIndex.prune(directory, {document.content_hash for document in snapshot.documents})
+                dense_retriever = SegmentedDenseIndex(list(segments.values()), snapshot.retriever.chunks,
+                                                      self._get_embedder())
+            self._swap_knowledge(BusinessKnowledge(
+                snapshot.text, business_name, fingerprint(snapshot.context_hash, business_name),
+                snapshot.retriever, dense_retriever, snapshot))
+        print(f"Corpus version {snapshot.version} loaded: {len(snapshot.documents)} documents, "
+              f"{len(snapshot.retriever.chunks)} chunks indexed")
+    
+    def _get_embedder(self):
+        """Embedder for dense retrieval, created once."""
+        if self._embedder is None:
+            from dense_retrieval import get_embedder
+            self._embedder = get_embedder()
+        return self._embedder
+    
+    def _swap_knowledge(self, knowledge: BusinessKnowledge):
+        """
+        Replace the business knowledge and invalidate what depended on the old one.
+        
+        Args:
+            knowledge (BusinessKnowledge): Fully built replacement
+        """
+        with self._knowledge_lock:
+            previous = self.knowledge
+            # A single assignment: each request sees either the old or the new knowledge, never a mix
+            self.knowledge = knowledge
+            if previous.context_hash and knowledge.context_hash != previous.context_hash:
+                # Cache keys include the context hash; entries of the old context are unreachable
+                self.response_cache.clear()
+                self.semantic_cache.clear()
+            self._refresh_context_cache()
+            if self.faq_bank is not None and self.faq_bank.source_hash != content_hash(knowledge.text):
+                self.faq_bank = None
+            with self._summary_lock:
+                # Summaries of previous contexts can no longer be served
+                self._summaries = OrderedDict((key, value) for key, value in self._summaries.items()
+                                              if key[0] == knowledge.context_hash)
+        if self.summary_prewarm:
+            self.warm_business_summary()
+    
+    @property
+    def business_context(self) -> str:
+        return self.knowledge.text
+    
+    @property
+    def business_name(self) -> str:
+        return self.knowledge.name
+    
+    @property
+    def context_hash(self) -> str:
+        return self.knowledge.context_hash
+    
+    @property
+    def retriever(self):
+        return self.knowledge.retriever
+    
+    @property
+    def dense_retriever(self):
+        return self.knowledge.dense_retriever
+    
+    def load_faq_bank(self, text: Optional[str] = None) -> int:
+        """
+        Load the FAQ answer bank for the extracted text, generating and storing it once per content.
+        
+        A corpus gets one bank per document, so a change only generates the
+        banks of the documents that changed. Stored banks of texts no longer
+        served are deleted from FAQ_BANK_DIR.
+        
+        Args:
+            text (str): Extracted business text (defaults to the current business context)
+            
+        Returns:
+            int: Number of questions in the bank
+        """
+        knowledge = self.knowledge
+        if text is None and knowledge.corpus is not None:
+            return self._load_corpus_faq_bank(knowledge)
+        text = knowledge.text if text is None else text
+        if not text:
+            return 0
+        try:
+            self.faq_bank = FAQBank.load_or_generate(self.model, text, self.faq_bank_dir, knowledge.name)
+            print(f"FAQ bank loaded with {len(self.faq_bank)} questions")
+            FAQBank.prune(self.faq_bank_dir, {content_hash(text)})
+        except Exception as e:
+            print(f"Error building FAQ bank: {e}")
+            self.faq_bank = None
+        return len(self.faq_bank) if self.faq_bank else 0
+    
+    def _load_corpus_faq_bank(self, knowledge: BusinessKnowledge) -> int:
+        """
+        Serve one combined bank built from per-document banks.
+        
+        Args:
+            knowledge (BusinessKnowledge): Corpus knowledge the bank is for
+            
+        Returns:
+            int: Number of questions in the bank
+        """
+        banks = {}
+        for document in knowledge.corpus.documents:
+            if not document.text.strip():
+                continue
+            key = content_hash(document.text)
+            # Banks define __len__, so an empty one is falsy but still reused
+            bank = banks[key] if key in banks else self._faq_segments.get(key)
+            if bank is None:
+                try:
+                    bank = FAQBank.load_or_generate(self.model, document.text, self.faq_bank_dir, knowledge.name)
+                except Exception as e:
+                    print(f"Error building FAQ bank for {document.name}: {e}")
+                    continue
+            banks[key] = bank
+        self._faq_segments = banks
+        if not banks:
+            return 0
+        with self._knowledge_lock:
+            if self.knowledge is not knowledge:
+                # A newer corpus version was swapped in meanwhile; it loads its own bank
+                return 0
+            self.faq_bank = FAQBank.merge(list(banks.values()), content_hash(knowledge.text))
+        print(f"FAQ bank loaded with {len(self.faq_bank)} questions from {len(banks)} documents")
+        FAQBank.prune(self.faq_bank_dir, set(banks))
+        return len(self.faq_bank)
+    
+    def _count_source(self, source: str):
+        with self._sources_lock:
+            self.answer_sources[source] += 1
+    
+    def _refresh_context_cache(self):
+        """
+        Register the static prompt prefix with the context cache, if one is configured.
+        
+        Only business information that would be sent whole anyway is cached:
+        a larger document is reduced to retrieved chunks per question, and a
+        prefix over the token budget would crowd out the question and history.
+        """
+        if self.context_cache is None:
+            return
+        prefix = self._build_system_prompt(self.business_context)
+        too_large = (len(self.business_context) > self.context_char_budget
+                     or self.token_budget.estimator.estimate(prefix) > self.token_budget.max_tokens)
+        if too_large:
+            print("Context caching off: business information exceeds CONTEXT_CHAR_BUDGET or "
+                  "PROMPT_TOKEN_BUDGET, sending retrieved chunks instead")
+            self.prefix_cached = False
+            self.context_cache.clear()
+            return
+        try:
+            self.context_cache.refresh(prefix)
+            self.prefix_cached = True
+        except Exception as e:
+            # e.g. the context is below the model's minimum cacheable size
+            print(f"Context caching unavailable, sending full prompts: {e}")
+            self.prefix_cached = False
+    
+    def _select_context(self, user_query: str) -> List:
+        """
+        Select the business information candidates for a query.
+        
+        Small documents are sent whole; larger ones are reduced to the top-k
+        retrieved chunks that fit within the character budget.
         
         Args:
             user_query (str): User's question
-            include_history (bool): Whether to include conversation history
             
         Returns:
-            str: Complete prompt for Gemini
+            list: (chunk_id, text) pairs, best first
         """
-        # Base system prompt
-        system_prompt = f"""You are a helpful business assistant AI for {getattr(self, 'business_name', 'this business')}. 
+        # Chunk ids are only meaningful within one version of the knowledge
+        knowledge = self.knowledge
+        if len(knowledge.text) <= self.context_char_budget or knowledge.retriever is None:
+            return [(0, knowledge.text)]
+        
+        ranked = self._rank_chunks(user_query, knowledge)
+        if not ranked:
+            # No keyword overlap (e.g. greetings): fall back to the start of the document
+            ranked = [(i, 0.0) for i in range(len(knowledge.retriever.chunks))]
+        
+        selected = []
+        used = 0
+        for chunk_id, _ in ranked:
+            chunk = knowledge.retriever.chunks[chunk_id]
+            if used + len(chunk) <= self.context_char_budget:
+                selected.append((chunk_id, chunk))
+                used += len(chunk)
+        return selected
+    
+    def _rank_chunks(self, user_query: str, knowledge: Optional[BusinessKnowledge] = None) -> List:
+        """
+        Rank chunks for a query with the configured retrieval mode.
+        
+        Args:
+            user_query (str): User's question
+            knowledge (BusinessKnowledge): Knowledge to search (defaults to the current one)
+            
+        Returns:
+            list: (chunk_id, score) pairs, best first
+        """
+        knowledge = knowledge or self.knowledge
+        if knowledge.dense_retriever is None:
+            return knowledge.retriever.search(user_query, self.retrieval_top_k)
+        
+        dense = knowledge.dense_retriever.search(user_query, self.retrieval_top_k)
+        if self.retrieval_mode == 'dense':
+            return dense
+        from dense_retrieval import reciprocal_rank_fusion
+        keyword = knowledge.retriever.search(user_query, self.retrieval_top_k)
+        return reciprocal_rank_fusion(keyword, dense)[:self.retrieval_top_k]
+    
+    def _cache_key(self, user_query: str, context_hash: Optional[str] = None) -> str:
+        """
+        Build the response cache key for a question.
+        
+        Args:
+            user_query (str): User's question
+            context_hash (str): Context the answer is for (defaults to the current one)
+            
+        Returns:
+            str: Key covering the normalized question, business context and generation config
+        """
+        if context_hash is None:
+            context_hash = self.context_hash
+        return fingerprint(normalize_question(user_query), context_hash, self.generation_config)
+    
+    def _cache_scope(self, context_hash: Optional[str] = None) -> str:
+        """Scope for semantic cache entries: answers are only reused for the same context and config."""
+        if context_hash is None:
+            context_hash = self.context_hash
+        return fingerprint(context_hash, self.generation_config)
+    
+    def _build_system_prompt(self, business_info: str) -> str:
+        """
+        Build the static part of the prompt: instructions plus business information.
+        
+        Args:
+            business_info (str): Business information to include
+            
+        Returns:
+            str: System prompt
+        """
+        return f"""You are a helpful business assistant AI for {getattr(self, 'business_name', 'this business')}. 
 Your role is to answer customer inquiries accurately and helpfully based on the business information provided.
 
 IMPORTANT GUIDELINES:
@@ -101,93 +714,775 @@ IMPORTANT GUIDELINES:
 5. If asked about services, prices, or policies not mentioned in the business info, direct them to contact the business directly
 
 BUSINESS INFORMATION:
-{self.business_context}
+{business_info}
 
 """
+    
+    def _build_prompt_suffix(self, user_query: str, history: List[Dict], summary: str = "") -> str:
+        """
+        Build the dynamic part of the prompt: conversation summary, history and the question.
+        
+        Args:
+            user_query (str): User's question
+            history (list): Exchanges to include, oldest first
+            summary (str): Running summary of older exchanges
+            
+        Returns:
+            str: Prompt suffix
+        """
+        suffix = ""
+        
+        if summary:
+            suffix += f"EARLIER CONVERSATION SUMMARY:\n{summary}\n\n"
         
         # Add conversation history if requested
-        if include_history and self.memory.history:
-            system_prompt += "RECENT CONVERSATION HISTORY:\n"
-            for exchange in self.memory.get_context():
-                system_prompt += f"Q: {exchange['question']}\nA: {exchange['answer']}\n\n"
+        if history:
+            suffix += "RECENT CONVERSATION HISTORY:\n"
+            for exchange in history:
+                suffix += f"Q: {exchange['question']}\nA: {exchange['answer']}\n\n"
         
         # Add current user query
-        system_prompt += f"CURRENT CUSTOMER QUESTION: {user_query}\n\n"
-        system_prompt += "Please provide a helpful response based on the business information:"
+        suffix += f"CURRENT CUSTOMER QUESTION: {user_query}\n\n"
+        suffix += "Please provide a helpful response based on the business information:"
         
-        return system_prompt
+        return suffix
     
-    def generate_response(self, user_query: str, include_history: bool = True) -> str:
+    def _build_prompt(self, user_query: str, include_history: bool = True,
+                      session_id: str = DEFAULT_SESSION, channel: str = "api") -> str:
         """
-        Generate a response to user query using Gemini.
+        Build the prompt for Gemini including context and history.
+        
+        Retrieved context and history are trimmed to the token budget. When
+        the static prefix is held by the context cache only the dynamic
+        suffix is returned; the cache prepends the prefix.
         
         Args:
             user_query (str): User's question
             include_history (bool): Whether to include conversation history
+            session_id (str): Conversation session whose history is used
+            channel (str): Request channel ('api', 'whatsapp', ...) for budget accounting
             
         Returns:
-            str: Generated response
+            str: Prompt to send to the model
+        """
+        history, summary = [], ""
+        if include_history and session_id is not None:
+            if self.history_compaction:
+                history = self.sessions.get_context(session_id, self.history_raw_turns)
+                summary = self.sessions.get_summary(session_id)
+            else:
+                history = self.sessions.get_context(session_id)
+        question = self._build_prompt_suffix(user_query, [], summary)
+        
+        # Only the stable part goes through the estimator's cache; the question is counted once
+        count = self.token_budget.estimator.count
+        if self.prefix_cached:
+            _, history = self.token_budget.allocate(question, [], history, channel,
+                                                    fixed_tokens=count(self.context_cache.prefix))
+            return self._build_prompt_suffix(user_query, history, summary)
+        
+        candidates = self._select_context(user_query)
+        kept, history = self.token_budget.allocate(
+            question, [text for _, text in candidates], history, channel,
+            fixed_tokens=count(self._build_system_prompt("")))
+        # Present kept chunks in document order
+        business_info = "\n...\n".join(text for _, text in sorted(candidates[i] for i in kept))
+        return self._build_system_prompt(business_info) + self._build_prompt_suffix(user_query, history, summary)
+    
+    def _prompt_tokens(self, prompt: str) -> int:
+        """Estimated input tokens of a model call, counted against the tokens-per-minute quota."""
+        tokens = self.token_budget.estimator.estimate(prompt)
+        if self.prefix_cached:
+            tokens += self.token_budget.estimator.count(self.context_cache.prefix)
+        return tokens
+    
+    def _model_call(self, prompt: str, **kwargs):
+        """
+        Send a prompt to the model, through the context cache when the prefix is cached.
+        
+        Callers acquire quota first, once per request: attempts and hedges of one
+        request share that reservation.
+        """
+        if self.prefix_cached:
+            return self.context_cache.generate_content(prompt, **kwargs)
+        return self.model.generate_content(prompt, **kwargs)
+    
+    async def _amodel_call(self, prompt: str, **kwargs):
+        """Async variant of _model_call."""
+        if self.prefix_cached:
+            return await self.context_cache.generate_content_async(prompt, **kwargs)
+        return await self.model.generate_content_async(prompt, **kwargs)
+    
+    def _lookup_cache(self, user_query: str, include_history: bool, session_id: str):
+        """
+        Look up a cached or precomputed answer for a question.
+        
+        Tries the exact-match cache, the near-duplicate cache and then the
+        FAQ bank. History-dependent follow-ups bypass all of them.
+        
+        Args:
+            user_query (str): User's question
+            include_history (bool): Whether conversation history is used
+            session_id (str): Conversation session
+            
+        Returns:
+            tuple: (cache key or None when bypassed, semantic cache scope or None, answer or None,
+                    answer source or None); key and scope are those of the context at lookup time
         """
+        has_history = (include_history and session_id is not None
+                       and bool(self.sessions.get_context(session_id, limit=1)))
+        if has_history:
+            return None, None, None, None
+        context_hash = self.context_hash
+        cache_key = self._cache_key(user_query, context_hash)
+        scope = self._cache_scope(context_hash)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cache_key, scope, cached, "exact_cache"
+        cached = self.semantic_cache.get(user_query, scope)
+        if cached is not None:
+            return cache_key, scope, cached, "semantic_cache"
+        if self.faq_bank is not None:
+            match = self.faq_bank.match(user_query, self.faq_threshold)
+            if match is not None:
+                return cache_key, scope, match['answer'], "faq"
+        return cache_key, scope, None, None
+    
+    def _remember(self, session_id: Optional[str], user_query: str, response_text: str):
+        """Add an exchange to session memory and schedule compaction when it grows."""
+        if session_id is None:
+            # Session-less requests (anonymous API callers, batch items) are answered on their own
+            return
+        self.sessions.add_exchange(session_id, user_query, response_text)
+        if not self.history_compaction:
+            return
+        claim = self.sessions.begin_compaction(session_id, self.history_raw_turns)
+        if claim is not None:
+            self._compaction_executor.submit(self._compact_history, session_id, *claim)
+    
+    def _compact_history(self, session_id: str, previous_summary: str, folded: List[Dict]):
+        """Background job: fold exchanges into the session's running summary."""
+        exchanges = "".join(f"Q: {e['question']}\nA: {e['answer']}\n\n" for e in folded)
+        prompt = f"""Update the summary of a customer support conversation.
+Keep facts the customer shared, what they asked about and what they were told. Use at most {self.history_summary_max_words} words.
+
+CURRENT SUMMARY:
+{previous_summary or "(none)"}
+
+NEW EXCHANGES:
+{exchanges}
+Updated summary:"""
+        summary = None
+        try:
+            with self.llm_scheduler.slot("background"):
+                self.quota.acquire(self.token_budget.estimator.estimate(prompt))
+                summary = self.model.generate_content(prompt).text.strip()
+            self.compactions += 1
+        except Exception as e:
+            self.compaction_failures += 1
+            print(f"Error compacting conversation history: {e}")
+        finally:
+            self.sessions.finish_compaction(session_id, folded, summary)
+    
+    def _record_response(self, user_query: str, response_text: str, session_id: str,
+                         cache_key: Optional[str], scope: Optional[str]):
+        """
+        Commit an answer to session memory and, when cacheable, to the caches.
+        
+        Nothing is cached when the knowledge was swapped while the answer was
+        generated: it was written from the previous context and must not be
+        served under the new one.
+        """
+        self._remember(session_id, user_query, response_text)
+        self._cache_response(user_query, response_text, cache_key, scope)
+    
+    def _cache_response(self, user_query: str, response_text: str, cache_key: Optional[str],
+                        scope: Optional[str]):
+        """Store a generated answer in the exact and near-duplicate caches (see _record_response)."""
+        if cache_key and scope == self._cache_scope():
+            self.response_cache.put(cache_key, response_text)
+            self.semantic_cache.put(user_query, response_text, scope)
+    
+    def _settle_failed_call(self, error: Exception):
+        """
+        Report a failed model call to the circuit breaker.
+        
+        Only upstream trouble (timeouts, rate limits, 5xx) counts as a failure.
+        A refused request, such as an invalid argument or a response blocked by
+        safety filters, says nothing about the upstream's health and counts as
+        neither success nor failure.
+        """
+        if is_transient(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_trial()
+    
+    def _generate_text(self, prompt: str, channel: str = "api") -> str:
+        """
+        Call the model and return the response text.
+        
+        The call waits for a slot from the channel's priority class and for
+        quota, then runs with retries/hedging; both waits count against the
+        deadline budget.
+        """
+        if self.breaker.is_open():
+            raise CircuitOpenError("LLM circuit is open")
+        started = time.monotonic()
+        deadline = self.resilience.deadline_seconds
+        with self.llm_scheduler.slot(channel, timeout=deadline):
+            tokens = self._prompt_tokens(prompt)
+            self.quota.acquire(tokens, max_wait=max(deadline - (time.monotonic() - started), 0.0))
+            if not self.breaker.allow_request():
+                self.quota.refund(tokens)
+                raise CircuitOpenError("LLM circuit is open")
+            try:
+                # Each attempt also gets the time left as its transport timeout, so a hung
+                # request ends instead of running on after the call is abandoned
+                text = self.resilience.call(lambda: self._model_call(
+                    prompt,
+                    generation_config=self.generation_config,
+                    request_options={"timeout": max(started + deadline - time.monotonic(), 0.001)}
+                ).text, deadline_seconds=max(deadline - (time.monotonic() - started), 0.001))
+            except Exception as e:
+                self._settle_failed_call(e)
+                raise
+        self.breaker.record_success()
+        return text
+    
+    async def _agenerate_text(self, prompt: str, channel: str = "api") -> str:
+        """Async variant of _generate_text using the async client."""
+        if self.breaker.is_open():
+            raise CircuitOpenError("LLM circuit is open")
+        started = time.monotonic()
+        deadline = self.resilience.deadline_seconds
+        
+        async def attempt() -> str:
+            response = await self._amodel_call(
+                prompt,
+                generation_config=self.generation_config,
+                request_options={"timeout": max(started + deadline - time.monotonic(), 0.001)}
+            )
+            return response.text
+        
+        async with self.llm_scheduler.aslot(channel, timeout=deadline):
+            tokens = self._prompt_tokens(prompt)
+            await self.quota.aacquire(tokens, max_wait=max(deadline - (time.monotonic() - started), 0.0))
+            if not self.breaker.allow_request():
+                self.quota.refund(tokens)
+                raise CircuitOpenError("LLM circuit is open")
+            try:
+                text = await self.resilience.acall(
+                    attempt, deadline_seconds=max(deadline - (time.monotonic() - started), 0.001))
+            except Exception as e:
+                self._settle_failed_call(e)
+                raise
+        self.breaker.record_success()
+        return text
+    
+    def _degraded_answer(self, user_query: str) -> Optional[str]:
+        """
+        Best answer available without the model: cached answers, FAQ matches or a retrieved snippet.
+        
+        Args:
+            user_query (str): User's question
+            
+        Returns:
+            str: Degraded answer, or None if nothing relevant is available
+        """
+        if not self.business_context:
+            return None
+        cached = self.response_cache.get(self._cache_key(user_query))
+        if cached is None:
+            cached = self.semantic_cache.get(user_query, self._cache_scope())
+        if cached is not None:
+            return cached
+        if self.faq_bank is not None:
+            match = self.faq_bank.match(user_query, self.faq_threshold)
+            if match is not None:
+                return match['answer']
+        retriever = self.retriever
+        if retriever is not None:
+            ranked = retriever.search(user_query, 1)
+            if ranked:
+                snippet = " ".join(retriever.chunks[ranked[0][0]].split())
+                if len(snippet) > self.degraded_snippet_chars:
+                    snippet = snippet[:self.degraded_snippet_chars].rsplit(" ", 1)[0] + "..."
+                return f"{DEGRADED_SNIPPET_INTRO}\n\n{snippet}\n\nPlease contact us directly for more details."
+        return None
+    
+    def _failure_answer(self, user_query: str) -> Dict:
+        """Answer to return when the model call fails or the circuit is open."""
+        degraded = self._degraded_answer(user_query)
+        if degraded is not None:
+            return {"response": degraded, "source": "degraded"}
+        return {"response": ERROR_MESSAGE, "source": "error"}
+    
+    def answer_question(self, user_query: str, include_history: bool = True,
+                        session_id: Optional[str] = DEFAULT_SESSION, channel: str = "api") -> Dict:
+        """
+        Answer a question and report where the answer came from.
+        
+        Args:
+            user_query (str): User's question
+            include_history (bool): Whether to include conversation history
+            session_id (str): Conversation session (e.g. sender number); None keeps no memory
+            channel (str): Request channel ('api', 'whatsapp', 'voice', ...)
+            
+        Returns:
+            dict: {'response': answer text, 'source': 'llm', 'coalesced', 'exact_cache', 'semantic_cache',
+                   'faq', 'degraded', 'error' or 'no_context'}
+        """
+        source = "error"
         try:
             if not self.business_context:
-                return "I'm sorry, but I don't have access to business information yet. Please contact the business directly for assistance."
+                source = "no_context"
+                return {"response": NO_CONTEXT_MESSAGE, "source": source}
+            
+            cache_key, scope, cached, source = self._lookup_cache(user_query, include_history, session_id)
+            if cached is not None:
+                self._remember(session_id, user_query, cached)
+                return {"response": cached, "source": source}
             
             # Build the prompt
-            prompt = self._build_prompt(user_query, include_history)
+            prompt = self._build_prompt(user_query, include_history, session_id, channel)
             
             # Generate response
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            
-            # Extract response text
-            response_text = response.text
+            if cache_key:
+                # Identical questions in flight share one call; only its leader fills the caches
+                led = []
+                
+                def lead() -> str:
+                    text = self._generate_text(prompt, channel)
+                    self._cache_response(user_query, text, cache_key, scope)
+                    led.append(True)
+                    return text
+                
+                response_text = self.single_flight.do(cache_key, lead)
+                source = "llm" if led else "coalesced"
+            else:
+                response_text = self._generate_text(prompt, channel)
+                source = "llm"
             
             # Add to memory
-            self.memory.add_exchange(user_query, response_text)
+            self._remember(session_id, user_query, response_text)
+            return {"response": response_text, "source": source}
+            
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            result = self._failure_answer(user_query)
+            source = result["source"]
+            return result
+        finally:
+            self._count_source(source)
+    
+    def generate_response(self, user_query: str, include_history: bool = True,
+                          session_id: Optional[str] = DEFAULT_SESSION, channel: str = "api") -> str:
+        """
+        Generate a response to user query using Gemini.
+        
+        Args:
+            user_query (str): User's question
+            include_history (bool): Whether to include conversation history
+            session_id (str): Conversation session (e.g. sender number); None keeps no memory
+            channel (str): Request channel ('api', 'whatsapp', 'voice', ...)
+            
+        Returns:
+            str: Generated response
+        """
+        return self.answer_question(user_query, include_history, session_id, channel)["response"]
+    
+    def answer_batch(self, items: List[Dict], max_parallelism: int = 8, channel: str = "batch") -> List[Dict]:
+        """
+        Answer many questions concurrently, deduplicating identical ones.
+        
+        Items without a session id are answered independently (no history,
+        nothing remembered).
+        Items with the same normalized question and session id are answered
+        once and share the result.
+        
+        Args:
+            items (list): Dicts with 'question' and optional 'session_id'
+            max_parallelism (int): Maximum questions answered at once
+            channel (str): Request channel for accounting
+            
+        Returns:
+            list: One result per item, in input order, with response, source, latency_ms and error
+        """
+        groups: Dict[tuple, List[int]] = OrderedDict()
+        results: List[Optional[Dict]] = [None] * len(items)
+        for index, item in enumerate(items):
+            question = item.get('question')
+            session_id = item.get('session_id')
+            if not isinstance(question, str) or not question.strip():
+                results[index] = {"index": index, "question": question, "session_id": session_id,
+                                  "response": None, "source": None, "latency_ms": 0.0,
+                                  "error": "Missing question", "deduplicated": False}
+                continue
+            groups.setdefault((normalize_question(question), session_id), []).append(index)
+        
+        def run(key: tuple) -> Dict:
+            first = items[groups[key][0]]
+            session_id = first.get('session_id')
+            started = time.perf_counter()
+            try:
+                answer = self.answer_question(first['question'], include_history=session_id is not None,
+                                              session_id=session_id, channel=channel)
+                error = "Generation failed" if answer['source'] == "error" else None
+            except Exception as e:
+                answer, error = {"response": None, "source": "error"}, str(e)
+            return dict(answer, error=error, latency_ms=round((time.perf_counter() - started) * 1000, 1))
+        
+        if groups:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_parallelism, len(groups))),
+                                    thread_name_prefix="batch") as executor:
+                outcomes = dict(zip(groups, executor.map(run, groups)))
+            for key, indices in groups.items():
+                for position, index in enumerate(indices):
+                    results[index] = dict(outcomes[key], index=index, question=items[index]['question'],
+                                          session_id=items[index].get('session_id'),
+                                          deduplicated=position > 0)
+        return results
+    
+    async def aanswer_question(self, user_query: str, include_history: bool = True,
+                               session_id: Optional[str] = DEFAULT_SESSION, channel: str = "api") -> Dict:
+        """
+        Async variant of answer_question using the async Gemini client.
+        
+        At most LLM_MAX_CONCURRENCY upstream calls are in flight at once;
+        further callers queue by channel priority instead of opening more requests.
+        
+        Args:
+            user_query (str): User's question
+            include_history (bool): Whether to include conversation history
+            session_id (str): Conversation session (e.g. sender number); None keeps no memory
+            channel (str): Request channel ('api', 'whatsapp', 'voice', ...)
+            
+        Returns:
+            dict: {'response': answer text, 'source': answer source}
+        """
+        source = "error"
+        try:
+            if not self.business_context:
+                source = "no_context"
+                return {"response": NO_CONTEXT_MESSAGE, "source": source}
             
-            return response_text
+            cache_key, scope, cached, source = self._lookup_cache(user_query, include_history, session_id)
+            if cached is not None:
+                self._remember(session_id, user_query, cached)
+                return {"response": cached, "source": source}
+            
+            prompt = self._build_prompt(user_query, include_history, session_id, channel)
+            
+            if cache_key:
+                led = []
+                
+                async def lead() -> str:
+                    text = await self._agenerate_text(prompt, channel)
+                    self._cache_response(user_query, text, cache_key, scope)
+                    led.append(True)
+                    return text
+                
+                response_text = await self.single_flight.ado(cache_key, lead)
+                source = "llm" if led else "coalesced"
+            else:
+                response_text = await self._agenerate_text(prompt, channel)
+                source = "llm"
+            
+            self._remember(session_id, user_query, response_text)
+            return {"response": response_text, "source": source}
             
         except Exception as e:
-            error_msg = f"I apologize, but I'm having trouble processing your request right now. Please try again later or contact us directly."
             print(f"Error generating response: {e}")
-            return error_msg
+            result = self._failure_answer(user_query)
+            source = result["source"]
+            return result
+        finally:
+            self._count_source(source)
     
-    def get_business_summary(self) -> str:
+    async def agenerate_response(self, user_query: str, include_history: bool = True,
+                                 session_id: Optional[str] = DEFAULT_SESSION, channel: str = "api") -> str:
         """
-        Generate a summary of the business based on the PDF content.
+        Generate a response to user query using the async Gemini client.
         
+        Args:
+            user_query (str): User's question
+            include_history (bool): Whether to include conversation history
+            session_id (str): Conversation session (e.g. sender number); None keeps no memory
+            channel (str): Request channel ('api', 'whatsapp', 'voice', ...)
+            
         Returns:
-            str: Business summary
+            str: Generated response
+        """
+        return (await self.aanswer_question(user_query, include_history, session_id, channel))["response"]
+    
+    def generate_response_stream(self, user_query: str, include_history: bool = True,
+                                 session_id: Optional[str] = DEFAULT_SESSION, channel: str = "api") -> Iterator[str]:
+        """
+        Stream a response to user query using Gemini's streaming mode.
+        
+        The full answer is committed to conversation memory only after the
+        stream completes; a failed or abandoned stream leaves history untouched.
+        The first chunk must arrive within the call deadline and each later one
+        within LLM_STREAM_IDLE_SECONDS; a stalled stream counts as a failed call.
+        
+        Args:
+            user_query (str): User's question
+            include_history (bool): Whether to include conversation history
+            session_id (str): Conversation session (e.g. sender number); None keeps no memory
+            channel (str): Request channel ('api', 'whatsapp', 'voice', ...)
+            
+        Yields:
+            str: Text fragments as they are generated
         """
         if not self.business_context:
-            return "No business information available."
+            self._count_source("no_context")
+            yield NO_CONTEXT_MESSAGE
+            return
         
-        summary_prompt = f"""Based on the following business information, provide a brief summary covering:
+        try:
+            cache_key, scope, cached, source = self._lookup_cache(user_query, include_history, session_id)
+            if cached is not None:
+                self._remember(session_id, user_query, cached)
+                self._count_source(source)
+                yield cached
+                return
+            
+            prompt = self._build_prompt(user_query, include_history, session_id, channel)
+            if self.breaker.is_open():
+                raise CircuitOpenError("LLM circuit is open")
+            started = time.monotonic()
+            deadline = self.resilience.deadline_seconds
+            # The slot is held until the stream finishes
+            priority_class = self.llm_scheduler.acquire(channel, timeout=deadline)
+            try:
+                tokens = self._prompt_tokens(prompt)
+                self.quota.acquire(tokens, max_wait=max(deadline - (time.monotonic() - started), 0.0))
+                if not self.breaker.allow_request():
+                    self.quota.refund(tokens)
+                    raise CircuitOpenError("LLM circuit is open")
+                # Opened lazily by the loop below; errors and timeouts count as breaker failures there
+                response = iter_with_timeouts(
+                    lambda: self._model_call(prompt, generation_config=self.generation_config, stream=True),
+                    first_timeout=deadline - (time.monotonic() - started),
+                    idle_timeout=self.stream_idle_timeout
+                )
+            except Exception:
+                self.llm_scheduler.release(priority_class)
+                raise
+        except Exception as e:
+            print(f"Error starting response stream: {e}")
+            result = self._failure_answer(user_query)
+            self._count_source(result["source"])
+            yield result["response"]
+            return
+        
+        parts = []
+        settled = False
+        try:
+            for chunk in response:
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    yield text
+            self.breaker.record_success()
+            settled = True
+        except Exception as e:
+            print(f"Error during response stream: {e}")
+            self._settle_failed_call(e)
+            settled = True
+            if parts:
+                self._count_source("error")
+            else:
+                result = self._failure_answer(user_query)
+                self._count_source(result["source"])
+                yield result["response"]
+            return
+        finally:
+            response.close()
+            self.llm_scheduler.release(priority_class)
+            if not settled:
+                # Abandoned by the client (GeneratorExit at a yield): text already received
+                # proves the upstream works, otherwise the trial slot is handed back
+                if parts:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.release_trial()
+        
+        self._record_response(user_query, "".join(parts), session_id, cache_key, scope)
+        self._count_source("llm")
+    
+    def _generate_business_summary(self, length: str = "brief", language: Optional[str] = None) -> str:
+        """
+        Ask the model for a summary of the business (always a fresh call).
+        
+        Args:
+            length (str): 'brief' or 'detailed'
+            language (str): Language to answer in (model default if omitted)
+            
+        Returns:
+            str: Business summary
+        """
+        summary_request = f"""provide a {'detailed' if length == 'detailed' else 'brief'} summary covering:
 1. What the business does
 2. Key services or products
 3. Contact information if available
 4. Any important policies or information
-
+"""
+        if language:
+            summary_request += f"Write the summary in {language}.\n"
+        if self.prefix_cached:
+            # The business information is already part of the cached prefix
+            summary_prompt = f"Based on the business information above, {summary_request}\nPlease provide a concise summary:"
+        else:
+            summary_prompt = f"""Based on the following business information, {summary_request}
 Business Information:
 {self.business_context}
 
 Please provide a concise summary:"""
         
+        with self.llm_scheduler.slot("background"):
+            self.quota.acquire(self._prompt_tokens(summary_prompt))
+            response = self._model_call(summary_prompt)
+        return response.text
+    
+    def _summary_variant(self, length: Optional[str], language: Optional[str]) -> tuple:
+        """
+        Normalize summary options so that each variant has one cache key.
+        
+        Args:
+            length (str): 'detailed'; anything else means 'brief'
+            language (str): Language name or code (model default if empty)
+            
+        Returns:
+            tuple: (length, language or None)
+            
+        Raises:
+            ValueError: The language is not a plausible language name or not in SUMMARY_LANGUAGES
+        """
+        length = "detailed" if (length or "").strip().lower() == "detailed" else "brief"
+        language = " ".join((language or "").lower().split()) or None
+        if language is not None:
+            if len(language) > 32 or not _LANGUAGE_RE.match(language):
+                raise ValueError("language must be a language name or code")
+            if self.summary_languages and language not in self.summary_languages:
+                raise ValueError(f"Unsupported language: {language}")
+        return length, language
+    
+    def _summary_key(self, length: str, language: Optional[str]) -> tuple:
+        return (self.context_hash, length, language or "")
+    
+    def _run_summary_job(self, key: tuple, length: str, language: Optional[str]):
+        """Background job: compute a summary and store it if the context has not changed meanwhile."""
+        try:
+            summary = self._generate_business_summary(length, language)
+            with self._summary_lock:
+                if key[0] == self.context_hash:
+                    self._summaries[key] = summary
+                    while len(self._summaries) > self.summary_max_variants:
+                        self._summaries.popitem(last=False)
+        except Exception as e:
+            print(f"Error generating business summary: {e}")
+            raise
+        finally:
+            with self._summary_lock:
+                self._summary_jobs.pop(key, None)
+    
+    def warm_business_summary(self, length: str = "brief", language: Optional[str] = None) -> Optional[Future]:
+        """
+        Schedule background computation of a summary variant unless it is cached or already running.
+        
+        Args:
+            length (str): 'brief' or 'detailed'
+            language (str): Language to answer in
+            
+        Returns:
+            Future: The running job, or None if the summary is already cached or
+                SUMMARY_MAX_VARIANTS summaries are already being computed
+            
+        Raises:
+            ValueError: Unsupported language
+        """
+        if not self.business_context:
+            return None
+        length, language = self._summary_variant(length, language)
+        key = self._summary_key(length, language)
+        with self._summary_lock:
+            if key in self._summaries:
+                return None
+            job = self._summary_jobs.get(key)
+            if job is None:
+                if len(self._summary_jobs) >= self.summary_max_variants:
+                    return None
+                job = self._summary_executor.submit(self._run_summary_job, key, length, language)
+                self._summary_jobs[key] = job
+            return job
+    
+    def get_summary_status(self, length: str = "brief", language: Optional[str] = None) -> Dict:
+        """
+        Get a summary without blocking: the cached text, or a 'warming' status while it is computed.
+        
+        Args:
+            length (str): 'brief' or 'detailed'
+            language (str): Language to answer in
+            
+        Returns:
+            dict: {'status': 'ready', 'summary': ...}, {'status': 'warming'}, {'status': 'busy'}
+                (too many summaries being computed) or {'status': 'no_context'}
+            
+        Raises:
+            ValueError: Unsupported language
+        """
+        if not self.business_context:
+            return {"status": "no_context", "summary": "No business information available."}
+        length, language = self._summary_variant(length, language)
+        key = self._summary_key(length, language)
+        with self._summary_lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+        if summary is not None:
+            return {"status": "ready", "summary": summary}
+        if self.warm_business_summary(length, language) is None:
+            return {"status": "busy"}
+        return {"status": "warming"}
+    
+    def get_business_summary(self, length: str = "brief", language: Optional[str] = None) -> str:
+        """
+        Generate a summary of the business based on the PDF content.
+        
+        Summaries are memoized per context; a cached one is returned without
+        calling the model, otherwise this waits for the computation.
+        
+        Args:
+            length (str): 'brief' or 'detailed'
+            language (str): Language to answer in
+            
+        Returns:
+            str: Business summary
+        """
+        if not self.business_context:
+            return "No business information available."
+        
         try:
-            response = self.model.generate_content(summary_prompt)
-            return response.text
+            length, language = self._summary_variant(length, language)
+            job = self.warm_business_summary(length, language)
+            if job is not None:
+                job.result()
         except Exception as e:
             return f"Unable to generate summary: {e}"
+        with self._summary_lock:
+            summary = self._summaries.get(self._summary_key(length, language))
+        if summary is None and job is None:
+            return "Unable to generate summary: too many summaries are being generated"
+        return summary if summary is not None else "Unable to generate summary: business context changed"
     
-    def clear_conversation(self):
-        """Clear conversation history."""
-        self.memory.clear_history()
+    def clear_conversation(self, session_id: str = DEFAULT_SESSION):
+        """Clear conversation history for a single session."""
+        self.sessions.clear(session_id)
     
-    def get_conversation_history(self) -> List[Dict]:
-        """Get current conversation history."""
-        return self.memory.history
+    def get_conversation_history(self, session_id: str = DEFAULT_SESSION) -> List[Dict]:
+        """Get current conversation history for a session."""
+        return self.sessions.history(session_id)
     
     def health_check(self) -> Dict:
         """
@@ -197,9 +1492,37 @@ Please provide a concise summary:"""
             dict: Health status information
         """
         return {
-            "status": "healthy" if self.business_context else "no_context",
+            "status": ("degraded" if self.breaker.is_open() else "healthy") if self.business_context else "no_context",
             "business_context_loaded": bool(self.business_context),
             "context_length": len(self.business_context),
-            "conversation_history_length": len(self.memory.history),
+            "chunks": len(self.retriever.chunks) if self.retriever is not None else 0,
+            "corpus": self.knowledge.corpus.stats() if self.knowledge.corpus is not None else None,
+            "sessions": self.sessions.stats(),
+            "response_cache": self.response_cache.stats(),
+            "semantic_cache": self.semantic_cache.stats(),
+            "single_flight": self.single_flight.stats(),
+            "llm_calls": self.resilience.stats(),
+            "circuit_breaker": self.breaker.stats(),
+            "quota_scheduler": self.quota.stats(),
+            "token_budget": self.token_budget.stats(),
+            "answer_sources": dict(self.answer_sources),
+            "faq_bank": {
+                "loaded": self.faq_bank is not None,
+                "questions": len(self.faq_bank) if self.faq_bank else 0,
+                "threshold": self.faq_threshold
+            },
+            "history_compaction": {
+                "enabled": self.history_compaction,
+                "raw_turns": self.history_raw_turns,
+                "compactions": self.compactions,
+                "failures": self.compaction_failures
+            },
+            "summaries": {
+                "cached": len(self._summaries),
+                "warming": len(self._summary_jobs)
+            },
+            "context_cache": dict(self.context_cache.stats(), active=self.prefix_cached) if self.context_cache else {"backend": "off"},
+            "llm_scheduler": self.llm_scheduler.stats(),
+            "llm_backend": getattr(self.model, 'name', 'gemini'),
             "model_name": self.model.model_name if hasattr(self.model, 'model_name') else "gemini-pro"
         }
@@ -0,0 +1,89 @@
+import os
+from typing import Optional
+
+class LLMBackend:
+    """
+    Interface for the text-generation backend used by GeminiAgent.
+
+    Mirrors the subset of genai.GenerativeModel the agent relies on:
+    generate_content(prompt, generation_config=..., stream=False,
+    request_options={"timeout": seconds}) returning an object with .text
+    (or an iterator of such chunks when streaming), and its async
+    counterpart. A call still running at its request_options timeout must
+    give up instead of outliving the caller's deadline.
+    """
+
+    name = "base"
+    model_name = ""
+    # Whether Gemini server-side context caching can be used with this backend
+    supports_context_cache = False
+
+    def generate_content(self, prompt, **kwargs):
+        raise NotImplementedError
+
+    async def generate_content_async(self, prompt, **kwargs):
+        raise NotImplementedError
+
+class GeminiBackend(LLMBackend):
+    """Backend calling the Gemini API through google.generativeai."""
+
+    name = "gemini"
+    supports_context_cache = True
+
+    def __init__(self, model_name: str = "gemini-2.0-flash", api_key: Optional[str] = None):
+        """
+        Configure the Gemini client.
+
+        Args:
+            model_name (str): Name of the Gemini model to use
+            api_key (str): API key (defaults to GEMINI_API_KEY)
+        """
+        import google.generativeai as genai
+
+        api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key or api_key == "your_gemini_api_key_here":
+            raise ValueError("Please set your GEMINI_API_KEY in the .env file")
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_name
+
+    def generate_content(self, prompt, **kwargs):
+        return self.model.generate_content(prompt, **kwargs)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return await self.model.generate_content_async(prompt, **kwargs)
+
+def get_backend(model_name: str = "gemini-2.0-flash", name: Optional[str] = None) -> LLMBackend:
+    """
+    Create the backend selected by LLM_BACKEND.
+
+    'fake' gives a local backend with simulated latency, errors and
+    streaming (configured with FAKE_LLM_* variables) for offline load tests.
+
+    Args:
+        model_name (str): Gemini model name
+        name (str): 'gemini' (default) or 'fake'; read from LLM_BACKEND if omitted
+
+    Returns:
+        LLMBackend: Backend instance
+    """
+    name = (name or os.getenv('LLM_BACKEND', 'gemini')).lower()
+    if name == 'fake':
+        from fake_model import FakeModel
+        seed = os.getenv('FAKE_LLM_SEED')
+        return FakeModel(
+            latency=float(os.getenv('FAKE_LLM_LATENCY', '0.8')),
+            distribution=os.getenv('FAKE_LLM_DISTRIBUTION', 'lognormal'),
+            latency_std=float(os.getenv('FAKE_LLM_LATENCY_STD', '0.4')),
+            jitter=float(os.getenv('FAKE_LLM_JITTER', '0')),
+            failure_rate=float(os.getenv('FAKE_LLM_ERROR_RATE', '0')),
+            slow_rate=float(os.getenv('FAKE_LLM_SLOW_RATE', '0')),
+            slow_latency=float(os.getenv('FAKE_LLM_SLOW_LATENCY', '5')),
+            first_chunk_latency=float(os.getenv('FAKE_LLM_FIRST_CHUNK_LATENCY', '0.2')),
+            chunk_interval=float(os.getenv('FAKE_LLM_CHUNK_INTERVAL', '0.03')),
+            chunk_words=int(os.getenv('FAKE_LLM_CHUNK_WORDS', '4')),
+            answer_words=int(os.getenv('FAKE_LLM_ANSWER_WORDS', '60')),
+            seed=int(seed) if seed else None
+        )
+    return GeminiBackend(model_name)
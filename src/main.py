@@ -1,9 +1,15 @@
 from pdf_processor import PDFProcessor
-from gemini_agent import GeminiAgent
+from corpus import Corpus, CorpusWatcher
+from gemini_agent import GeminiAgent, DEFAULT_SESSION
 from whatsapp_integration import WhatsAppBot
 from vapi_integration import VAPIIntegration
-from flask import Flask, request, jsonify
+from rate_limit import SenderRateLimiter, get_bucket_store
+from flask import Flask, Response, request, jsonify, stream_with_context
 import os
+import hmac
+import json
+import math
+import time
 import logging
 
 # Configure logging
@@ -16,13 +22,107 @@ app = Flask(__name__)
 # Environment settings
 PDF_PATH = os.getenv("PDF_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), 'examples', 'business_info.pdf'))  # Default PDF file
 BUSINESS_NAME = os.getenv("BUSINESS_NAME", "TechSolutions Pro")
+# Directory of PDF / text documents served instead of PDF_PATH, re-indexed as files change
+CORPUS_DIR = os.getenv("CORPUS_DIR")
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_PARALLELISM = int(os.getenv("BATCH_MAX_PARALLELISM", "16"))
+# Callers may only pick their LLM priority class ("channel") when they present CHANNEL_TOKEN
+# in the X-Channel-Token header (e.g. a voice gateway); everyone else is served as 'api'
+CHANNEL_TOKEN = os.getenv("CHANNEL_TOKEN", "")
+TRUSTED_CHANNELS = ("voice", "whatsapp", "api", "batch")
+
+def is_trusted_caller(token) -> bool:
+    """Check an X-Channel-Token header value against CHANNEL_TOKEN."""
+    return bool(CHANNEL_TOKEN and token
+                and hmac.compare_digest(token.encode('utf-8'), CHANNEL_TOKEN.encode('utf-8')))
+
+def resolve_channel(requested, token) -> str:
+    """
+    Decide the priority channel of an /ask request on the server side.
+    
+    Args:
+        requested: 'channel' from the request body
+        token: X-Channel-Token header value
+        
+    Returns:
+        str: The requested channel for a trusted caller, otherwise 'api'
+    """
+    if requested in TRUSTED_CHANNELS and is_trusted_caller(token):
+        return requested
+    return 'api'
+
+RATE_LIMITED_MESSAGE = "You're sending messages faster than we can answer them. Please wait a moment and try again."
+
+bucket_store = get_bucket_store(os.getenv("RATE_LIMIT_BACKEND", "memory"), os.getenv("REDIS_URL"))
+# Per-sender token buckets for /whatsapp
+sender_limiter = SenderRateLimiter(
+    per_minute=float(os.getenv("SENDER_RATE_PER_MINUTE", "10")),
+    burst=int(os.getenv("SENDER_RATE_BURST", "5")),
+    store=bucket_store
+)
+# Per-client token buckets shared by /ask, /ask/stream and /ask/batch (one token per question)
+client_limiter = SenderRateLimiter(
+    per_minute=float(os.getenv("ASK_RATE_PER_MINUTE", os.getenv("SENDER_RATE_PER_MINUTE", "10"))),
+    burst=int(os.getenv("ASK_RATE_BURST", os.getenv("SENDER_RATE_BURST", "5"))),
+    store=bucket_store
+)
+
+def client_key(data: dict, token, address) -> str:
+    """
+    Identify who an /ask-family request is charged to.
+    
+    Body fields are chosen by the client, so only a trusted gateway (see
+    resolve_channel) may charge requests to the end user it relays; every
+    other caller is limited by its network address.
+    
+    Args:
+        data (dict): Request body
+        token: X-Channel-Token header value
+        address: Client address
+        
+    Returns:
+        str: Rate limit key
+    """
+    if is_trusted_caller(token):
+        relayed = data.get('from_number') or data.get('session_id')
+        if relayed:
+            return f"user:{relayed}"
+    return f"addr:{address}"
+
+def rate_limited_response(retry_after: float):
+    """429 reply for /ask-family requests over the client's limit."""
+    return jsonify({'error': 'rate_limited', 'message': RATE_LIMITED_MESSAGE,
+                    'retry_after': round(retry_after, 1)}), 429, {'Retry-After': str(math.ceil(retry_after))}
+
+def on_corpus_change(snapshot, change):
+    """Serve a new corpus version; requests already running finish on the previous one."""
+    logger.info(f"Corpus changed (added {change['added']}, changed {change['changed']}, "
+                f"removed {change['removed']}) in {change['seconds']}s")
+    gemini_agent.set_corpus(snapshot, BUSINESS_NAME)
+    if os.getenv('FAQ_BANK', 'true').lower() == 'true':
+        gemini_agent.load_faq_bank()
+
+corpus_watcher = None
 
 # Initialize components
 try:
-    pdf_processor = PDFProcessor(PDF_PATH)
-    business_content = pdf_processor.extract_text()
     gemini_agent = GeminiAgent()
-    gemini_agent.set_business_context(business_content, BUSINESS_NAME)
+    if CORPUS_DIR:
+        corpus = Corpus(CORPUS_DIR)
+        corpus.refresh(settle=False)
+        gemini_agent.set_corpus(corpus.snapshot, BUSINESS_NAME)
+        if os.getenv('CORPUS_WATCH', 'true').lower() == 'true':
+            corpus_watcher = CorpusWatcher(corpus, on_corpus_change).start()
+    else:
+        pdf_processor = PDFProcessor(PDF_PATH)
+        business_content = pdf_processor.extract_text()
+        if os.getenv('CHUNK_STRATEGY', 'structured').lower() == 'structured':
+            chunks = [chunk.text for chunk in pdf_processor.iter_structured_chunks()]
+        else:
+            chunks = pdf_processor.get_text_chunks()
+        gemini_agent.set_business_context(business_content, BUSINESS_NAME, chunks)
+    if os.getenv('FAQ_BANK', 'true').lower() == 'true':
+        gemini_agent.load_faq_bank()
     whatsapp_bot = WhatsAppBot()
     
     # Initialize VAPI for voice assistant
@@ -62,8 +162,13 @@ def whatsapp_webhook():
         logger.info(f"Received message from {from_number}: {incoming_message}")
         
         if incoming_message:
+            allowed, retry_after = sender_limiter.check(from_number)
+            if not allowed:
+                logger.warning(f"Rate limited {from_number} (retry after {retry_after:.1f}s)")
+                return whatsapp_bot.create_response(RATE_LIMITED_MESSAGE), 200, {'Content-Type': 'text/xml'}
+            
             # Generate AI response
-            ai_response = gemini_agent.generate_response(incoming_message)
+            ai_response = gemini_agent.generate_response(incoming_message, session_id=from_number, channel='whatsapp')
             
             # Create TwiML response
             twiml_response = whatsapp_bot.create_response(ai_response)
@@ -82,13 +187,89 @@ def whatsapp_webhook():
 @app.route('/ask', methods=['POST'])
 def ask_question():
     """Endpoint to handle user questions."""
+    data = request.get_json(silent=True) or {}
+    user_question = data.get('question')
+    if not isinstance(user_question, str) or not user_question.strip():
+        return jsonify({'error': 'Missing question'}), 400
     try:
-        user_question = request.json.get('question')
-        response = gemini_agent.generate_response(user_question)
-        return jsonify({'response': response})
+        # Callers without a session get a standalone answer: no shared history, nothing remembered
+        session_id = data.get('session_id') or data.get('from_number')
+        token = request.headers.get('X-Channel-Token')
+        allowed, retry_after = client_limiter.check(client_key(data, token, request.remote_addr))
+        if not allowed:
+            return rate_limited_response(retry_after)
+        channel = resolve_channel(data.get('channel'), token)
+        result = gemini_agent.answer_question(user_question, include_history=session_id is not None,
+                                              session_id=session_id, channel=channel)
+        return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e), 'message': "An error occurred handling the request."}), 500
 
+@app.route('/ask/batch', methods=['POST'])
+def ask_batch():
+    """Endpoint to answer a list of questions concurrently."""
+    data = request.get_json(silent=True) or {}
+    questions = data.get('questions')
+    if not isinstance(questions, list) or not questions:
+        return jsonify({'error': 'questions must be a non-empty list'}), 400
+    if len(questions) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {BATCH_MAX_ITEMS} questions per batch'}), 400
+    if client_limiter.per_minute > 0 and len(questions) > client_limiter.burst:
+        # Each question is charged to the client's bucket, which never holds more than the burst
+        return jsonify({'error': f'At most {client_limiter.burst} questions per batch (ASK_RATE_BURST)'}), 400
+    
+    # Accept plain strings or {"question": ..., "session_id": ...} objects
+    items = [q if isinstance(q, dict) else {'question': q} for q in questions]
+    try:
+        parallelism = int(data.get('parallelism', BATCH_MAX_PARALLELISM))
+    except (TypeError, ValueError):
+        parallelism = 0
+    if parallelism < 1:
+        return jsonify({'error': 'parallelism must be a positive integer'}), 400
+    parallelism = min(parallelism, BATCH_MAX_PARALLELISM)
+    
+    allowed, retry_after = client_limiter.check(
+        client_key(data, request.headers.get('X-Channel-Token'), request.remote_addr), cost=len(items))
+    if not allowed:
+        return rate_limited_response(retry_after)
+    
+    started = time.perf_counter()
+    results = gemini_agent.answer_batch(items, max_parallelism=parallelism)
+    return jsonify({
+        'results': results,
+        'count': len(results),
+        'unique_questions': sum(1 for r in results if r['error'] != 'Missing question' and not r['deduplicated']),
+        'errors': sum(1 for r in results if r['error']),
+        'total_latency_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+
+@app.route('/ask/stream', methods=['POST'])
+def ask_question_stream():
+    """Endpoint that streams the answer as Server-Sent Events."""
+    data = request.get_json(silent=True) or {}
+    user_question = data.get('question')
+    if not isinstance(user_question, str) or not user_question.strip():
+        return jsonify({'error': 'Missing question'}), 400
+    session_id = data.get('session_id') or data.get('from_number')
+    token = request.headers.get('X-Channel-Token')
+    allowed, retry_after = client_limiter.check(client_key(data, token, request.remote_addr))
+    if not allowed:
+        return rate_limited_response(retry_after)
+    channel = resolve_channel(data.get('channel'), token)
+    
+    def events():
+        try:
+            for text in gemini_agent.generate_response_stream(user_question, include_history=session_id is not None,
+                                                              session_id=session_id, channel=channel):
+                yield f"data: {json.dumps({'text': text})}\n\n"
+            yield "event: done\ndata: {}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Endpoint for health checks."""
@@ -99,20 +280,33 @@ def health_check():
     return jsonify({
         'gemini': gemini_health,
         'whatsapp': whatsapp_health,
-        'vapi': vapi_health
+        'vapi': vapi_health,
+        'sender_rate_limit': sender_limiter.stats(),
+        'client_rate_limit': client_limiter.stats()
     })
 
 @app.route('/clear', methods=['POST'])
 def clear_conversation():
-    """Endpoint to clear conversation history."""
-    gemini_agent.clear_conversation()
-    return jsonify({'message': 'Conversation history cleared.'})
+    """Endpoint to clear conversation history for one session."""
+    data = request.get_json(silent=True) or {}
+    session_id = data.get('session_id') or data.get('from_number') or DEFAULT_SESSION
+    gemini_agent.clear_conversation(session_id)
+    return jsonify({'message': 'Conversation history cleared.', 'session_id': session_id})
 
 @app.route('/context', methods=['GET'])
 def get_context():
-    """Endpoint to retrieve business context summary."""
-    summary = gemini_agent.get_business_summary()
-    return jsonify({'summary': summary})
+    """Endpoint to retrieve business context summary (never blocks on the model)."""
+    length = request.args.get('length', 'brief')
+    language = request.args.get('language')
+    try:
+        result = gemini_agent.get_summary_status(length, language)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if result['status'] == 'warming':
+        return jsonify(result), 202
+    if result['status'] == 'busy':
+        return jsonify(result), 503, {'Retry-After': '5'}
+    return jsonify(result)
 
 @app.route('/send-whatsapp', methods=['POST'])
 def send_whatsapp_message():
@@ -1,21 +1,395 @@
 import PyPDF2
 import pdfplumber
+import multiprocessing
 import os
-from typing import Optional
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from chunker import StructuredChunker, TextChunk
+from extraction_cache import ExtractionCache, file_hash, get_extraction_cache
+
+def _count_pages(pdf_path: str) -> int:
+    """Count pages with PyPDF2, falling back to pdfplumber."""
+    try:
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    except Exception:
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+def _iter_pypdf2(pdf_path: str, start: int, end: Optional[int] = None,
+                 skip: Optional[Callable[[int], bool]] = None) -> Iterator[Optional[str]]:
+    """Yield the text of pages [start, end) with PyPDF2, one page at a time (None where skip(i))."""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for i in range(start, len(pdf_reader.pages) if end is None else end):
+            if skip and skip(i):
+                yield None
+                continue
+            yield pdf_reader.pages[i].extract_text() + "\n"
+
+def _iter_pdfplumber(pdf_path: str, start: int, end: Optional[int] = None,
+                     skip: Optional[Callable[[int], bool]] = None) -> Iterator[Optional[str]]:
+    """Yield the text of pages [start, end) with pdfplumber, one page at a time (None where skip(i))."""
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = pdf.pages
+        for i in range(start, len(pages) if end is None else end):
+            if skip and skip(i):
+                pages[i] = None
+                yield None
+                continue
+            page = pages[i]
+            page_text = page.extract_text()
+            yield page_text + "\n" if page_text else ""
+            # Drop the parsed page so memory stays flat however long the document is
+            page.close()
+            pages[i] = None
+
+# Frequent English words; garbled extractions rarely produce them
+COMMON_WORDS = frozenset("""
+a about after all also an and any are as at be been but by can contact could day do each email
+for from get has have hours how if in information into is it its more most may new no not now
+of on one or other our out over per please price prices product products service services so
+some such support than that the their them then there these they this time to up us use we
+what when which who will with would you your
+""".split())
+
+# Weights of the printable, word-shape and dictionary scores
+SCORE_WEIGHTS = (0.4, 0.3, 0.3)
+# Dictionary-hit rate counted as fully natural text
+DICTIONARY_HIT_TARGET = 0.2
+_CID_PATTERN = re.compile(r"\(cid:\d+\)")
+_STRIP_PATTERN = re.compile(r"^[^\w]+|[^\w]+$")
+
+def score_page_text(text: str) -> float:
+    """
+    Score how much extracted text looks like real text, from 0 to 1.
+    
+    Combines the share of printable characters (unmapped glyphs such as
+    "(cid:12)" or U+FFFD count against it), the share of letters in words
+    of plausible length (letter-spaced or run-together text fails) and the
+    share of words found in COMMON_WORDS.
+    
+    Args:
+        text (str): Text of one page
+        
+    Returns:
+        float: Quality score, 0 for empty text
+    """
+    if not text or not text.strip():
+        return 0.0
+    bad = sum(len(match) for match in _CID_PATTERN.findall(text))
+    bad += sum(1 for ch in text
+               if ch == "\ufffd" or unicodedata.category(ch) in ("Co", "Cn")
+               or not (ch.isprintable() or ch in "\n\t\r"))
+    printable = max(0.0, 1 - bad / len(text))
+    
+    words = [_STRIP_PATTERN.sub("", token) for token in _CID_PATTERN.sub(" ", text).split()]
+    words = [word for word in words if word.isalpha()]
+    if not words:
+        return round(SCORE_WEIGHTS[0] * printable, 4)
+    # Weighted by letters, so one long run-together "word" outweighs a few real ones
+    letters = sum(len(word) for word in words)
+    shape = sum(len(word) for word in words if 2 <= len(word) <= 15 or word.lower() in ("a", "i")) / letters
+    hits = sum(1 for word in words if word.lower() in COMMON_WORDS) / len(words)
+    dictionary = min(1.0, hits / DICTIONARY_HIT_TARGET)
+    printable_weight, shape_weight, dictionary_weight = SCORE_WEIGHTS
+    return round(printable_weight * printable + shape_weight * shape + dictionary_weight * dictionary, 4)
+
+# Libraries raced page by page, most preferred first
+RACE_EXTRACTORS = ("pdfplumber", "pypdf2")
+# Bump when scoring or the winner rule changes, so cached race results are re-extracted
+SCORER_VERSION = 2
+# Pages a library may parse ahead of the consumer, so racing keeps memory flat
+RACE_WINDOW_PAGES = 4
+
+def _race_margin() -> float:
+    """Score lead another library needs over the preferred one to win a page (PDF_RACE_MARGIN)."""
+    return float(os.getenv('PDF_RACE_MARGIN', '0.1'))
+
+def _iter_race(pdf_path: str, start: int, end: Optional[int] = None,
+               margin: Optional[float] = None, window: int = RACE_WINDOW_PAGES) -> Iterator[tuple]:
+    """
+    Race both libraries over pages [start, end), yielding the better text per page.
+    
+    Each library runs in its own thread. The preferred library (the first
+    of RACE_EXTRACTORS) keeps a page unless another one scores more than
+    margin higher, so the winner depends only on the scores, never on which
+    thread finished first. A preferred result scoring at least 1 - margin
+    cannot be beaten; the page is decided at once and the others skip it.
+    A library waits rather than parse more than window pages past the page
+    being consumed, so at most window pages per library are buffered.
+    
+    Yields:
+        tuple: (text, winning library or None, {library: score}) in page order
+    """
+    end = _count_pages(pdf_path) if end is None else end
+    margin = _race_margin() if margin is None else margin
+    preferred = RACE_EXTRACTORS[0]
+    cond = threading.Condition()
+    results: Dict[str, Dict[int, tuple]] = {name: {} for name in RACE_EXTRACTORS}
+    decided = set()
+    finished = set()
+    stop = threading.Event()
+    cursor = [start]
+    
+    def skip(i: int) -> bool:
+        return stop.is_set() or i in decided
+    
+    def run(name: str):
+        pages = PAGE_ITERATORS[name](pdf_path, start, end, skip)
+        try:
+            for i in range(start, end):
+                with cond:
+                    while i >= cursor[0] + window and not stop.is_set():
+                        cond.wait()
+                if stop.is_set():
+                    break
+                text = next(pages, None)
+                if text is None:
+                    continue
+                score = score_page_text(text)
+                with cond:
+                    if i >= cursor[0]:
+                        results[name][i] = (text, score)
+                        if name == preferred and score >= 1 - margin:
+                            decided.add(i)
+                        cond.notify_all()
+        except Exception as e:
+            print(f"Error extracting text with {name}: {e}")
+        finally:
+            pages.close()
+            with cond:
+                finished.add(name)
+                cond.notify_all()
+    
+    def pick(i: int) -> Optional[tuple]:
+        if i not in decided and any(i not in results[name] and name not in finished
+                                    for name in RACE_EXTRACTORS):
+            return None
+        scores = {name: results[name][i][1] for name in RACE_EXTRACTORS if i in results[name]}
+        if not scores:
+            return "", None, scores
+        # Ties go to the earlier library in RACE_EXTRACTORS
+        best = max(scores, key=lambda name: (scores[name], -RACE_EXTRACTORS.index(name)))
+        if preferred in scores and scores[best] <= scores[preferred] + margin:
+            best = preferred
+        return results[best][i][0], best, scores
+    
+    threads = [threading.Thread(target=run, args=(name,), daemon=True) for name in RACE_EXTRACTORS]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(start, end):
+            with cond:
+                choice = pick(i)
+                while choice is None:
+                    cond.wait()
+                    choice = pick(i)
+                for pages in results.values():
+                    pages.pop(i, None)
+                cursor[0] = i + 1
+                cond.notify_all()
+            yield choice
+    finally:
+        # Stop the slower library; it exits after the page it is parsing
+        with cond:
+            stop.set()
+            cond.notify_all()
+
+def _iter_race_text(pdf_path: str, start: int, end: Optional[int] = None) -> Iterator[str]:
+    """Yield the winning text of pages [start, end)."""
+    for text, _, _ in _iter_race(pdf_path, start, end):
+        yield text
+
+def _pages_pypdf2(pdf_path: str, start: int, end: int) -> List[str]:
+    """Extract pages [start, end) with PyPDF2 (runs in a worker process)."""
+    return list(_iter_pypdf2(pdf_path, start, end))
+
+def _pages_pdfplumber(pdf_path: str, start: int, end: int) -> List[str]:
+    """Extract pages [start, end) with pdfplumber (runs in a worker process)."""
+    return list(_iter_pdfplumber(pdf_path, start, end))
+
+def _pages_race(pdf_path: str, start: int, end: int) -> List[tuple]:
+    """Race both libraries over pages [start, end) (runs in a worker process)."""
+    return list(_iter_race(pdf_path, start, end))
+
+PAGE_EXTRACTORS = {
+    "pypdf2": _pages_pypdf2,
+    "pdfplumber": _pages_pdfplumber,
+    "race": _pages_race
+}
+PAGE_ITERATORS = {
+    "pypdf2": _iter_pypdf2,
+    "pdfplumber": _iter_pdfplumber,
+    "race": _iter_race_text
+}
+
+class PageText:
+    """One extracted page with its position in the document text."""
+    
+    __slots__ = ("number", "offset", "text")
+    
+    def __init__(self, number: int, offset: int, text: str):
+        """
+        Args:
+            number (int): 1-based page number
+            offset (int): Character offset of the page in the full document text
+            text (str): Page text
+        """
+        self.number = number
+        self.offset = offset
+        self.text = text
+
+class ChunkView:
+    """
+    A chunk recorded as document offsets over a shared source string.
+    
+    Views over the same source share it instead of each holding a copy of
+    its window; the text is sliced out only when .text is read.
+    """
+    
+    __slots__ = ("index", "start", "end", "page_start", "page_end", "_source", "_source_offset")
+    
+    def __init__(self, index: int, start: int, end: int, page_start: int, page_end: int,
+                 source: str, source_offset: int = 0):
+        """
+        Args:
+            index (int): Chunk number in the document
+            start (int): Document offset of the first character
+            end (int): Document offset after the last character
+            page_start (int): Page containing the first character
+            page_end (int): Page containing the last character
+            source (str): Text containing the chunk
+            source_offset (int): Document offset of source[0]
+        """
+        self.index = index
+        self.start = start
+        self.end = end
+        self.page_start = page_start
+        self.page_end = page_end
+        self._source = source
+        self._source_offset = source_offset
+    
+    @property
+    def text(self) -> str:
+        return self._source[self.start - self._source_offset:self.end - self._source_offset]
+    
+    def __len__(self) -> int:
+        return self.end - self.start
+    
+    def __str__(self) -> str:
+        return self.text
+
+# Part of the extraction cache key: either library may produce the text (fallback or race)
+EXTRACTOR_VERSION = f"pdfplumber-{pdfplumber.__version__}/PyPDF2-{PyPDF2.__version__}"
 
 class PDFProcessor:
     """Class to handle PDF text extraction and processing."""
     
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, workers: Optional[int] = None, parallel_min_pages: Optional[int] = None,
+                 cache: Optional[ExtractionCache] = None):
         """
         Initialize the PDF processor.
         
         Args:
             pdf_path (str): Path to the PDF file
+            workers (int): Processes used for page-parallel extraction
+                (default PDF_EXTRACT_WORKERS or the CPU count; 1 disables)
+            parallel_min_pages (int): Documents with fewer pages are extracted
+                sequentially (default PDF_PARALLEL_MIN_PAGES or 32)
+            cache (ExtractionCache): On-disk cache of extracted pages (default from PDF_CACHE* settings; False disables)
         """
         self.pdf_path = pdf_path
         self.text_content = ""
         self.is_loaded = False
+        self.cache = cache if cache is not None else get_extraction_cache()
+        # Page texts of the last extraction (memory-mapped CachedPages on a cache hit)
+        self.pages = []
+        self.workers = workers or int(os.getenv('PDF_EXTRACT_WORKERS', '0')) or os.cpu_count() or 1
+        self.parallel_min_pages = parallel_min_pages or int(os.getenv('PDF_PARALLEL_MIN_PAGES', '32'))
+        self.page_count = None
+        self.last_extraction = {}
+        # Per-page winner and scores of the last race extraction
+        self.page_report = []
+    
+    def count_pages(self) -> int:
+        """
+        Count the pages without extracting any text.
+        
+        Returns:
+            int: Number of pages
+        """
+        if self.page_count is None:
+            self.page_count = _count_pages(self.pdf_path)
+        return self.page_count
+    
+    def _page_ranges(self, page_count: int) -> List[tuple]:
+        """Split pages into contiguous ranges, a few per worker so uneven pages balance out."""
+        parts = min(page_count, self.workers * 4)
+        size, extra = divmod(page_count, parts)
+        ranges, start = [], 0
+        for index in range(parts):
+            end = start + size + (1 if index < extra else 0)
+            ranges.append((start, end))
+            start = end
+        return ranges
+    
+    def _extract_pages(self, method: str) -> List[str]:
+        """
+        Extract all pages with one library, in parallel for large documents.
+        
+        Page ranges are extracted in worker processes and reassembled in page
+        order; small documents, a single worker or a failing pool fall back
+        to one sequential pass.
+        
+        Args:
+            method (str): 'pdfplumber', 'pypdf2' or 'race'
+            
+        Returns:
+            list: Page texts in page order
+        """
+        extract = PAGE_EXTRACTORS[method]
+        started = time.perf_counter()
+        page_count = self.count_pages()
+        mode, workers = "sequential", 1
+        texts = None
+        if self.workers > 1 and page_count >= self.parallel_min_pages:
+            ranges = self._page_ranges(page_count)
+            workers = min(self.workers, len(ranges))
+            try:
+                # Spawned workers start from a fresh interpreter instead of forking
+                # this one mid-flight with the race threads' and server's locks held
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                    results = executor.map(extract, [self.pdf_path] * len(ranges),
+                                           [start for start, _ in ranges], [end for _, end in ranges])
+                    texts = [text for page_texts in results for text in page_texts]
+                mode = "parallel"
+            except Exception as e:
+                print(f"Parallel extraction failed, extracting sequentially: {e}")
+                workers = 1
+        if texts is None:
+            texts = extract(self.pdf_path, 0, page_count)
+        self.last_extraction = {
+            "method": method,
+            "mode": mode,
+            "workers": workers,
+            "pages": page_count,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
+        if method == "race":
+            self.page_report = [{"page": number, "winner": winner, "scores": scores}
+                                for number, (_, winner, scores) in enumerate(texts, start=1)]
+            winners = [page["winner"] for page in self.page_report]
+            self.last_extraction["winners"] = {name: winners.count(name) for name in RACE_EXTRACTORS}
+            self.last_extraction["page_winners"] = winners
+            texts = [text for text, _, _ in texts]
+        return texts
     
     def extract_text_pypdf2(self) -> str:
         """
@@ -25,15 +399,11 @@ class PDFProcessor:
             str: Extracted text content
         """
         try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            self.pages = self._extract_pages("pypdf2")
         except Exception as e:
             print(f"Error extracting text with PyPDF2: {e}")
-            return ""
+            self.pages = []
+        return "".join(self.pages)
     
     def extract_text_pdfplumber(self) -> str:
         """
@@ -43,23 +413,38 @@ class PDFProcessor:
             str: Extracted text content
         """
         try:
-            text = ""
-            with pdfplumber.open(self.pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            return text
+            self.pages = self._extract_pages("pdfplumber")
         except Exception as e:
             print(f"Error extracting text with pdfplumber: {e}")
-            return ""
+            self.pages = []
+        return "".join(self.pages)
+    
+    def extract_text_race(self) -> str:
+        """
+        Extract text with both libraries at once, keeping the better page.
+        
+        Returns:
+            str: Extracted text content
+        """
+        try:
+            self.pages = self._extract_pages("race")
+        except Exception as e:
+            print(f"Error extracting text with both libraries: {e}")
+            self.pages = []
+        return "".join(self.pages)
     
-    def extract_text(self, method: str = "pdfplumber") -> str:
+    def extract_text(self, method: Optional[str] = None) -> str:
         """
         Extract text from PDF using specified method.
         
+        'race' runs pdfplumber and PyPDF2 concurrently, scores each page's
+        output with score_page_text() and keeps the better one; the winner
+        per page is reported in last_extraction and page_report. A single
+        library falls back to the other when it extracts nothing.
+        
         Args:
-            method (str): Method to use ('pdfplumber' or 'pypdf2')
+            method (str): Method to use ('race', 'pdfplumber' or 'pypdf2';
+                default PDF_EXTRACT_METHOD or 'race')
             
         Returns:
             str: Extracted text content
@@ -67,13 +452,20 @@ class PDFProcessor:
         if not os.path.exists(self.pdf_path):
             raise FileNotFoundError(f"PDF file not found: {self.pdf_path}")
         
-        if method == "pdfplumber":
+        method = method or os.getenv('PDF_EXTRACT_METHOD', 'race')
+        cache_key = self._load_cached(method)
+        if self.is_loaded:
+            return self.text_content
+        
+        if method == "race":
+            self.text_content = self.extract_text_race()
+        elif method == "pdfplumber":
             self.text_content = self.extract_text_pdfplumber()
         else:
             self.text_content = self.extract_text_pypdf2()
         
         # If first method fails, try the other
-        if not self.text_content.strip():
+        if method != "race" and not self.text_content.strip():
             print(f"First method failed, trying alternative...")
             if method == "pdfplumber":
                 self.text_content = self.extract_text_pypdf2()
@@ -81,8 +473,150 @@ class PDFProcessor:
                 self.text_content = self.extract_text_pdfplumber()
         
         self.is_loaded = True
+        if cache_key and self.text_content.strip():
+            try:
+                self.cache.put(cache_key, self.pages, dict(self.last_extraction, source=os.path.basename(self.pdf_path)))
+            except Exception as e:
+                print(f"Error writing extraction cache: {e}")
         return self.text_content
     
+    def _load_cached(self, method: str) -> Optional[str]:
+        """
+        Load previously extracted pages for this file's content, if cached.
+        
+        On a hit the pages are memory-mapped and the processor is marked
+        loaded without parsing the PDF.
+        
+        Args:
+            method (str): Requested extraction method (part of the key)
+            
+        Returns:
+            str: Cache key to store a fresh extraction under, or None when caching is off
+        """
+        started = time.perf_counter()
+        cache_key, cached = self._cache_lookup(method)
+        if cached is not None:
+            self.pages = cached
+            self.text_content = cached.text()
+            self.page_count = len(cached)
+            self.is_loaded = True
+            self.last_extraction = dict(cached.meta, mode="cache", seconds=round(time.perf_counter() - started, 3))
+        return cache_key
+    
+    def _cache_lookup(self, method: str) -> tuple:
+        """Return (cache key, CachedPages or None); the key is None when caching is off."""
+        if not self.cache:
+            return None, None
+        if method == "race":
+            # Raced pages also depend on the scoring and the winning margin
+            method = f"race-{SCORER_VERSION}-{_race_margin()}"
+        try:
+            cache_key = self.cache.key(file_hash(self.pdf_path), method, EXTRACTOR_VERSION)
+        except OSError as e:
+            print(f"Error hashing PDF for the extraction cache: {e}")
+            return None, None
+        return cache_key, self.cache.get(cache_key)
+    
+    def iter_pages(self, method: Optional[str] = None) -> Iterator[PageText]:
+        """
+        Yield pages lazily with their page numbers and document offsets.
+        
+        Uses the already extracted or cached pages when available; otherwise
+        the PDF is parsed one page at a time and nothing is kept, so memory
+        does not grow with the document. Streaming extraction does not fill
+        the cache and a single library does not fall back to the other.
+        
+        Args:
+            method (str): Method to use when parsing ('race', 'pdfplumber' or
+                'pypdf2'; default PDF_EXTRACT_METHOD or 'race')
+            
+        Yields:
+            PageText: Page number, offset and text
+        """
+        method = method or os.getenv('PDF_EXTRACT_METHOD', 'race')
+        pages: Iterable[str] = self.pages if self.is_loaded else None
+        if pages is None:
+            if not os.path.exists(self.pdf_path):
+                raise FileNotFoundError(f"PDF file not found: {self.pdf_path}")
+            _, pages = self._cache_lookup(method)
+        if pages is None:
+            pages = PAGE_ITERATORS[method](self.pdf_path, 0)
+        offset = 0
+        for number, text in enumerate(pages, start=1):
+            yield PageText(number, offset, text)
+            offset += len(text)
+    
+    def iter_chunks(self, chunk_size: int = 1000, overlap: int = 100,
+                    pages: Optional[Iterable[PageText]] = None) -> Iterator[ChunkView]:
+        """
+        Yield fixed-size overlapping chunks in a single pass over the pages.
+        
+        Produces the same windows as get_text_chunks, but only the text not
+        yet fully chunked (under one chunk plus one page) is held at a time,
+        and each page is copied into that buffer once, so assembly is linear
+        in the document length.
+        
+        Args:
+            chunk_size (int): Size of each chunk
+            overlap (int): Overlap between chunks
+            pages (iterable): Pages to chunk (defaults to iter_pages())
+            
+        Yields:
+            ChunkView: Chunk offsets, page numbers and lazily sliced text
+        """
+        step = chunk_size - overlap
+        if step <= 0:
+            raise ValueError("overlap must be smaller than chunk_size")
+        buffer, buffer_offset = "", 0
+        # Offsets and numbers of the pages that still overlap the buffer
+        page_offsets: List[int] = []
+        page_numbers: List[int] = []
+        start = index = 0
+        
+        def view(end: int) -> ChunkView:
+            first = page_numbers[bisect_right(page_offsets, start) - 1]
+            last = page_numbers[bisect_right(page_offsets, max(start, end - 1)) - 1]
+            return ChunkView(index, start, end, first, last, buffer, buffer_offset)
+        
+        for page in (pages if pages is not None else self.iter_pages()):
+            if not page.text:
+                continue
+            # Drop text every remaining chunk starts after, then append the page
+            buffer = buffer[start - buffer_offset:] + page.text
+            buffer_offset = start
+            while len(page_offsets) > 1 and page_offsets[1] <= start:
+                page_offsets.pop(0)
+                page_numbers.pop(0)
+            page_offsets.append(page.offset)
+            page_numbers.append(page.number)
+            total = buffer_offset + len(buffer)
+            while start + chunk_size <= total:
+                yield view(start + chunk_size)
+                start += step
+                index += 1
+        total = buffer_offset + len(buffer)
+        while start < total:
+            yield view(min(start + chunk_size, total))
+            start += step
+            index += 1
+    
+    def iter_structured_chunks(self, max_tokens: Optional[int] = None,
+                               pages: Optional[Iterable[PageText]] = None) -> Iterator[TextChunk]:
+        """
+        Yield chunks cut at headings, paragraphs and sentences, sized by tokens.
+        
+        Unlike iter_chunks, chunks neither split sentences nor overlap; each
+        carries a content-derived id and the pages it came from.
+        
+        Args:
+            max_tokens (int): Token budget per chunk (default CHUNK_MAX_TOKENS or 256)
+            pages (iterable): Pages to chunk (defaults to iter_pages())
+            
+        Yields:
+            TextChunk: Chunks in document order
+        """
+        return StructuredChunker(max_tokens).chunks(pages if pages is not None else self.iter_pages())
+    
     def get_text_chunks(self, chunk_size: int = 1000, overlap: int = 100) -> list:
         """
         Split text into chunks for better processing.
@@ -97,14 +631,7 @@ class PDFProcessor:
         if not self.is_loaded:
             self.extract_text()
         
-        chunks = []
-        text = self.text_content
-        
-        for i in range(0, len(text), chunk_size - overlap):
-            chunk = text[i:i + chunk_size]
-            chunks.append(chunk)
-            
-        return chunks
+        return [chunk.text for chunk in self.iter_chunks(chunk_size, overlap)]
     
     def get_summary_info(self) -> dict:
         """
@@ -120,5 +647,6 @@ class PDFProcessor:
             "file_path": self.pdf_path,
             "text_length": len(self.text_content),
             "word_count": len(self.text_content.split()),
-            "is_loaded": self.is_loaded
+            "is_loaded": self.is_loaded,
+            "extraction": self.last_extraction
         }
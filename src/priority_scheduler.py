@@ -0,0 +1,259 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+# Channel -> (weight, max share of the concurrency slots)
+DEFAULT_CLASSES = {
+    "voice": (16, 1.0),
+    "whatsapp": (8, 1.0),
+    "api": (4, 1.0),
+    "batch": (1, 0.5),
+    "background": (1, 0.25)
+}
+DEFAULT_CLASS = "api"
+
+class SchedulerTimeout(TimeoutError):
+    """Raised when a request waits longer than its timeout for an LLM slot."""
+
+class _Waiter:
+    """A queued request: its class, virtual finish tag and how to wake it."""
+
+    __slots__ = ("priority_class", "finish", "enqueued_at", "granted", "_event", "_loop", "_future")
+
+    def __init__(self, priority_class: str, finish: float, loop=None):
+        self.priority_class = priority_class
+        self.finish = finish
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self._loop = loop
+        self._event = None if loop else threading.Event()
+        self._future = loop.create_future() if loop else None
+
+    def wake(self):
+        """Grant the slot. Caller holds the scheduler lock."""
+        self.granted = True
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+class _ClassState:
+    def __init__(self, weight: float, max_inflight: int, window: int):
+        self.weight = weight
+        self.max_inflight = max_inflight
+        self.queue = deque()
+        self.last_finish = 0.0
+        self.in_flight = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self.waits = deque(maxlen=window)
+
+class PriorityScheduler:
+    """
+    Concurrency cap for LLM calls with weighted fair queuing across channel classes.
+
+    When every slot is busy, requests queue per class. A freed slot goes to
+    the queued request with the smallest virtual finish tag (start-time fair
+    queuing), so each backlogged class gets slots in proportion to its weight.
+    Low-priority classes can also be capped to a share of the slots, keeping
+    headroom for latency-critical traffic during batch peaks.
+    """
+
+    def __init__(self, max_concurrency: int = 32, classes: Optional[Dict[str, tuple]] = None,
+                 window: int = 500):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency (int): Total LLM calls in flight at once
+            classes (dict): Class name -> (weight, max share of slots); defaults to DEFAULT_CLASSES
+            window (int): Recent queue waits kept per class for percentiles
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        classes = dict(classes or DEFAULT_CLASSES)
+        # Unknown channels fall back to the default class, so it always exists
+        classes.setdefault(DEFAULT_CLASS, DEFAULT_CLASSES[DEFAULT_CLASS])
+        self._classes: Dict[str, _ClassState] = {}
+        for name, (weight, share) in classes.items():
+            limit = max(1, int(round(self.max_concurrency * share)))
+            self._classes[name] = _ClassState(max(weight, 1e-6), limit, window)
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_classes(spec: str) -> Dict[str, tuple]:
+        """
+        Parse a class spec such as "voice=16,whatsapp=8,api=4,batch=1:0.5".
+
+        Args:
+            spec (str): Comma-separated name=weight[:max_share] entries
+
+        Returns:
+            dict: Class name -> (weight, max share); unspecified defaults are kept
+        """
+        classes = dict(DEFAULT_CLASSES)
+        for entry in filter(None, (part.strip() for part in spec.split(','))):
+            name, _, value = entry.partition('=')
+            weight, _, share = value.partition(':')
+            classes[name.strip()] = (float(weight), float(share) if share else 1.0)
+        return classes
+
+    def class_for(self, channel: Optional[str]) -> str:
+        """Priority class of a channel (unknown channels are treated as 'api')."""
+        return channel if channel in self._classes else DEFAULT_CLASS
+
+    def _eligible(self, state: _ClassState) -> bool:
+        return self.in_flight < self.max_concurrency and state.in_flight < state.max_inflight
+
+    def _admit(self, waiter: _Waiter):
+        """Take a slot for a waiter. Caller holds the lock."""
+        state = self._classes[waiter.priority_class]
+        state.in_flight += 1
+        state.admitted += 1
+        state.waits.append(time.monotonic() - waiter.enqueued_at)
+        self.in_flight += 1
+
+    def _dispatch(self):
+        """Hand free slots to queued requests in virtual finish order. Caller holds the lock."""
+        while self.in_flight < self.max_concurrency:
+            best = None
+            for state in self._classes.values():
+                if state.queue and state.in_flight < state.max_inflight:
+                    if best is None or state.queue[0].finish < best.queue[0].finish:
+                        best = state
+            if best is None:
+                return
+            waiter = best.queue.popleft()
+            self.virtual_time = max(self.virtual_time, waiter.finish - 1.0 / best.weight)
+            self._admit(waiter)
+            waiter.wake()
+
+    def _enqueue(self, priority_class: str, loop=None) -> _Waiter:
+        """Admit immediately when possible, otherwise queue. Caller holds the lock."""
+        state = self._classes[priority_class]
+        start = max(self.virtual_time, state.last_finish)
+        state.last_finish = start + 1.0 / state.weight
+        waiter = _Waiter(priority_class, state.last_finish, loop)
+        if not state.queue and self._eligible(state):
+            self.virtual_time = max(self.virtual_time, start)
+            self._admit(waiter)
+            waiter.granted = True
+        else:
+            state.queue.append(waiter)
+        return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Drop a waiter that gave up. Returns True if it had already been granted a slot."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            state = self._classes[waiter.priority_class]
+            state.queue.remove(waiter)
+            state.timeouts += 1
+            return False
+
+    def release(self, priority_class: str):
+        """Free a slot taken by acquire()/aacquire()."""
+        with self._lock:
+            self._classes[priority_class].in_flight -= 1
+            self.in_flight -= 1
+            self._dispatch()
+
+    def acquire(self, channel: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """
+        Wait for an LLM slot.
+
+        Args:
+            channel (str): Request channel
+            timeout (float): Longest wait in seconds (None waits indefinitely)
+
+        Returns:
+            str: Priority class to pass to release()
+
+        Raises:
+            SchedulerTimeout: No slot became free in time
+        """
+        priority_class = self.class_for(channel)
+        with self._lock:
+            waiter = self._enqueue(priority_class)
+        if waiter.granted:
+            return priority_class
+        if not waiter._event.wait(timeout) and not self._abandon(waiter):
+            raise SchedulerTimeout(f"No LLM slot for {priority_class} request within {timeout}s")
+        return priority_class
+
+    async def aacquire(self, channel: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """Async variant of acquire(); cancellation while queued gives up the place in line."""
+        priority_class = self.class_for(channel)
+        with self._lock:
+            waiter = self._enqueue(priority_class, asyncio.get_running_loop())
+        if waiter.granted:
+            return priority_class
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter._future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if self._abandon(waiter):
+                self.release(priority_class)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise SchedulerTimeout(f"No LLM slot for {priority_class} request within {timeout}s")
+        return priority_class
+
+    @contextmanager
+    def slot(self, channel: Optional[str] = None, timeout: Optional[float] = None):
+        """Hold an LLM slot for the duration of a with-block."""
+        priority_class = self.acquire(channel, timeout)
+        try:
+            yield priority_class
+        finally:
+            self.release(priority_class)
+
+    @asynccontextmanager
+    async def aslot(self, channel: Optional[str] = None, timeout: Optional[float] = None):
+        """Async variant of slot()."""
+        priority_class = await self.aacquire(channel, timeout)
+        try:
+            yield priority_class
+        finally:
+            self.release(priority_class)
+
+    def stats(self) -> Dict:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            dict: Slots in use and, per class, weight, queue depth, in-flight calls and queue wait percentiles (ms)
+        """
+        with self._lock:
+            classes = {}
+            for name, state in self._classes.items():
+                waits = sorted(state.waits)
+
+                def percentile(fraction):
+                    if not waits:
+                        return 0.0
+                    return round(waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000, 1)
+
+                classes[name] = {
+                    "weight": state.weight,
+                    "max_in_flight": state.max_inflight,
+                    "in_flight": state.in_flight,
+                    "queue_depth": len(state.queue),
+                    "admitted": state.admitted,
+                    "timeouts": state.timeouts,
+                    "queue_wait_ms": {"p50": percentile(0.5), "p95": percentile(0.95),
+                                      "max": round(waits[-1] * 1000, 1) if waits else 0.0}
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "classes": classes
+            }
@@ -0,0 +1,394 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+class QuotaWaitTimeout(Exception):
+    """Raised when a call would have to queue longer than allowed for upstream quota."""
+
+class MemoryBucketStore:
+    """
+    In-process token buckets with reservations.
+
+    A reservation takes the cost immediately, letting the level go negative;
+    the caller then waits until the bucket would have refilled to zero. This
+    serves queued callers in arrival order without a background thread.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100000):
+        """
+        Initialize the store.
+
+        Args:
+            max_keys (int): Buckets kept before idle (full) ones are dropped
+        """
+        self.max_keys = max_keys
+        # key -> (level, last update, rate, capacity)
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _level(self, key: str, rate: float, capacity: float, now: float) -> float:
+        level, updated, _, _ = self._buckets.get(key, (capacity, now, rate, capacity))
+        return min(capacity, level + (now - updated) * rate)
+
+    def _prune(self, now: float):
+        """Drop buckets that have refilled completely. Caller must hold the lock."""
+        full = [key for key, (_, _, rate, capacity) in self._buckets.items()
+                if self._level(key, rate, capacity, now) >= capacity]
+        for key in full:
+            del self._buckets[key]
+
+    def reserve(self, key: str, cost: float, rate: float, capacity: float,
+                max_wait: float = 0.0) -> Tuple[bool, float]:
+        """
+        Reserve cost units from a bucket.
+
+        Args:
+            key (str): Bucket name
+            cost (float): Units to take (clamped to capacity)
+            rate (float): Refill rate in units per second
+            capacity (float): Bucket size (burst)
+            max_wait (float): Longest acceptable wait for the units to be available
+
+        Returns:
+            tuple: (granted, wait seconds); when not granted nothing is taken
+                and wait is the time until the reservation would fit
+        """
+        cost = min(cost, capacity)
+        with self._lock:
+            now = time.monotonic()
+            level = self._level(key, rate, capacity, now)
+            wait = max(0.0, (cost - level) / rate)
+            if wait > max_wait:
+                return False, wait
+            if key not in self._buckets and len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = (level - cost, now, rate, capacity)
+            return True, wait
+
+    def refund(self, key: str, cost: float, rate: float, capacity: float):
+        """Give back units from a reservation that was not used."""
+        cost = min(cost, capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._buckets[key] = (min(capacity, self._level(key, rate, capacity, now) + cost), now, rate, capacity)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+class RedisBucketStore:
+    """Token buckets shared across processes in Redis (same semantics as MemoryBucketStore)."""
+
+    name = "redis"
+
+    RESERVE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local data = redis.call('HMGET', KEYS[1], 'level', 'ts')
+local level = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+level = math.min(capacity, level + math.max(0, now - ts) * rate)
+local wait = math.max(0, (cost - level) / rate)
+if wait > max_wait then
+    return {0, tostring(wait)}
+end
+redis.call('HSET', KEYS[1], 'level', tostring(level - cost), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity + cost) / rate) + 60)
+return {1, tostring(wait)}
+"""
+
+    REFUND_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'level', 'ts')
+local level = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+level = math.min(capacity, level + math.max(0, now - ts) * rate + cost)
+redis.call('HSET', KEYS[1], 'level', tostring(level), 'ts', tostring(now))
+return 1
+"""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        """
+        Connect to Redis. Requires the redis package.
+
+        Args:
+            url (str): Redis URL, e.g. redis://localhost:6379/0
+            prefix (str): Key prefix for bucket hashes
+        """
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._reserve = self.client.register_script(self.RESERVE_SCRIPT)
+        self._refund = self.client.register_script(self.REFUND_SCRIPT)
+
+    def reserve(self, key: str, cost: float, rate: float, capacity: float,
+                max_wait: float = 0.0) -> Tuple[bool, float]:
+        cost = min(cost, capacity)
+        granted, wait = self._reserve(keys=[self.prefix + key], args=[cost, rate, capacity, max_wait])
+        return bool(int(granted)), float(wait)
+
+    def refund(self, key: str, cost: float, rate: float, capacity: float):
+        self._refund(keys=[self.prefix + key], args=[min(cost, capacity), rate, capacity])
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+def get_bucket_store(backend: str = "memory", url: Optional[str] = None):
+    """
+    Create a bucket store.
+
+    Args:
+        backend (str): 'memory' (default) or 'redis'
+        url (str): Redis URL for the 'redis' backend
+
+    Returns:
+        MemoryBucketStore or RedisBucketStore
+    """
+    if backend == 'redis':
+        try:
+            return RedisBucketStore(url or "redis://localhost:6379/0")
+        except Exception as e:
+            print(f"Error connecting rate limit store to Redis, using in-memory buckets: {e}")
+    return MemoryBucketStore()
+
+class SenderRateLimiter:
+    """Per-sender token buckets: each sender gets a burst and a steady per-minute rate."""
+
+    def __init__(self, per_minute: float = 10, burst: int = 5, store=None):
+        """
+        Initialize the limiter.
+
+        Args:
+            per_minute (float): Sustained messages per minute per sender (0 disables limiting)
+            burst (int): Messages a sender may send back to back
+            store: Bucket store (defaults to in-memory)
+        """
+        self.per_minute = per_minute
+        self.burst = max(1, burst)
+        self.store = store or MemoryBucketStore()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.limited = 0
+
+    def check(self, sender: str, cost: int = 1) -> Tuple[bool, float]:
+        """
+        Take messages from a sender's bucket.
+
+        Args:
+            sender (str): Sender id (phone number or client address)
+            cost (int): Messages to take (e.g. the questions of a batch; at most the burst)
+
+        Returns:
+            tuple: (allowed, seconds until the sender may retry)
+        """
+        if self.per_minute <= 0:
+            return True, 0.0
+        try:
+            allowed, wait = self.store.reserve(f"sender:{sender}", cost, self.per_minute / 60.0, self.burst)
+        except Exception as e:
+            # A store outage must not take the webhooks down with it
+            print(f"Error checking sender rate limit: {e}")
+            allowed, wait = True, 0.0
+        with self._lock:
+            if allowed:
+                self.allowed += 1
+            else:
+                self.limited += 1
+        return allowed, wait
+
+    def stats(self) -> Dict:
+        """
+        Get limiter statistics.
+
+        Returns:
+            dict: Settings and allowed / limited counts
+        """
+        with self._lock:
+            return {
+                "backend": self.store.name,
+                "per_minute": self.per_minute,
+                "burst": self.burst,
+                "allowed": self.allowed,
+                "limited": self.limited
+            }
+
+class QuotaScheduler:
+    """
+    Global requests-per-minute and tokens-per-minute gate in front of the model.
+
+    Calls that would exceed the quota queue (in arrival order) until capacity
+    frees up instead of failing upstream with 429s. Waits longer than
+    max_wait raise QuotaWaitTimeout.
+    """
+
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_wait: float = 10.0, store=None,
+                 window: int = 500):
+        """
+        Initialize the scheduler.
+
+        Args:
+            rpm (float): Requests per minute (0 = unlimited)
+            tpm (float): Input tokens per minute (0 = unlimited)
+            max_wait (float): Longest time a call may queue
+            store: Bucket store (defaults to in-memory; use a shared one across workers)
+            window (int): Number of recent queue waits kept for percentiles
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_wait = max_wait
+        self.store = store or MemoryBucketStore()
+        self._waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.queued_now = 0
+        self.counters = {
+            "requests": 0,
+            "queued": 0,
+            "timeouts": 0,
+            "refunded": 0,
+            "tokens": 0
+        }
+
+    def _reserve(self, tokens: int, max_wait: Optional[float] = None) -> float:
+        """Reserve one request and tokens from both buckets; return the wait before sending."""
+        limit = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+        wait = 0.0
+        if self.rpm > 0:
+            granted, wait = self.store.reserve("quota:requests", 1, self.rpm / 60.0, self.rpm, limit)
+            if not granted:
+                raise QuotaWaitTimeout(f"Request quota wait of {wait:.1f}s exceeds {limit:.1f}s")
+        if self.tpm > 0 and tokens > 0:
+            granted, token_wait = self.store.reserve("quota:tokens", tokens, self.tpm / 60.0, self.tpm, limit)
+            if not granted:
+                if self.rpm > 0:
+                    self.store.refund("quota:requests", 1, self.rpm / 60.0, self.rpm)
+                raise QuotaWaitTimeout(f"Token quota wait of {token_wait:.1f}s exceeds {limit:.1f}s")
+            wait = max(wait, token_wait)
+        return wait
+
+    def refund(self, tokens: int = 0):
+        """
+        Return a reservation whose call was never sent.
+
+        Args:
+            tokens (int): Tokens passed to acquire()
+        """
+        self._refund(tokens)
+        with self._lock:
+            self.counters["refunded"] += 1
+
+    def _refund(self, tokens: int):
+        if self.rpm > 0:
+            self.store.refund("quota:requests", 1, self.rpm / 60.0, self.rpm)
+        if self.tpm > 0 and tokens > 0:
+            self.store.refund("quota:tokens", tokens, self.tpm / 60.0, self.tpm)
+
+    def _record(self, tokens: int, wait: Optional[float]):
+        with self._lock:
+            if wait is None:
+                self.counters["timeouts"] += 1
+                return
+            self.counters["requests"] += 1
+            self.counters["tokens"] += tokens
+            if wait > 0:
+                self.counters["queued"] += 1
+            self._waits.append(wait)
+
+    def acquire(self, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """
+        Block until the call fits in the quota.
+
+        Args:
+            tokens (int): Estimated input tokens of the call
+            max_wait (float): Tighter limit on the wait for this call (e.g. its remaining deadline)
+
+        Returns:
+            float: Seconds spent queued
+
+        Raises:
+            QuotaWaitTimeout: The wait would exceed max_wait
+        """
+        if self.rpm <= 0 and self.tpm <= 0:
+            return 0.0
+        try:
+            wait = self._reserve(tokens, max_wait)
+        except QuotaWaitTimeout:
+            self._record(tokens, None)
+            raise
+        if wait > 0:
+            with self._lock:
+                self.queued_now += 1
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.queued_now -= 1
+        self._record(tokens, wait)
+        return wait
+
+    async def aacquire(self, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """Async variant of acquire(); a cancelled wait returns its reservation."""
+        if self.rpm <= 0 and self.tpm <= 0:
+            return 0.0
+        try:
+            wait = self._reserve(tokens, max_wait)
+        except QuotaWaitTimeout:
+            self._record(tokens, None)
+            raise
+        if wait > 0:
+            with self._lock:
+                self.queued_now += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(tokens)
+                raise
+            finally:
+                with self._lock:
+                    self.queued_now -= 1
+        self._record(tokens, wait)
+        return wait
+
+    def stats(self) -> Dict:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            dict: Limits, counters, current queue length and queue wait percentiles (ms)
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            counters = dict(self.counters)
+            queued_now = self.queued_now
+
+        def percentile(fraction):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(fraction * len(waits)))] * 1000, 1)
+
+        return dict(counters,
+                    backend=self.store.name,
+                    rpm=self.rpm,
+                    tpm=self.tpm,
+                    max_wait_seconds=self.max_wait,
+                    queued_now=queued_now,
+                    queue_wait_ms={
+                        "p50": percentile(0.5),
+                        "p95": percentile(0.95),
+                        "p99": percentile(0.99),
+                        "max": round(waits[-1] * 1000, 1) if waits else 0.0,
+                        "samples": len(waits)
+                    })
@@ -0,0 +1,329 @@
+import asyncio
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional
+
+# Upstream errors worth retrying, matched by class name so google.api_core stays an implicit dependency
+TRANSIENT_ERROR_NAMES = frozenset({
+    "ServiceUnavailable", "DeadlineExceeded", "ResourceExhausted", "TooManyRequests",
+    "InternalServerError", "GatewayTimeout", "Aborted", "RetryError",
+    "TimeoutError", "ConnectionError", "ConnectionResetError", "TransientModelError"
+})
+TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when a call's deadline budget runs out before any attempt succeeds."""
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Decide whether an upstream error is worth retrying.
+
+    Args:
+        error (BaseException): Raised error
+
+    Returns:
+        bool: True for timeouts, connection problems, rate limits and 5xx errors
+    """
+    if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    code = getattr(error, 'code', None)
+    return isinstance(code, int) and code in TRANSIENT_STATUS_CODES
+
+_STREAM_END = object()
+
+def iter_with_timeouts(start: Callable[[], Iterable], first_timeout: float, idle_timeout: float) -> Iterator:
+    """
+    Consume an upstream stream with limits on how long each item may take.
+
+    A daemon thread opens and reads the stream and hands items over through
+    a queue, so a stalled upstream cannot hold the consumer (and whatever
+    slot it holds) longer than first_timeout for opening the stream plus
+    its first item, or idle_timeout between items. Nothing runs until the
+    first item is requested. When the consumer stops early the thread exits
+    after the item it is waiting for.
+
+    Args:
+        start (callable): Opens the stream and returns an iterable of items
+        first_timeout (float): Longest wait for the first item
+        idle_timeout (float): Longest wait for each following item
+
+    Yields:
+        Items of the stream
+
+    Raises:
+        LLMDeadlineExceeded: An item did not arrive in time
+        Exception: An error raised while opening or reading the stream
+    """
+    items: "queue.Queue[tuple]" = queue.Queue()
+    stop = threading.Event()
+
+    def pump():
+        try:
+            for item in start():
+                if stop.is_set():
+                    return
+                items.put((item, None))
+            items.put((_STREAM_END, None))
+        except Exception as e:
+            items.put((_STREAM_END, e))
+
+    threading.Thread(target=pump, name="llm-stream", daemon=True).start()
+    timeout = first_timeout
+    try:
+        while True:
+            try:
+                item, error = items.get(timeout=max(timeout, 0.001))
+            except queue.Empty:
+                raise LLMDeadlineExceeded(f"LLM stream produced nothing for {timeout:.1f}s") from None
+            if item is _STREAM_END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+            timeout = idle_timeout
+    finally:
+        stop.set()
+
+class ResilientCaller:
+    """Run upstream calls with a deadline budget, jittered exponential-backoff retries and optional hedging."""
+
+    def __init__(self, deadline_seconds: float = 12.0, max_retries: int = 2, base_delay: float = 0.25,
+                 max_delay: float = 4.0, hedging: bool = False, hedge_delay: float = 2.0,
+                 hedge_percentile: float = 0.95, max_workers: int = 64, window: int = 500):
+        """
+        Initialize the caller.
+
+        Args:
+            deadline_seconds (float): Total time budget per call, across all attempts
+            max_retries (int): Retries after the first attempt for transient errors
+            base_delay (float): Backoff base; attempt n waits up to base_delay * 2**n
+            max_delay (float): Cap on a single backoff
+            hedging (bool): Fire a second request when the first is slower than the hedge delay
+            hedge_delay (float): Hedge delay used until enough latencies are recorded
+            hedge_percentile (float): Latency percentile used as the hedge delay
+            max_workers (int): Threads available for attempts
+            window (int): Number of recent attempt latencies kept
+        """
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedging = hedging
+        self.default_hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self.counters = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "failures": 0,
+            "deadline_exceeded": 0,
+            "hedges_fired": 0,
+            "hedges_won": 0
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _record_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def _percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def hedge_delay(self) -> float:
+        """Current hedge delay: the recorded latency percentile once 20 samples exist."""
+        with self._lock:
+            enough = len(self._latencies) >= 20
+        return self._percentile(self.hedge_percentile) if enough else self.default_hedge_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for a retry number (0-based)."""
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _timed(self, fn: Callable[[], Any]) -> Callable[[], Any]:
+        def attempt():
+            started = time.perf_counter()
+            self._count("attempts")
+            result = fn()
+            self._record_latency(time.perf_counter() - started)
+            return result
+        return attempt
+
+    def _attempt(self, fn: Callable[[], Any], remaining: float) -> Any:
+        """Run one attempt (plus an optional hedge) within the remaining budget."""
+        deadline = time.monotonic() + remaining
+        primary = self._executor.submit(self._timed(fn))
+        pending = {primary}
+        if self.hedging:
+            delay = self.hedge_delay()
+            if delay < remaining:
+                done, _ = wait(pending, timeout=delay)
+                if not done:
+                    self._count("hedges_fired")
+                    pending.add(self._executor.submit(self._timed(fn)))
+        error = None
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                     return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    if future.exception() is None:
+                        if future is not primary:
+                            self._count("hedges_won")
+                        return future.result()
+                    error = future.exception()
+            if error is not None and not pending:
+                raise error
+            raise LLMDeadlineExceeded(f"LLM call exceeded its {self.deadline_seconds}s deadline")
+        finally:
+            # Attempts still queued for a worker never start; running ones are abandoned
+            # (their results are discarded) and end at their own transport timeout
+            for future in pending:
+                future.cancel()
+
+    def call(self, fn: Callable[[], Any], deadline_seconds: Optional[float] = None) -> Any:
+        """
+        Call fn with retries on transient errors, all within a deadline budget.
+
+        Args:
+            fn (callable): Blocking upstream call
+            deadline_seconds (float): Overrides the default budget
+
+        Returns:
+            fn's result
+
+        Raises:
+            LLMDeadlineExceeded: The budget ran out
+            Exception: The last non-transient (or final) upstream error
+        """
+        self._count("calls")
+        deadline = time.monotonic() + (deadline_seconds or self.deadline_seconds)
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                return self._attempt(fn, remaining)
+            except LLMDeadlineExceeded:
+                break
+            except Exception as e:
+                if not is_transient(e) or attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+                delay = self.backoff(attempt)
+                if time.monotonic() + delay >= deadline:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                time.sleep(delay)
+        self._count("deadline_exceeded")
+        raise LLMDeadlineExceeded(f"LLM call exceeded its {deadline_seconds or self.deadline_seconds}s deadline")
+
+    async def _atimed(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.perf_counter()
+        self._count("attempts")
+        result = await fn()
+        self._record_latency(time.perf_counter() - started)
+        return result
+
+    async def _aattempt(self, fn: Callable[[], Awaitable[Any]], remaining: float) -> Any:
+        """Async variant of _attempt; losing attempts are cancelled."""
+        deadline = time.monotonic() + remaining
+        primary = asyncio.ensure_future(self._atimed(fn))
+        pending = {primary}
+        try:
+            if self.hedging:
+                delay = self.hedge_delay()
+                if delay < remaining:
+                    done, _ = await asyncio.wait(pending, timeout=delay)
+                    if not done:
+                        self._count("hedges_fired")
+                        pending.add(asyncio.ensure_future(self._atimed(fn)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self._count("hedges_won")
+                        return task.result()
+                    error = task.exception()
+            if error is not None and not pending:
+                raise error
+            raise LLMDeadlineExceeded(f"LLM call exceeded its {self.deadline_seconds}s deadline")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], deadline_seconds: Optional[float] = None) -> Any:
+        """
+        Async variant of call(); fn returns a fresh awaitable per attempt.
+
+        Args:
+            fn (callable): Function returning the upstream coroutine
+            deadline_seconds (float): Overrides the default budget
+
+        Returns:
+            The coroutine's result
+        """
+        self._count("calls")
+        deadline = time.monotonic() + (deadline_seconds or self.deadline_seconds)
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                return await self._aattempt(fn, remaining)
+            except LLMDeadlineExceeded:
+                break
+            except Exception as e:
+                if not is_transient(e) or attempt == self.max_retries:
+                    self._count("failures")
+                    raise
+                delay = self.backoff(attempt)
+                if time.monotonic() + delay >= deadline:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                await asyncio.sleep(delay)
+        self._count("deadline_exceeded")
+        raise LLMDeadlineExceeded(f"LLM call exceeded its {deadline_seconds or self.deadline_seconds}s deadline")
+
+    def stats(self) -> Dict:
+        """
+        Get call statistics.
+
+        Returns:
+            dict: Counters, settings and per-attempt latency percentiles (ms)
+        """
+        with self._lock:
+            counters = dict(self.counters)
+            samples = len(self._latencies)
+        latency = {name: round(value * 1000, 1) if value is not None else None
+                   for name, value in (("p50", self._percentile(0.5)), ("p95", self._percentile(0.95)),
+                                       ("p99", self._percentile(0.99)))}
+        return dict(counters,
+                    deadline_seconds=self.deadline_seconds,
+                    max_retries=self.max_retries,
+                    hedging=self.hedging,
+                    hedge_delay_ms=round(self.hedge_delay() * 1000, 1),
+                    attempt_latency_ms=dict(latency, samples=samples))
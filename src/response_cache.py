@@ -0,0 +1,409 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Dict, List, Optional, Set, Tuple
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for cache lookups (case, punctuation and whitespace insensitive).
+
+    Args:
+        question (str): Raw user question
+
+    Returns:
+        str: Normalized question
+    """
+    return " ".join(_PUNCTUATION_RE.sub(" ", question.lower()).split())
+
+def fingerprint(*parts) -> str:
+    """
+    Hash arbitrary JSON-serializable parts into a short stable key.
+
+    Returns:
+        str: Hex digest
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+class ResponseCache:
+    """Thread-safe exact-match answer cache with LRU eviction and TTL."""
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum cached answers
+            ttl_seconds (float): Lifetime of a cached answer
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # key -> (expires_at, answer), least recently used first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up an answer.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            str: Cached answer, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, answer: str):
+        """
+        Store an answer.
+
+        Args:
+            key (str): Cache key
+            answer (str): Answer text
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached answers."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Size, hit/miss counters and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_STOPWORDS = frozenset("a an the is are do does you your we our i to of for in on at what when where how can".split())
+
+def _stable_hash(value: str) -> int:
+    """Stable 64-bit hash (Python's hash() is randomized per process)."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+# Fragments left by splitting contractions ("what's", "don't", "we'll")
+_CONTRACTIONS = frozenset("s t d ll re ve m".split())
+
+def content_words(question: str) -> Set[str]:
+    """
+    Get the words of a question that carry its meaning (no stopwords or contraction fragments).
+
+    Args:
+        question (str): Raw or normalized question
+
+    Returns:
+        set: Content words
+    """
+    return {word for word in normalize_question(question).split()
+            if word not in _STOPWORDS and word not in _CONTRACTIONS}
+
+def _word_variants(a: str, b: str) -> bool:
+    """True for inflections of one word ("install", "installation"); never for numbers or letters."""
+    if len(a) < 4 or len(b) < 4 or any(ch.isdigit() for ch in a + b):
+        return False
+    prefix = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        prefix += 1
+    return prefix >= max(4, min(len(a), len(b)) - 1)
+
+def same_content(words_a: Set[str], words_b: Set[str]) -> bool:
+    """
+    Check that two questions ask about the same things.
+
+    Shingle similarity stays high when a single word differs ("iPhone 15"
+    vs "iPhone 14", "plan B" vs "plan A", "Sunday" vs "Monday"), so every
+    content word of one question must appear in the other, or as an
+    inflection of a word in it.
+
+    Args:
+        words_a (set): Content words of the first question
+        words_b (set): Content words of the second question
+
+    Returns:
+        bool: False when the questions differ in a content word
+    """
+    for missing, other in ((words_a - words_b, words_b), (words_b - words_a, words_a)):
+        for word in missing:
+            if not any(_word_variants(word, candidate) for candidate in other):
+                return False
+    return True
+
+def shingles(question: str) -> Set[str]:
+    """
+    Build the shingle set for a question: content words plus their character trigrams.
+
+    Trigrams let morphological variants ("open", "opening") overlap.
+
+    Args:
+        question (str): Raw or normalized question
+
+    Returns:
+        set: Shingles
+    """
+    result = set()
+    for word in normalize_question(question).split():
+        if word in _STOPWORDS:
+            continue
+        result.add(word)
+        padded = f"#{word}#"
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+class SemanticCache:
+    """Near-duplicate answer cache using MinHash signatures and LSH banding."""
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 3600, threshold: float = 0.75,
+                 num_perm: int = 64, bands: int = 16, sample_rate: float = 0.05, seed: int = 1,
+                 sample_text: bool = False):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum cached questions
+            ttl_seconds (float): Lifetime of a cached answer
+            threshold (float): Minimum estimated Jaccard similarity to reuse an answer
+            num_perm (int): MinHash signature length
+            bands (int): LSH bands (num_perm must divide evenly)
+            sample_rate (float): Fraction of hits re-checked with exact Jaccard to estimate false hits
+            seed (int): Seed for the hash permutations
+            sample_text (bool): Keep the questions of sampled hits in stats() (customer messages;
+                off by default, only the similarity numbers are kept)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.sample_rate = sample_rate
+        self.sample_text = sample_text
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+        self._sample_rng = random.Random(seed + 1)
+
+        # entry id -> (scope, signature, shingles, question, answer, expires_at, content words),
+        # least recently used first
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._buckets: List[Dict[tuple, Set[int]]] = [defaultdict(set) for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.candidates_checked = 0
+        self.content_mismatches = 0
+        self.evictions = 0
+        self.sampled_hits = 0
+        self.false_hits = 0
+        self.recent_samples = deque(maxlen=20)
+
+    def signature(self, shingle_set: Set[str]) -> Tuple[int, ...]:
+        """
+        Compute the MinHash signature of a shingle set.
+
+        Args:
+            shingle_set (set): Shingles
+
+        Returns:
+            tuple: num_perm minimum hash values
+        """
+        hashes = [_stable_hash(s) for s in shingle_set]
+        if not hashes:
+            return tuple([_MERSENNE_PRIME] * self.num_perm)
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        """Yield (band index, band key) pairs for a signature."""
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows]
+
+    def _remove(self, entry_id: int):
+        """Remove an entry and its bucket memberships. Caller must hold the lock."""
+        entry = self._entries.pop(entry_id)
+        for band, key in self._band_keys(entry[1]):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def get(self, question: str, scope: str = "") -> Optional[str]:
+        """
+        Find the answer to a near-duplicate question.
+
+        Only entries sharing at least one LSH bucket are compared, so lookup
+        cost depends on bucket size rather than cache size. An entry above
+        the threshold is still refused when its content words differ from
+        the question's (see same_content()).
+
+        Args:
+            question (str): User question
+            scope (str): Key that must match the stored entry (e.g. context hash)
+
+        Returns:
+            str: Cached answer, or None when no entry is similar enough
+        """
+        if self.max_entries <= 0:
+            return None
+        query_shingles = shingles(question)
+        if not query_shingles:
+            return None
+        signature = self.signature(query_shingles)
+        query_words = content_words(question)
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for band, key in self._band_keys(signature):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best_id, best_similarity = None, 0.0
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry[5] <= now:
+                    self._remove(entry_id)
+                    continue
+                if entry[0] != scope:
+                    continue
+                self.candidates_checked += 1
+                similarity = sum(x == y for x, y in zip(signature, entry[1])) / self.num_perm
+                if similarity < self.threshold or similarity <= best_similarity:
+                    continue
+                if not same_content(query_words, entry[6]):
+                    self.content_mismatches += 1
+                    continue
+                best_id, best_similarity = entry_id, similarity
+
+            if best_id is None:
+                return None
+
+            entry = self._entries[best_id]
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            if self._sample_rng.random() < self.sample_rate:
+                # Exact Jaccard check on a sample of hits estimates the false-hit rate
+                exact = len(query_shingles & entry[2]) / len(query_shingles | entry[2])
+                self.sampled_hits += 1
+                if exact < self.threshold:
+                    self.false_hits += 1
+                sample = {
+                    "estimated_similarity": round(best_similarity, 3),
+                    "exact_similarity": round(exact, 3)
+                }
+                if self.sample_text:
+                    sample.update(question=question, matched_question=entry[3])
+                self.recent_samples.append(sample)
+            return entry[4]
+
+    def put(self, question: str, answer: str, scope: str = ""):
+        """
+        Store an answer for a question.
+
+        Args:
+            question (str): User question
+            answer (str): Answer text
+            scope (str): Key that lookups must match (e.g. context hash)
+        """
+        if self.max_entries <= 0:
+            return
+        question_shingles = shingles(question)
+        if not question_shingles:
+            return
+        signature = self.signature(question_shingles)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, signature, question_shingles, question, answer,
+                                       time.time() + self.ttl_seconds, content_words(question))
+            for band, key in self._band_keys(signature):
+                self._buckets[band][key].add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached answers."""
+        with self._lock:
+            self._entries.clear()
+            for buckets in self._buckets:
+                buckets.clear()
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics for threshold tuning.
+
+        Returns:
+            dict: Hit rate, sampled false-hit rate and LSH bucket occupancy
+        """
+        with self._lock:
+            sizes = [len(bucket) for buckets in self._buckets for bucket in buckets.values()]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "avg_candidates_per_lookup": round(self.candidates_checked / self.lookups, 2) if self.lookups else 0.0,
+                "content_mismatches": self.content_mismatches,
+                "evictions": self.evictions,
+                "sampled_hits": self.sampled_hits,
+                "false_hits": self.false_hits,
+                "false_hit_rate": round(self.false_hits / self.sampled_hits, 4) if self.sampled_hits else 0.0,
+                "recent_samples": list(self.recent_samples),
+                "buckets": {
+                    "bands": self.bands,
+                    "rows_per_band": self.rows,
+                    "occupied": len(sizes),
+                    "max_size": max(sizes) if sizes else 0,
+                    "mean_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0
+                }
+            }
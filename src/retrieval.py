@@ -0,0 +1,168 @@
+import math
+import re
+import heapq
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from typing import List, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Args:
+        text (str): Input text
+
+    Returns:
+        list: Tokens
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 100) -> List[str]:
+    """
+    Split text into fixed-size overlapping chunks (same windows as PDFProcessor.get_text_chunks).
+
+    Args:
+        text (str): Text to split
+        chunk_size (int): Size of each chunk
+        overlap (int): Overlap between chunks
+
+    Returns:
+        list: List of text chunks
+    """
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size - overlap)]
+
+class BM25Index:
+    """Inverted-index BM25 retriever over text chunks."""
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index.
+
+        Args:
+            chunks (list): Text chunks to index
+            k1 (float): Term frequency saturation
+            b (float): Length normalization strength
+        """
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # token -> [(chunk_id, term_frequency)]
+        self.doc_lengths = []
+
+        for chunk_id, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            self.doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings[token].append((chunk_id, tf))
+
+        self.total_length = sum(self.doc_lengths)
+        self.avg_doc_length = (self.total_length / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n = len(chunks)
+        self.idf = {
+            token: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for token, posting in self.postings.items()
+        }
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the chunks that best match a query.
+
+        Args:
+            query (str): Search query
+            top_k (int): Maximum number of results
+
+        Returns:
+            list: (chunk_id, score) pairs, best first
+        """
+        scores = defaultdict(float)
+        avg = self.avg_doc_length or 1.0
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = self.idf[token]
+            for chunk_id, tf in posting:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+class ChunkSequence:
+    """Read-only list view over the chunks of several indexes, without copying them."""
+
+    def __init__(self, segments: Sequence, offsets: List[int]):
+        self._segments = segments
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def __getitem__(self, chunk_id: int) -> str:
+        if chunk_id < 0:
+            chunk_id += len(self)
+        if not 0 <= chunk_id < len(self):
+            raise IndexError("chunk id out of range")
+        segment = bisect_right(self._offsets, chunk_id) - 1
+        return self._segments[segment].chunks[chunk_id - self._offsets[segment]]
+
+    def __iter__(self):
+        for segment in self._segments:
+            yield from segment.chunks
+
+class SegmentedBM25Index:
+    """
+    BM25 over per-document BM25Index segments with corpus-wide statistics.
+
+    Document frequencies and lengths are summed across segments at query
+    time, so scores equal those of one BM25Index over all chunks, while
+    changing a document only rebuilds its own segment. Chunk ids run
+    through the segments in order.
+    """
+
+    def __init__(self, segments: Sequence[BM25Index], k1: float = 1.5, b: float = 0.75):
+        """
+        Combine segments.
+
+        Args:
+            segments (list): One BM25Index per document
+            k1 (float): Term frequency saturation
+            b (float): Length normalization strength
+        """
+        self.segments = tuple(segments)
+        self.k1 = k1
+        self.b = b
+        self.offsets = [0]
+        for segment in self.segments:
+            self.offsets.append(self.offsets[-1] + len(segment.chunks))
+        self.chunks = ChunkSequence(self.segments, self.offsets)
+        total_length = sum(segment.total_length for segment in self.segments)
+        self.avg_doc_length = total_length / len(self.chunks) if len(self.chunks) else 0.0
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the chunks that best match a query.
+
+        Args:
+            query (str): Search query
+            top_k (int): Maximum number of results
+
+        Returns:
+            list: (chunk_id, score) pairs, best first
+        """
+        scores = defaultdict(float)
+        avg = self.avg_doc_length or 1.0
+        n = len(self.chunks)
+        for token in set(tokenize(query)):
+            postings = [(offset, segment, segment.postings.get(token))
+                        for offset, segment in zip(self.offsets, self.segments)]
+            postings = [entry for entry in postings if entry[2]]
+            if not postings:
+                continue
+            df = sum(len(posting) for _, _, posting in postings)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for offset, segment, posting in postings:
+                for chunk_id, tf in posting:
+                    norm = self.k1 * (1 - self.b + self.b * segment.doc_lengths[chunk_id] / avg)
+                    scores[offset + chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls into one upstream call.
+
+    The first caller for a key (the leader) runs the call; callers arriving
+    while it is in flight wait for the leader's result instead of starting
+    their own. Threads and coroutines share the same in-flight table, so a
+    Flask thread and an ASGI coroutine asking the same question also coalesce.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _join(self, key: str):
+        """Return (future, is_leader) for a key."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result: Any = None, error: BaseException = None):
+        """Publish the leader's outcome and release the key."""
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key (blocking).
+
+        Args:
+            key (str): Identity of the call
+            fn (callable): Function performing the call
+
+        Returns:
+            The call's result (errors are raised in every waiter)
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run the coroutine returned by fn once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Identity of the call
+            fn (callable): Function returning the awaitable performing the call
+
+        Returns:
+            The call's result (errors are raised in every waiter)
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stats(self) -> Dict:
+        """
+        Get coalescing statistics.
+
+        Returns:
+            dict: Upstream calls made, calls coalesced and calls currently in flight
+        """
+        with self._lock:
+            return {
+                "upstream_calls": self.leaders,
+                "coalesced_calls": self.coalesced,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,179 @@
+import logging
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+class TokenEstimator:
+    """Fast local token estimator with an LRU cache of counts per text segment."""
+
+    def __init__(self, cache_size: int = 4096):
+        """
+        Initialize the estimator.
+
+        Args:
+            cache_size (int): Maximum number of cached segment counts
+        """
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def estimate(text: str) -> int:
+        """
+        Estimate the token count of a text without caching.
+
+        Words longer than four characters usually split into several
+        subword tokens; punctuation is roughly one token each.
+
+        Args:
+            text (str): Text to measure
+
+        Returns:
+            int: Estimated tokens
+        """
+        tokens = 0
+        for piece in _WORD_RE.findall(text):
+            tokens += 1 + (len(piece) - 1) // 4
+        return tokens
+
+    def count(self, text: str) -> int:
+        """
+        Estimate the token count of a text, reusing cached counts.
+
+        Args:
+            text (str): Text to measure
+
+        Returns:
+            int: Estimated tokens
+        """
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return cached
+        tokens = self.estimate(text)
+        with self._lock:
+            self.misses += 1
+            self._cache[text] = tokens
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+class TokenBudget:
+    """Decide which retrieved context and history fit within a per-request token ceiling."""
+
+    def __init__(self, max_tokens: int = 8000, estimator: TokenEstimator = None,
+                 history_weight: float = 0.9):
+        """
+        Initialize the budget manager.
+
+        Args:
+            max_tokens (int): Per-request prompt token ceiling
+            estimator (TokenEstimator): Token estimator (a new one if omitted)
+            history_weight (float): Value of the most recent exchange relative to the best chunk
+        """
+        self.max_tokens = max_tokens
+        self.estimator = estimator or TokenEstimator()
+        self.history_weight = history_weight
+        self._lock = threading.Lock()
+        self._channels = defaultdict(lambda: {
+            "requests": 0,
+            "trimmed_requests": 0,
+            "dropped_chunks": 0,
+            "dropped_history": 0,
+            "over_budget": 0,
+            "tokens_used": 0
+        })
+
+    def _history_text(self, exchange: Dict) -> str:
+        return f"Q: {exchange['question']}\nA: {exchange['answer']}\n\n"
+
+    def allocate(self, fixed_text: str, chunks: List[str], history: List[Dict],
+                 channel: str = "api", fixed_tokens: int = 0) -> Tuple[List[int], List[Dict]]:
+        """
+        Choose the pieces to include, dropping the lowest-value ones first.
+
+        The fixed text (system instructions and question) is always kept.
+        Chunks are valued by retrieval rank and history by recency; history
+        is only dropped from the oldest end so the kept turns stay contiguous.
+
+        Args:
+            fixed_text (str): Per-request text that is always sent (e.g. the question);
+                counted without caching, since it is rarely seen twice
+            chunks (list): Retrieved chunk texts, best first
+            history (list): Exchanges, oldest first
+            channel (str): Request channel, for per-channel accounting
+            fixed_tokens (int): Tokens of stable text that is always sent too (e.g. the
+                system instructions), counted by the caller with estimator.count()
+
+        Returns:
+            tuple: (indices of kept chunks, kept history exchanges oldest first)
+        """
+        used = fixed_tokens + self.estimator.estimate(fixed_text)
+        pieces = [(1.0 / (1 + rank), 'chunk', rank, self.estimator.count(text))
+                  for rank, text in enumerate(chunks)]
+        pieces += [(self.history_weight / (1 + age), 'history', age,
+                    self.estimator.count(self._history_text(exchange)))
+                   for age, exchange in enumerate(reversed(history))]
+        pieces.sort(key=lambda piece: piece[0], reverse=True)
+
+        kept_chunks = []
+        kept_history = 0
+        history_closed = False
+        for _, kind, position, tokens in pieces:
+            if kind == 'history' and (history_closed or position != kept_history):
+                continue
+            if used + tokens > self.max_tokens:
+                if kind == 'history':
+                    history_closed = True
+                continue
+            used += tokens
+            if kind == 'chunk':
+                kept_chunks.append(position)
+            else:
+                kept_history += 1
+
+        dropped_chunks = len(chunks) - len(kept_chunks)
+        dropped_history = len(history) - kept_history
+        with self._lock:
+            stats = self._channels[channel]
+            stats["requests"] += 1
+            stats["tokens_used"] += used
+            stats["dropped_chunks"] += dropped_chunks
+            stats["dropped_history"] += dropped_history
+            if dropped_chunks or dropped_history:
+                stats["trimmed_requests"] += 1
+            if used > self.max_tokens:
+                stats["over_budget"] += 1
+        if dropped_chunks or dropped_history:
+            logger.info(f"Token budget ({channel}): using {used}/{self.max_tokens} tokens, "
+                        f"dropped {dropped_chunks} chunks and {dropped_history} history turns")
+
+        return sorted(kept_chunks), history[len(history) - kept_history:] if kept_history else []
+
+    def stats(self) -> Dict:
+        """
+        Get budget statistics.
+
+        Returns:
+            dict: Ceiling, estimator cache counters and per-channel decisions
+        """
+        with self._lock:
+            channels = {name: dict(values) for name, values in self._channels.items()}
+        return {
+            "max_tokens": self.max_tokens,
+            "estimator_cache": {
+                "entries": len(self.estimator._cache),
+                "hits": self.estimator.hits,
+                "misses": self.estimator.misses
+            },
+            "channels": channels
+        }
@@ -0,0 +1,101 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+for name, value in (('LLM_BACKEND', 'fake'), ('FAKE_LLM_LATENCY', '0'), ('FAQ_BANK', 'false'),
+                    ('SUMMARY_PREWARM', 'false'), ('CORPUS_DIR', os.path.join(os.path.dirname(__file__), '..', 'examples')),
+                    ('CORPUS_WATCH', 'false')):
+    os.environ.setdefault(name, value)
+from starlette.testclient import TestClient
+from rate_limit import SenderRateLimiter
+from whatsapp_integration import WhatsAppBot
+
+class OfflineBot(WhatsAppBot):
+    """WhatsApp bot that builds TwiML replies without Twilio credentials."""
+
+    def __init__(self):
+        self.from_whatsapp_number = 'whatsapp:+14155238886'
+
+    def get_health_status(self) -> dict:
+        return {'status': 'healthy'}
+
+def load_asgi():
+    """Import the ASGI app with fresh rate limits and an offline WhatsApp bot."""
+    import asgi
+    if not asgi.gemini_agent.business_context:
+        # Without Twilio credentials main.py starts without a corpus
+        with open(os.path.join(os.path.dirname(__file__), '..', 'examples', 'sample_business_info.txt'),
+                  'r', encoding='utf-8') as f:
+            asgi.gemini_agent.set_business_context(f.read(), "Test Business")
+    asgi.client_limiter = SenderRateLimiter(per_minute=600, burst=100)
+    asgi.sender_limiter = SenderRateLimiter(per_minute=600, burst=100)
+    asgi.whatsapp_bot = OfflineBot()
+    return asgi
+
+def test_ask_answers_from_the_corpus():
+    """/ask answers on the event loop; the repeated question comes from the cache."""
+    asgi = load_asgi()
+    client = TestClient(asgi.app)
+    response = client.post('/ask', json={'question': 'What are your business hours?'})
+    assert response.status_code == 200
+    body = response.json()
+    assert body['response'] and body['source'] in ('llm', 'coalesced', 'exact_cache')
+    again = client.post('/ask', json={'question': 'What are your business hours?', 'session_id': 'asgi-1'})
+    assert again.json()['source'] == 'exact_cache'
+    assert client.get('/ask').status_code == 405
+
+def test_whatsapp_replies_with_twiml():
+    """Form-encoded Twilio webhooks get TwiML; incomplete ones are rejected."""
+    asgi = load_asgi()
+    client = TestClient(asgi.app)
+    form = {'From': 'whatsapp:+15550001', 'To': 'whatsapp:+14155238886', 'Body': 'Hello, are you open today?',
+            'MessageSid': 'SM1'}
+    response = client.post('/whatsapp', data=form)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/xml')
+    assert '<Message>' in response.text
+    assert client.post('/whatsapp', data={'From': 'whatsapp:+15550001'}).status_code == 400
+
+    # Over the sender's limit the reply is the rate-limit notice, not an answer
+    asgi.sender_limiter = SenderRateLimiter(per_minute=60, burst=1)
+    client.post('/whatsapp', data=form)
+    limited = client.post('/whatsapp', data=form)
+    assert asgi.RATE_LIMITED_MESSAGE in limited.text
+
+def test_health_and_client_rate_limit():
+    """/health reports every component; /ask returns 429 with Retry-After over the client's limit."""
+    asgi = load_asgi()
+    client = TestClient(asgi.app)
+    health = client.get('/health').json()
+    assert set(health) == {'gemini', 'whatsapp', 'vapi', 'sender_rate_limit', 'client_rate_limit'}
+    assert health['whatsapp'] == {'status': 'healthy'}
+
+    asgi.client_limiter = SenderRateLimiter(per_minute=60, burst=2)
+    statuses = [client.post('/ask', json={'question': 'Do you deliver?', 'session_id': f'rotating-{i}'}).status_code
+                for i in range(3)]
+    assert statuses == [200, 200, 429]
+    limited = client.post('/ask', json={'question': 'Do you deliver?'})
+    assert limited.json()['error'] == 'rate_limited' and int(limited.headers['Retry-After']) >= 1
+
+def test_ask_rejects_missing_questions():
+    """A missing, blank or non-string question is a 400 on both servers, before any cache lookup."""
+    asgi = load_asgi()
+    import main
+    main.client_limiter = SenderRateLimiter(per_minute=600, burst=100)
+    flask_client = main.app.test_client()
+    client = TestClient(asgi.app)
+    for body in [{}, {'question': None}, {'question': '   '}, {'question': 42}, {'question': ['hours']}]:
+        assert client.post('/ask', json=body).json() == {'error': 'Missing question'}
+        assert client.post('/ask', json=body).status_code == 400
+        assert flask_client.post('/ask', json=body).status_code == 400
+        assert flask_client.post('/ask/stream', json=body).status_code == 400
+    assert client.post('/ask', content=b'not json', headers={'content-type': 'application/json'}).status_code == 400
+    assert flask_client.post('/ask', data='not json', content_type='application/json').status_code == 400
+
+if __name__ == "__main__":
+    test_ask_answers_from_the_corpus()
+    test_whatsapp_replies_with_twiml()
+    test_health_and_client_rate_limit()
+    test_ask_rejects_missing_questions()
+    print("All ASGI tests passed")
@@ -0,0 +1,77 @@
+import sys
+import os
+import random
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from chunker import StructuredChunker, is_heading
+from token_budget import TokenEstimator
+
+WORDS = "our team offers support pricing installation training warranty for every product".split()
+
+def make_document(rng, sections=12):
+    """Pages of headed sections with paragraphs of numbered sentences."""
+    pages, sentences, count = [], [], 0
+    for page in range(3):
+        lines = []
+        for section in range(sections // 3):
+            lines.append(f"SECTION {page}.{section}")
+            for _ in range(rng.randint(1, 3)):
+                paragraph = []
+                for _ in range(rng.randint(1, 8)):
+                    count += 1
+                    sentence = f"Sentence {count} " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))) + "."
+                    paragraph.append(sentence)
+                    sentences.append(sentence)
+                lines.append(" ".join(paragraph))
+                lines.append("")
+        pages.append("\n".join(lines))
+    return pages, sentences
+
+def test_chunks_fit_budget_and_keep_sentences_whole():
+    """Chunks stay within the token budget, never split a sentence and never overlap."""
+    rng = random.Random(3)
+    estimator = TokenEstimator()
+    for max_tokens in (40, 120, 400):
+        pages, sentences = make_document(rng)
+        chunks = list(StructuredChunker(max_tokens).chunks(pages))
+        assert all(estimator.estimate(chunk.text) <= max_tokens for chunk in chunks)
+        for sentence in sentences:
+            # Only sentences longer than a whole chunk may be cut
+            if estimator.estimate(sentence) <= max_tokens:
+                assert sum(sentence in chunk.text for chunk in chunks) == 1
+        words = " ".join(" ".join(pages).split())
+        assert " ".join(" ".join(chunk.text for chunk in chunks).split()) == words
+        assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+
+def test_headings_pages_and_stable_ids():
+    """Sections start chunks, chunks know their pages, and ids only change with content."""
+    pages = ["PRICING\n" + "Web development starts at $2,500. " * 20,
+             "2. Support Plans\nSupport is available every day. Plans start at $99 per month.",
+             "Footer text.", "Footer text."]
+    chunker = StructuredChunker(max_tokens=100, min_tokens=10)
+    chunks = chunker.split_text("\f".join(pages))
+    assert chunks[0].text.startswith("PRICING") and chunks[0].heading == "PRICING"
+    support = [chunk for chunk in chunks if chunk.text.startswith("2. Support Plans")]
+    assert len(support) == 1 and support[0].page_start == 2
+    # Short trailing pages are packed into the chunk before them
+    assert (support[0].page_end, chunks[-1].page_end) == (4, 4)
+    assert len({chunk.id for chunk in chunks}) == len(chunks)
+
+    edited = chunker.split_text("\f".join([pages[0].replace("$2,500", "$3,000")] + pages[1:]))
+    assert [c.id for c in edited if c.page_start > 1] == [c.id for c in chunks if c.page_start > 1]
+    assert edited[0].id != chunks[0].id
+
+def test_heading_detection():
+    assert is_heading("BUSINESS HOURS:")
+    assert is_heading("3. IT Consulting")
+    assert is_heading("Overview", "========")
+    assert not is_heading("Business Name: TechSolutions Pro")
+    assert not is_heading("WE ARE OPEN EVERY DAY.")
+    assert not is_heading("- Monday - Friday: 9:00 AM - 6:00 PM")
+
+if __name__ == "__main__":
+    test_chunks_fit_budget_and_keep_sentences_whole()
+    test_headings_pages_and_stable_ids()
+    test_heading_detection()
+    print("All chunker tests passed")
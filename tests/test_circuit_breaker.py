@@ -0,0 +1,113 @@
+import sys
+import os
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('FAKE_LLM_LATENCY', '0')
+os.environ.setdefault('FAQ_BANK', 'false')
+os.environ.setdefault('SUMMARY_PREWARM', 'false')
+from circuit_breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+
+def test_half_open_without_trial_slot_reports_open():
+    """A half-open breaker whose trial is in flight rejects calls and says so."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    assert not breaker.is_open()  # due for a trial
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+    breaker.release_trial()
+    assert not breaker.is_open()
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED and not breaker.is_open()
+
+def test_abandoned_stream_settles_half_open_trial():
+    """A client that disconnects mid-stream does not leave the breaker stuck half-open."""
+    from gemini_agent import GeminiAgent
+
+    agent = GeminiAgent()
+    agent.set_business_context("PRICING\nWeb development starts at $2,500.", "Test Business")
+    agent.breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    agent.breaker.record_failure()
+
+    stream = agent.generate_response_stream("How much is web development?", include_history=False)
+    assert next(stream)
+    assert agent.breaker.state == HALF_OPEN
+    stream.close()
+    assert agent.breaker.state == CLOSED
+    assert agent.health_check()["status"] == "healthy"
+
+    # Later calls go upstream again instead of answering "LLM circuit is open"
+    calls = agent.model.calls
+    result = agent.answer_question("Do you offer support plans?", include_history=False)
+    assert result["source"] == "llm"
+    assert agent.model.calls == calls + 1
+
+def test_stalled_stream_counts_as_failure():
+    """A stream that stalls is cut off, releases its slot and counts against the breaker."""
+    from gemini_agent import GeminiAgent
+    from fake_model import FakeModel
+    from resilience import ResilientCaller
+
+    agent = GeminiAgent()
+    agent.set_business_context("PRICING\nWeb development starts at $2,500.", "Test Business")
+    agent.resilience = ResilientCaller(deadline_seconds=0.2)
+    agent.stream_idle_timeout = 0.2
+    for model, source in ((FakeModel(latency=0, first_chunk_latency=5), "degraded"),
+                          (FakeModel(latency=0, chunk_interval=5, answer_words=20), "error")):
+        agent.model = model
+        failures = agent.breaker.stats()["failures"]
+        started = time.monotonic()
+        sources = dict(agent.answer_sources)
+        list(agent.generate_response_stream("How much is web development?", include_history=False))
+        assert time.monotonic() - started < 1
+        assert agent.breaker.stats()["failures"] == failures + 1
+        assert agent.answer_sources[source] == sources.get(source, 0) + 1
+    assert sum(stats["in_flight"] for stats in agent.llm_scheduler.stats()["classes"].values()) == 0
+
+def test_refused_prompts_do_not_open_the_circuit():
+    """Non-transient errors (e.g. safety-blocked responses) are neither failures nor successes."""
+    from gemini_agent import GeminiAgent
+    from fake_model import FakeModel, TransientModelError
+
+    class ScriptedModel(FakeModel):
+        def __init__(self, error):
+            super().__init__(latency=0)
+            self.error = error
+
+        def generate_content(self, prompt, **kwargs):
+            self.calls += 1
+            raise self.error
+
+        async def generate_content_async(self, prompt, **kwargs):
+            return self.generate_content(prompt, **kwargs)
+
+    agent = GeminiAgent()
+    agent.set_business_context("PRICING\nWeb development starts at $2,500.", "Test Business")
+    agent.breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=0)
+    agent.model = ScriptedModel(ValueError("response was blocked by safety filters"))
+    for number in range(6):
+        agent.answer_question(f"Blocked question number {number}?", include_history=False)
+        list(agent.generate_response_stream(f"Blocked stream number {number}?", include_history=False))
+    assert agent.breaker.state == CLOSED and agent.breaker.stats()["failures"] == 0
+
+    # A half-open trial that is refused hands its slot back instead of closing or reopening the circuit
+    for _ in range(3):
+        agent.breaker.record_failure()
+    agent.answer_question("Another blocked question?", include_history=False)
+    assert agent.breaker.state == HALF_OPEN and not agent.breaker.is_open()
+
+    agent.model = ScriptedModel(TransientModelError("503 unavailable"))
+    agent.answer_question("Is the upstream down?", include_history=False)
+    assert agent.breaker.state == OPEN
+
+if __name__ == "__main__":
+    test_half_open_without_trial_slot_reports_open()
+    test_abandoned_stream_settles_half_open_trial()
+    test_stalled_stream_counts_as_failure()
+    test_refused_prompts_do_not_open_the_circuit()
+    print("All circuit breaker tests passed")
@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('FAKE_LLM_LATENCY', '0')
+os.environ.setdefault('FAQ_BANK', 'false')
+os.environ.setdefault('SUMMARY_PREWARM', 'false')
+from context_cache import LocalContextCache
+from fake_model import FakeModel
+
+class RecordingModel(FakeModel):
+    """Fake model remembering the prompts it was sent."""
+
+    def __init__(self):
+        super().__init__(latency=0)
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return super().generate_content(prompt, **kwargs)
+
+def test_prefix_is_registered_once_per_content_and_ttl():
+    """Refreshing with the same prefix is free until the TTL runs out; a new prefix replaces it."""
+    model = RecordingModel()
+    cache = LocalContextCache(model, ttl_seconds=0.05)
+    cache.refresh("PREFIX A\n")
+    cache.refresh("PREFIX A\n")
+    assert cache.refreshes == 1
+    cache.refresh("PREFIX B\n")
+    assert cache.refreshes == 2 and cache.prefix == "PREFIX B\n"
+
+    time.sleep(0.06)
+    cache.generate_content("QUESTION")
+    assert cache.refreshes == 3
+    assert model.prompts == ["PREFIX B\nQUESTION"]
+
+    # The local stand-in sends the prefix every time and claims no savings
+    stats = cache.stats()
+    assert stats["tokens_saved"] == 0 and stats["prefix_tokens_sent"] == stats["prefix_tokens"] > 0
+
+    cache.clear()
+    assert cache.prefix == "" and cache.stats()["prefix_tokens"] == 0
+
+def test_agent_caches_only_prefixes_within_the_budgets():
+    """A document larger than the context budget is sent as retrieved chunks, not as a cached prefix."""
+    from gemini_agent import GeminiAgent
+
+    os.environ['CONTEXT_CACHE'] = 'local'
+    try:
+        agent = GeminiAgent()
+    finally:
+        del os.environ['CONTEXT_CACHE']
+    agent.set_business_context("BUSINESS HOURS\nWe are open Monday to Friday, 9 AM to 6 PM.", "Test Business")
+    assert agent.prefix_cached
+    prompt = agent._build_prompt("When are you open?", include_history=False)
+    assert "BUSINESS INFORMATION" not in prompt and "BUSINESS INFORMATION" in agent.context_cache.prefix
+
+    sections = [f"SERVICE {number}\nService {number} costs ${number * 100} and takes {number} days. " * 20
+                for number in range(200)]
+    agent.token_budget.max_tokens = 2000
+    agent.set_business_context("\n\n".join(sections), "Test Business")
+    assert not agent.prefix_cached and agent.context_cache.prefix == ""
+    prompt = agent._build_prompt("How much is service 7?", include_history=False)
+    assert "Service 7 costs $700" in prompt
+    assert agent.token_budget.estimator.estimate(prompt) <= 2000
+    assert agent.token_budget.stats()["channels"]["api"]["over_budget"] == 0
+
+if __name__ == "__main__":
+    test_prefix_is_registered_once_per_content_and_ttl()
+    test_agent_caches_only_prefixes_within_the_budgets()
+    print("All context cache tests passed")
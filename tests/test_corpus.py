@@ -0,0 +1,183 @@
+import sys
+import os
+import json
+import random
+import tempfile
+from types import SimpleNamespace
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('FAKE_LLM_LATENCY', '0')
+os.environ.setdefault('SUMMARY_PREWARM', 'false')
+import numpy as np
+from corpus import Corpus
+from dense_retrieval import DenseIndex
+from retrieval import BM25Index, SegmentedBM25Index
+
+WORDS = "support pricing warranty delivery installation training refund hours phone email".split()
+
+def write(directory, name, text):
+    with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def test_segmented_index_matches_single_index():
+    """Searching per-document segments scores exactly like one index over all chunks."""
+    rng = random.Random(5)
+    documents = [[" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 30))) for _ in range(rng.randint(0, 6))]
+                 for _ in range(5)]
+    segmented = SegmentedBM25Index([BM25Index(chunks) for chunks in documents])
+    single = BM25Index([chunk for chunks in documents for chunk in chunks])
+    assert list(segmented.chunks) == single.chunks
+    for query in ["pricing", "refund hours", "warranty phone email", "unknown"]:
+        expected = single.search(query, 5)
+        actual = segmented.search(query, 5)
+        assert [chunk_id for chunk_id, _ in actual] == [chunk_id for chunk_id, _ in expected]
+        assert all(abs(a - e) < 1e-9 for (_, a), (_, e) in zip(actual, expected))
+        for chunk_id, _ in actual:
+            assert segmented.chunks[chunk_id] == single.chunks[chunk_id]
+
+def test_refresh_only_reloads_changed_documents():
+    """Added, changed and removed files are detected; untouched documents are reused as is."""
+    with tempfile.TemporaryDirectory() as directory:
+        write(directory, "hours.txt", "BUSINESS HOURS\nWe are open Monday to Friday.")
+        write(directory, "pricing.txt", "PRICING\nWeb development starts at $2,500.")
+        write(directory, "notes.csv", "ignored")
+        corpus = Corpus(directory, settle_seconds=0)
+        assert corpus.refresh() == dict(corpus.last_change, added=["hours.txt", "pricing.txt"])
+        first = {doc.name: doc for doc in corpus.snapshot.documents}
+        assert corpus.refresh() is None
+
+        write(directory, "pricing.txt", "PRICING\nWeb development starts at $3,000.")
+        write(directory, "refunds.txt", "REFUNDS\nRefunds are available within 30 days.")
+        change = corpus.refresh()
+        assert (change["added"], change["changed"], change["removed"]) == (["refunds.txt"], ["pricing.txt"], [])
+        second = {doc.name: doc for doc in corpus.snapshot.documents}
+        assert second["hours.txt"] is first["hours.txt"]
+        assert second["pricing.txt"].chunks[0].id.startswith("pricing.txt#")
+        assert "$3,000" in corpus.snapshot.text and "$2,500" not in corpus.snapshot.text
+
+        # Rewriting identical content is not a change
+        write(directory, "hours.txt", "BUSINESS HOURS\nWe are open Monday to Friday.")
+        assert corpus.refresh() is None
+        os.remove(os.path.join(directory, "refunds.txt"))
+        assert corpus.refresh()["removed"] == ["refunds.txt"]
+        assert corpus.snapshot.version == 3
+
+def test_agent_swaps_corpus_without_breaking_running_requests():
+    """A request holding the old knowledge keeps working after a new corpus is swapped in."""
+    from gemini_agent import GeminiAgent
+
+    with tempfile.TemporaryDirectory() as directory:
+        for number in range(4):
+            write(directory, f"doc{number}.txt", f"SECTION {number}\n" + f"Refunds take {number} days. " * 200)
+        corpus = Corpus(directory, max_tokens=64, settle_seconds=0)
+        corpus.refresh()
+        agent = GeminiAgent()
+        agent.context_char_budget = 500
+        agent.set_corpus(corpus.snapshot, "Test Business")
+        running = agent.knowledge
+        old_hash = agent.context_hash
+        old_selection = agent._select_context("refunds")
+
+        for number in range(3):
+            os.remove(os.path.join(directory, f"doc{number}.txt"))
+        corpus.refresh()
+        agent.set_corpus(corpus.snapshot, "Test Business")
+        assert agent.context_hash != old_hash
+        assert len(agent.retriever.chunks) < len(running.retriever.chunks)
+        # Chunk ids found in the old version still resolve against it
+        for chunk_id, text in old_selection:
+            assert running.retriever.chunks[chunk_id] == text
+        assert agent._rank_chunks("refunds", running)
+        assert all("3 days" in text for _, text in agent._select_context("refunds"))
+        assert agent.health_check()["corpus"]["documents"] == 1
+
+def test_answer_from_replaced_context_is_not_cached():
+    """An answer generated while the context is swapped is not served under the new context."""
+    from gemini_agent import GeminiAgent
+
+    agent = GeminiAgent()
+    agent.set_business_context("PRICING\nWeb development starts at $2,500.", "Test Business")
+    generate = agent._generate_text
+
+    def generate_during_swap(prompt, channel="api"):
+        text = generate(prompt, channel)
+        agent.set_business_context("PRICING\nWeb development starts at $3,000.", "Test Business")
+        return text
+
+    agent._generate_text = generate_during_swap
+    assert agent.answer_question("How much is web development?", include_history=False)["source"] == "llm"
+    agent._generate_text = generate
+    sources = [agent.answer_question(question, include_history=False)["source"]
+               for question in ("How much is the web development", "How much is web development?")]
+    assert sources == ["llm", "semantic_cache"]
+
+class FAQModel:
+    """Model answering FAQ prompts with one entry per document, counting the documents it was asked about."""
+
+    def __init__(self):
+        self.documents = []
+
+    def generate_content(self, prompt, **kwargs):
+        text = prompt.split("Business Information:\n", 1)[1].strip()
+        self.documents.append(text.split("\n")[0])
+        entry = {"questions": [f"Tell me about {text.split()[0].lower()}"], "answer": text}
+        return SimpleNamespace(text=json.dumps([entry]))
+
+def test_corpus_change_only_regenerates_changed_documents():
+    """FAQ banks and dense segments are built per document, stored once per content and pruned when unused."""
+    from gemini_agent import GeminiAgent
+
+    with tempfile.TemporaryDirectory() as directory, tempfile.TemporaryDirectory() as data:
+        documents = os.path.join(directory, "docs")
+        os.makedirs(documents)
+        write(documents, "hours.txt", "HOURS\nWe are open Monday to Friday.")
+        write(documents, "pricing.txt", "PRICING\nWeb development starts at $2,500.")
+        corpus = Corpus(documents, settle_seconds=0)
+        corpus.refresh()
+        agent = GeminiAgent()
+        agent.model = FAQModel()
+        agent.faq_bank_dir = os.path.join(data, "faq")
+        agent.retrieval_mode = 'hybrid'
+        agent.dense_index_path = os.path.join(data, "dense_index")
+        segments = agent.dense_index_path + "_segments"
+        agent.set_corpus(corpus.snapshot, "Test Business")
+        assert agent.load_faq_bank() == 2
+        assert sorted(agent.model.documents) == ["HOURS", "PRICING"]
+        assert len(os.listdir(agent.faq_bank_dir)) == 2
+        assert len(os.listdir(segments)) == 4
+        assert all(isinstance(segment.matrix, np.memmap) for segment in agent.dense_retriever.segments)
+
+        write(documents, "pricing.txt", "PRICING\nWeb development starts at $3,000.")
+        corpus.refresh()
+        agent.set_corpus(corpus.snapshot, "Test Business")
+        assert agent.faq_bank is None
+        assert agent.load_faq_bank() == 2
+        assert agent.model.documents[2:] == ["PRICING"]
+        assert "$3,000" in agent.faq_bank.match("Tell me about pricing")["answer"]
+        # The previous pricing bank and dense segment are gone; unchanged ones are kept
+        assert len(os.listdir(agent.faq_bank_dir)) == 2
+        assert len(os.listdir(segments)) == 4
+        chunks = list(agent.retriever.chunks)
+        whole = DenseIndex.build(chunks, agent._get_embedder())
+        assert agent.dense_retriever.search("web development price", 3) == whole.search("web development price", 3)
+
+        # A restarted worker maps the stored segments instead of embedding again
+        embedded = []
+        restarted = GeminiAgent()
+        restarted.retrieval_mode = 'hybrid'
+        restarted.dense_index_path = agent.dense_index_path
+        restarted._embedder = agent._get_embedder()
+        embed = restarted._embedder.embed
+        restarted._embedder.embed = lambda texts: embedded.append(texts) or embed(texts)
+        restarted.set_corpus(corpus.snapshot, "Test Business")
+        assert embedded == []
+
+if __name__ == "__main__":
+    test_segmented_index_matches_single_index()
+    test_refresh_only_reloads_changed_documents()
+    test_agent_swaps_corpus_without_breaking_running_requests()
+    test_answer_from_replaced_context_is_not_cached()
+    test_corpus_change_only_regenerates_changed_documents()
+    print("All corpus tests passed")
@@ -0,0 +1,98 @@
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from dense_retrieval import DenseIndex, HashingEmbedder, SegmentedDenseIndex, reciprocal_rank_fusion
+
+CHUNKS = [
+    "We are open Monday to Friday from 9 AM to 6 PM.",
+    "Delivery within 20 km costs 5 euros; orders over 50 euros ship free.",
+    "Unused items can be returned within 30 days for a full refund.",
+    "Free customer parking is available behind the building.",
+]
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing embedder counting the chunks it embedded."""
+
+    def __init__(self, dim: int = 256):
+        super().__init__(dim)
+        self.embedded = 0
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return super().embed(texts)
+
+def test_build_finds_similar_chunks():
+    """An in-memory index returns the closest chunks, best first."""
+    index = DenseIndex.build(CHUNKS, HashingEmbedder(256))
+    assert index.matrix.shape == (4, 256)
+    assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0, atol=1e-5)
+    assert index.search("full refund for returned items", top_k=1)[0][0] == 2
+    assert index.search("delivery costs", top_k=2)[0][0] == 1
+    assert index.search("anything", top_k=0) == []
+
+def test_persisted_index_is_memory_mapped_and_reused():
+    """A matching file is mapped read-only without embedding; a stale one is rebuilt."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "index", "dense")
+        embedder = CountingEmbedder()
+        built = DenseIndex.open_or_build(CHUNKS, embedder, path)
+        assert embedder.embedded == 4
+        assert isinstance(built.matrix, np.memmap) and not built.matrix.flags.writeable
+        assert not [name for name in os.listdir(os.path.dirname(path)) if ".tmp." in name]
+
+        reopened = DenseIndex.open_or_build(CHUNKS, embedder, path)
+        assert embedder.embedded == 4
+        assert isinstance(reopened.matrix, np.memmap)
+        assert reopened.chunks == CHUNKS
+        assert np.array_equal(np.asarray(reopened.matrix), np.asarray(built.matrix))
+
+        # Changed chunks or another embedder change the fingerprint
+        changed = CHUNKS[:3] + ["Parking is free on Sundays."]
+        rebuilt = DenseIndex.open_or_build(changed, embedder, path)
+        assert embedder.embedded == 8
+        assert rebuilt.chunks == changed
+        other = CountingEmbedder(dim=128)
+        assert DenseIndex.open_or_build(changed, other, path).matrix.shape == (4, 128)
+        assert other.embedded == 4
+
+        # A corrupt file is rebuilt rather than served
+        with open(f"{path}.json", 'w', encoding='utf-8') as f:
+            f.write("{not json")
+        assert DenseIndex.open_or_build(CHUNKS, embedder, path).chunks == CHUNKS
+        assert embedder.embedded == 12
+
+def test_segments_and_fusion_keep_chunk_order():
+    """Per-document segments search like one index, and fusion favours chunks both rankings agree on."""
+    embedder = HashingEmbedder(256)
+    whole = DenseIndex.build(CHUNKS, embedder)
+    segmented = SegmentedDenseIndex([DenseIndex.build(CHUNKS[:2], embedder), DenseIndex.build([], embedder),
+                                     DenseIndex.build(CHUNKS[2:], embedder)], CHUNKS, embedder)
+    for query in ["refund", "parking behind the building", "open on Friday"]:
+        assert segmented.search(query, top_k=2) == whole.search(query, top_k=2)
+    assert SegmentedDenseIndex([], [], embedder).search("refund") == []
+    fused = reciprocal_rank_fusion([(2, 9.0), (1, 3.0)], [(1, 0.8), (2, 0.7), (3, 0.1)])
+    assert [chunk_id for chunk_id, _ in fused] in ([1, 2, 3], [2, 1, 3])
+    assert fused[-1][0] == 3
+
+def test_prune_keeps_used_and_in_progress_indexes():
+    """Only finished index files of names no longer used are deleted."""
+    with tempfile.TemporaryDirectory() as directory:
+        embedder = HashingEmbedder(64)
+        for name in ["used", "stale"]:
+            DenseIndex.build(CHUNKS, embedder, os.path.join(directory, name))
+        open(os.path.join(directory, "new.123.tmp.npy"), 'wb').close()
+        assert DenseIndex.prune(directory, {"used"}) == 2
+        assert sorted(os.listdir(directory)) == ["new.123.tmp.npy", "used.json", "used.npy"]
+        assert DenseIndex.prune(os.path.join(directory, "missing"), set()) == 0
+
+if __name__ == "__main__":
+    test_build_finds_similar_chunks()
+    test_persisted_index_is_memory_mapped_and_reused()
+    test_segments_and_fusion_keep_chunk_order()
+    test_prune_keeps_used_and_in_progress_indexes()
+    print("All dense retrieval tests passed")
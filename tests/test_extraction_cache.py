@@ -0,0 +1,63 @@
+import sys
+import os
+import time
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from extraction_cache import ExtractionCache, file_hash
+
+def test_round_trip_memory_maps_pages():
+    """Stored pages come back page by page and as one text."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ExtractionCache(directory)
+        key = cache.key("abc", "pdfplumber", "1.0")
+        pages = ["Página uno\n", "", "Page three — €5\n"]
+        cache.put(key, pages, {"pages": 3})
+        cached = cache.get(key)
+        assert len(cached) == 3
+        assert list(cached) == pages
+        assert cached[2] == pages[2]
+        assert cached.text() == "".join(pages)
+        assert cached.meta == {"pages": 3}
+        cached.close()
+        assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+def test_key_depends_on_content_and_extractor():
+    """Changing the file, the extractor or its version misses the cache."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "doc.pdf")
+        with open(path, 'wb') as f:
+            f.write(b"%PDF-1.4 first")
+        first = file_hash(path)
+        with open(path, 'wb') as f:
+            f.write(b"%PDF-1.4 second")
+        assert file_hash(path) != first
+        keys = {ExtractionCache.key(first, "pdfplumber", "1.0"),
+                ExtractionCache.key(first, "pypdf2", "1.0"),
+                ExtractionCache.key(first, "pdfplumber", "1.1")}
+        assert len(keys) == 3
+        cache = ExtractionCache(os.path.join(directory, "cache"))
+        assert cache.get(ExtractionCache.key(first, "pdfplumber", "1.0")) is None
+        assert cache.stats()["misses"] == 1
+
+def test_evicts_least_recently_used_entries():
+    """Past the size budget the least recently used entries are deleted."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ExtractionCache(directory, max_bytes=2500)
+        page = ["x" * 1000]
+        cache.put("a", page)
+        cache.put("b", page)
+        past = time.time() - 60
+        os.utime(os.path.join(directory, "b.pages"), (past, past))
+        cache.get("a").close()
+        cache.put("c", page)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+
+if __name__ == "__main__":
+    test_round_trip_memory_maps_pages()
+    test_key_depends_on_content_and_extractor()
+    test_evicts_least_recently_used_entries()
+    print("All extraction cache tests passed")
@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from faq_bank import FAQBank
+
+ENTRIES = [
+    {"questions": ["What are your business hours?", "When are you open?", "What time do you close?"],
+     "answer": "We are open Monday to Friday, 9 AM to 6 PM."},
+    {"questions": ["Do you offer refunds?", "What is your refund policy?"],
+     "answer": "Refunds are available within 30 days."},
+    {"questions": ["How can I contact support?", "What is your support phone number?"],
+     "answer": "Call +1 555 0100 or email support@example.com."},
+    {"questions": ["How much does the Premium plan cost?", "What is the price of the Premium plan?"],
+     "answer": "The Premium plan is $99 per month."},
+    {"questions": ["Are you open on Monday?", "What are your Monday hours?"],
+     "answer": "On Monday we are open 9 AM to 6 PM."},
+    {"questions": ["Do you offer a refund on hardware?", "Can I return hardware?"],
+     "answer": "Hardware can be returned within 14 days."},
+]
+
+def test_match_finds_the_best_phrasing():
+    """Rephrasings match the entry of their closest phrasing; unrelated questions do not match."""
+    bank = FAQBank(ENTRIES)
+    match = bank.match("when are you open")
+    assert match["answer"] == ENTRIES[0]["answer"]
+    assert match["question"] == ENTRIES[0]["questions"][0]
+    assert bank.match("What's your refund policy?")["answer"] == ENTRIES[1]["answer"]
+    assert bank.match("support phone number")["answer"] == ENTRIES[2]["answer"]
+    assert bank.match("Do you sell gift cards?") is None
+    assert bank.match("?!") is None
+    # A looser threshold accepts partial matches that the default refuses
+    assert bank.match("when are you opened") is None
+    assert bank.match("when are you opened", threshold=0.3)["answer"] == ENTRIES[0]["answer"]
+    assert bank.match("What is your refund policy?", threshold=0.95)["score"] == 1.0
+
+def test_near_misses_are_refused():
+    """Questions that differ from a phrasing in one content word get no answer rather than a wrong one."""
+    bank = FAQBank(ENTRIES)
+    for question in ("How much does the Basic plan cost?", "Are you open on Sunday?",
+                     "Do you offer a refund on software?", "What is the price of the Premium plan in euros?"):
+        for threshold in (0.5, 0.6):
+            assert bank.match(question, threshold) is None, (question, threshold)
+    assert bank.match("How much does the Premium plan cost")["answer"] == ENTRIES[3]["answer"]
+    assert bank.match("Are you opened on Monday?")["answer"] == ENTRIES[4]["answer"]
+
+def test_parse_keeps_only_valid_entries():
+    text = """```json
+    [{"questions": ["Where are you?", ""], "answer": " 1 Main Street. "},
+     {"questions": [], "answer": "no questions"},
+     {"questions": ["No answer?"]},
+     "not an object"]
+    ```"""
+    assert FAQBank.parse(text) == [{"questions": ["Where are you?"], "answer": "1 Main Street."}]
+    assert FAQBank.parse("no json here") == []
+    assert FAQBank.parse("[not json]") == []
+
+if __name__ == "__main__":
+    test_match_finds_the_best_phrasing()
+    test_near_misses_are_refused()
+    test_parse_keeps_only_valid_entries()
+    print("All FAQ bank tests passed")
@@ -0,0 +1,83 @@
+import sys
+import os
+import random
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from pdf_processor import PDFProcessor, PageText
+
+def make_pages(texts):
+    pages, offset = [], 0
+    for number, text in enumerate(texts, start=1):
+        pages.append(PageText(number, offset, text))
+        offset += len(text)
+    return pages
+
+def test_streaming_chunks_match_string_slicing():
+    """iter_chunks yields exactly the windows of slicing the joined text."""
+    processor = PDFProcessor("unused.pdf", cache=False)
+    rng = random.Random(7)
+    for _ in range(200):
+        texts = ["".join(rng.choice("ab \n") for _ in range(rng.choice([0, 3, 40, 900, 2500])))
+                 for _ in range(rng.randint(0, 8))]
+        chunk_size = rng.choice([10, 100, 1000])
+        overlap = rng.choice([0, 1, chunk_size // 10, chunk_size - 1])
+        full = "".join(texts)
+        expected = [full[i:i + chunk_size] for i in range(0, len(full), chunk_size - overlap)]
+        chunks = list(processor.iter_chunks(chunk_size, overlap, make_pages(texts)))
+        assert [chunk.text for chunk in chunks] == expected
+        assert [chunk.index for chunk in chunks] == list(range(len(expected)))
+
+def test_chunk_views_carry_offsets_and_pages():
+    """Chunks record document offsets and the pages they span."""
+    processor = PDFProcessor("unused.pdf", cache=False)
+    pages = make_pages(["a" * 600, "", "b" * 600, "c" * 600])
+    chunks = list(processor.iter_chunks(1000, 100, pages))
+    assert [(c.start, c.end) for c in chunks] == [(0, 1000), (900, 1800)]
+    assert (chunks[0].page_start, chunks[0].page_end) == (1, 3)
+    assert (chunks[1].page_start, chunks[1].page_end) == (3, 4)
+    assert chunks[1].text == "b" * 300 + "c" * 600
+
+def write_pdf(path, page_texts):
+    """Write a minimal one-line-per-page PDF without any PDF-writing dependency."""
+    count = len(page_texts)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+                   " ".join(f"{4 + 2 * i} 0 R" for i in range(count)), count)).encode(),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    data, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_parallel_extraction_matches_sequential():
+    """Worker processes return the same pages, in the same order, as one sequential pass."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "doc.pdf")
+        write_pdf(path, [f"Page {number} lists the opening hours of branch {number}" for number in range(1, 13)])
+        for method in ["pypdf2", "race"]:
+            sequential = PDFProcessor(path, workers=1, cache=False)
+            parallel = PDFProcessor(path, workers=3, parallel_min_pages=2, cache=False)
+            expected = sequential._extract_pages(method)
+            assert parallel._extract_pages(method) == expected
+            assert parallel.last_extraction["mode"] == "parallel"
+            assert sequential.last_extraction["mode"] == "sequential"
+            assert "branch 7" in expected[6] and "branch 12" in expected[11]
+
+if __name__ == "__main__":
+    test_streaming_chunks_match_string_slicing()
+    test_chunk_views_carry_offsets_and_pages()
+    test_parallel_extraction_matches_sequential()
+    print("All PDF chunking tests passed")
@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pdf_processor
+from pdf_processor import score_page_text
+
+CLEAN = "Our support team is available from Monday to Friday. Please contact us for prices.\n"
+
+def fake_iterator(pages, delay, parsed):
+    """Page iterator over fixed texts that records which pages it actually parsed."""
+    def iterate(pdf_path, start, end=None, skip=None):
+        for i in range(start, len(pages) if end is None else end):
+            if skip and skip(i):
+                yield None
+                continue
+            time.sleep(delay)
+            parsed.append(i)
+            yield pages[i]
+    return iterate
+
+def test_scores_rank_garbled_text_below_clean_text():
+    """Unmapped glyphs, letter spacing and run-together words all score lower."""
+    clean = score_page_text(CLEAN)
+    assert clean >= 0.85
+    assert score_page_text("") == 0.0
+    for garbled in ["(cid:34)(cid:72)(cid:79) (cid:80)(cid:81)\n",
+                    "O u r  s u p p o r t  t e a m  i s  a v a i l a b l e\n",
+                    "Oursupportteamisavailablefrommondaytofriday\n",
+                    "��� �� �\n"]:
+        assert score_page_text(garbled) < 0.85 < clean
+
+def race(plumber_pages, pypdf2_pages, plumber_delay, pypdf2_delay):
+    """Run the race over fake libraries; return the results and the pages each one parsed."""
+    parsed = {"pdfplumber": [], "pypdf2": []}
+    iterators = dict(pdf_processor.PAGE_ITERATORS)
+    pdf_processor.PAGE_ITERATORS["pdfplumber"] = fake_iterator(plumber_pages, plumber_delay, parsed["pdfplumber"])
+    pdf_processor.PAGE_ITERATORS["pypdf2"] = fake_iterator(pypdf2_pages, pypdf2_delay, parsed["pypdf2"])
+    try:
+        results = list(pdf_processor._iter_race("unused.pdf", 0, len(plumber_pages), margin=0.1))
+    finally:
+        pdf_processor.PAGE_ITERATORS.update(iterators)
+    return results, parsed
+
+def test_race_prefers_pdfplumber_whatever_finishes_first():
+    """pdfplumber keeps every page it does not clearly lose, and timing never changes the result."""
+    garbled = "(cid:3)(cid:4)(cid:5)\n"
+    near = CLEAN.replace("support", "(cid:3)")  # a little worse than CLEAN, within the margin
+    plumber_pages = [CLEAN, CLEAN.upper(), garbled, "Closed on Sunday.\n", near, CLEAN]
+    pypdf2_pages = [CLEAN, garbled, CLEAN, "", CLEAN, CLEAN]
+    expected = ["pdfplumber", "pdfplumber", "pypdf2", "pdfplumber", "pdfplumber", "pdfplumber"]
+
+    slow_plumber, _ = race(plumber_pages, pypdf2_pages, 0.03, 0.001)
+    fast_plumber, parsed = race(plumber_pages, pypdf2_pages, 0.001, 0.03)
+    for results in (slow_plumber, fast_plumber):
+        assert [winner for _, winner, _ in results] == expected
+        assert [text for text, _, _ in results] == [CLEAN, CLEAN.upper(), CLEAN, "Closed on Sunday.\n", near, CLEAN]
+    assert set(fast_plumber[2][2]) == {"pdfplumber", "pypdf2"}
+    assert parsed["pdfplumber"] == list(range(6))
+    # pdfplumber's last page cannot be beaten, so PyPDF2 skipped it
+    assert 5 not in parsed["pypdf2"]
+
+def test_race_parses_only_a_few_pages_ahead_of_the_consumer():
+    """However fast a library is, it waits for a slow consumer instead of buffering the document."""
+    parsed = {"pdfplumber": [], "pypdf2": []}
+    iterators = dict(pdf_processor.PAGE_ITERATORS)
+    pages = ["Page %d of the catalog. Please contact our support team.\n" % i for i in range(200)]
+    pdf_processor.PAGE_ITERATORS["pdfplumber"] = fake_iterator(pages, 0, parsed["pdfplumber"])
+    pdf_processor.PAGE_ITERATORS["pypdf2"] = fake_iterator(["(cid:3)\n"] * 200, 0, parsed["pypdf2"])
+    window = pdf_processor.RACE_WINDOW_PAGES
+    try:
+        results = pdf_processor._iter_race("unused.pdf", 0, 200)
+        for number, (text, _, _) in enumerate(results):
+            assert text == pages[number]
+            if number in (0, 50, 150):
+                time.sleep(0.05)
+                for name in parsed:
+                    assert len(parsed[name]) <= number + 1 + window, (name, number, len(parsed[name]))
+    finally:
+        pdf_processor.PAGE_ITERATORS.update(iterators)
+
+if __name__ == "__main__":
+    test_scores_rank_garbled_text_below_clean_text()
+    test_race_prefers_pdfplumber_whatever_finishes_first()
+    test_race_parses_only_a_few_pages_ahead_of_the_consumer()
+    print("All PDF race tests passed")
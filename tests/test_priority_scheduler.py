@@ -0,0 +1,97 @@
+import sys
+import os
+import time
+import asyncio
+import threading
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from priority_scheduler import PriorityScheduler, SchedulerTimeout
+
+def run_backlog(scheduler, channels, hold=0.02):
+    """Queue one thread per channel entry behind a busy scheduler; return admission order."""
+    order = []
+    lock = threading.Lock()
+    blocker = scheduler.acquire("api")
+
+    def worker(channel):
+        with scheduler.slot(channel):
+            with lock:
+                order.append(channel)
+            time.sleep(hold)
+
+    threads = [threading.Thread(target=worker, args=(channel,)) for channel in channels]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)  # enqueue in a known order
+    scheduler.release(blocker)
+    for thread in threads:
+        thread.join()
+    return order
+
+def test_voice_overtakes_queued_batch():
+    """A voice request queued behind a batch backlog is served next."""
+    scheduler = PriorityScheduler(max_concurrency=1)
+    order = run_backlog(scheduler, ["batch"] * 5 + ["voice"])
+    assert order.index("voice") <= 1
+
+def test_weighted_share_under_contention():
+    """Backlogged classes are served in proportion to their weights."""
+    scheduler = PriorityScheduler(max_concurrency=1, classes={"whatsapp": (3, 1.0), "batch": (1, 1.0)})
+    order = run_backlog(scheduler, ["batch"] * 8 + ["whatsapp"] * 8, hold=0.005)
+    first = order[:8]
+    assert first.count("whatsapp") == 6
+    assert first.count("batch") == 2
+
+def test_batch_limited_to_its_share():
+    """Batch work never takes more than its share of the slots."""
+    scheduler = PriorityScheduler(max_concurrency=4)
+    held = [scheduler.acquire("batch") for _ in range(2)]
+    try:
+        scheduler.acquire("batch", timeout=0.05)
+        assert False, "expected SchedulerTimeout"
+    except SchedulerTimeout:
+        pass
+    assert scheduler.acquire("voice", timeout=0.05) == "voice"
+    stats = scheduler.stats()
+    assert stats["classes"]["batch"]["in_flight"] == 2
+    assert stats["classes"]["batch"]["timeouts"] == 1
+    assert stats["classes"]["batch"]["queue_depth"] == 0
+    for priority_class in held:
+        scheduler.release(priority_class)
+
+def test_async_waiters_and_cancellation():
+    """Async callers queue, time out and cancel without leaking slots."""
+    scheduler = PriorityScheduler(max_concurrency=1)
+
+    async def run():
+        async with scheduler.aslot("api"):
+            try:
+                await scheduler.aacquire("batch", timeout=0.05)
+                assert False, "expected SchedulerTimeout"
+            except SchedulerTimeout:
+                pass
+            waiting = asyncio.ensure_future(scheduler.aacquire("whatsapp"))
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["classes"]["whatsapp"]["queue_depth"] == 1
+        assert await waiting == "whatsapp"
+        scheduler.release("whatsapp")
+
+        blocker = await scheduler.aacquire("api")
+        cancelled = asyncio.ensure_future(scheduler.aacquire("voice"))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        await asyncio.sleep(0.01)
+        scheduler.release(blocker)
+
+    asyncio.run(run())
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert all(c["queue_depth"] == 0 for c in stats["classes"].values())
+
+if __name__ == "__main__":
+    test_voice_overtakes_queued_batch()
+    test_weighted_share_under_contention()
+    test_batch_limited_to_its_share()
+    test_async_waiters_and_cancellation()
+    print("All priority scheduler tests passed")
@@ -0,0 +1,161 @@
+import sys
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from rate_limit import MemoryBucketStore, QuotaScheduler, QuotaWaitTimeout, SenderRateLimiter
+
+def test_sender_burst_then_limited():
+    """A sender gets its burst, then is limited; other senders are unaffected."""
+    limiter = SenderRateLimiter(per_minute=60, burst=3)
+    results = [limiter.check("+15550001")[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+    allowed, retry_after = limiter.check("+15550001")
+    assert not allowed and 0 < retry_after <= 1.0
+    assert limiter.check("+15550002")[0]
+    assert limiter.stats()["limited"] == 2
+
+def test_sender_bucket_refills():
+    """Tokens come back at the configured rate."""
+    limiter = SenderRateLimiter(per_minute=600, burst=1)
+    assert limiter.check("a")[0]
+    assert not limiter.check("a")[0]
+    time.sleep(0.12)
+    assert limiter.check("a")[0]
+
+def test_scheduler_queues_over_rpm():
+    """Calls beyond the per-minute quota wait for capacity instead of failing."""
+    scheduler = QuotaScheduler(rpm=600, max_wait=5)  # burst of 600, then 10 per second
+    scheduler.store.reserve("quota:requests", 600, 10, 600)  # drain the burst
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        waits = list(pool.map(lambda _: scheduler.acquire(), range(5)))
+    elapsed = time.monotonic() - started
+    assert 0.4 <= elapsed < 1.0
+    # Reservations are spaced one refill interval apart
+    assert sorted(round(w, 1) for w in waits) == [0.1, 0.2, 0.3, 0.4, 0.5]
+    stats = scheduler.stats()
+    assert stats["queued"] == 5
+    assert stats["queue_wait_ms"]["max"] >= 400
+
+def test_scheduler_rejects_waits_beyond_max():
+    """A call that would queue longer than max_wait fails fast and takes nothing."""
+    scheduler = QuotaScheduler(tpm=60, max_wait=0.5)  # one token per second
+    assert scheduler.acquire(tokens=60) == 0.0
+    try:
+        scheduler.acquire(tokens=30)
+        assert False, "expected QuotaWaitTimeout"
+    except QuotaWaitTimeout:
+        pass
+    assert scheduler.stats()["timeouts"] == 1
+
+def test_cancelled_async_wait_returns_reservation():
+    """An async caller cancelled while queued gives its quota back."""
+    store = MemoryBucketStore()
+    scheduler = QuotaScheduler(rpm=60, max_wait=10, store=store)  # one request per second
+    store.reserve("quota:requests", 60, 1, 60)
+
+    async def run():
+        task = asyncio.ensure_future(scheduler.aacquire())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    granted, wait = store.reserve("quota:requests", 1, 1, 60, max_wait=10)
+    assert granted and wait < 1.0
+
+def test_agent_reserves_quota_once_within_deadline():
+    """Retries share one reservation, and a quota wait past the deadline never reaches the model."""
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('FAKE_LLM_LATENCY', '0')
+    os.environ.setdefault('FAQ_BANK', 'false')
+    os.environ.setdefault('SUMMARY_PREWARM', 'false')
+    from fake_model import TransientModelError
+    from gemini_agent import GeminiAgent
+    from resilience import ResilientCaller
+
+    agent = GeminiAgent()
+    agent.set_business_context("PRICING\nWeb development starts at $2,500.", "Test Business")
+    agent.resilience = ResilientCaller(deadline_seconds=2, max_retries=2, base_delay=0.01)
+    agent.quota = QuotaScheduler(rpm=60, max_wait=10)
+    generate = agent.model.generate_content
+    failures = [TransientModelError("503")]
+
+    def flaky(prompt, **kwargs):
+        if failures:
+            raise failures.pop()
+        return generate(prompt, **kwargs)
+
+    agent.model.generate_content = flaky
+    assert agent.answer_question("How much is web development?", include_history=False)["source"] == "llm"
+    assert agent.quota.stats()["requests"] == 1
+
+    # Drain the bucket: the next request would wait about a second, longer than its deadline
+    agent.quota.store.reserve("quota:requests", 60, 1, 60, max_wait=10)
+    agent.resilience = ResilientCaller(deadline_seconds=0.3, max_retries=0)
+    calls = agent.model.calls
+    started = time.monotonic()
+    assert agent.answer_question("Do you offer support plans?", include_history=False)["source"] != "llm"
+    assert time.monotonic() - started < 0.3
+    assert agent.model.calls == calls
+    assert agent.quota.stats()["timeouts"] == 1
+    assert agent.breaker.stats()["failures"] == 0
+
+def load_app():
+    """Import the Flask app with the fake backend and the example corpus."""
+    for name, value in (('LLM_BACKEND', 'fake'), ('FAKE_LLM_LATENCY', '0'), ('FAQ_BANK', 'false'),
+                        ('SUMMARY_PREWARM', 'false'), ('CORPUS_DIR', os.path.join(os.path.dirname(__file__), '..', 'examples')),
+                        ('CORPUS_WATCH', 'false')):
+        os.environ.setdefault(name, value)
+    import main
+    return main
+
+def test_ask_endpoints_share_a_per_client_limit():
+    """/ask, /ask/stream and /ask/batch draw on one bucket per client address, whatever the body says."""
+    main = load_app()
+    client = main.app.test_client()
+    main.client_limiter = SenderRateLimiter(per_minute=60, burst=3)
+    statuses = [client.post('/ask', json={'question': 'What are your hours?', 'session_id': f'rotating-{i}'}).status_code
+                for i in range(3)]
+    assert statuses == [200, 200, 200]
+    response = client.post('/ask', json={'question': 'What are your hours?', 'session_id': 'rotating-3'})
+    assert response.status_code == 429 and response.headers['Retry-After'] == '1'
+    assert client.post('/ask/stream', json={'question': 'What are your hours?'}).status_code == 429
+    assert client.post('/ask/batch', json={'questions': ['What are your hours?']}).status_code == 429
+
+    # A batch is charged one token per question and may not exceed the burst
+    main.client_limiter = SenderRateLimiter(per_minute=60, burst=3)
+    assert client.post('/ask/batch', json={'questions': ['a?', 'b?', 'c?', 'd?']}).status_code == 400
+    assert client.post('/ask/batch', json={'questions': ['When are you open?', 'Do you offer support?']}).status_code == 200
+    assert client.post('/ask/stream', json={'question': 'What are your hours?'}).status_code == 200
+    assert client.post('/ask', json={'question': 'What are your hours?'}).status_code == 429
+
+    # Only a trusted gateway is charged per relayed user
+    main.CHANNEL_TOKEN = 'gateway-secret'
+    try:
+        for number in range(5):
+            response = client.post('/ask', json={'question': 'What are your hours?', 'from_number': f'+1555000{number}'},
+                                   headers={'X-Channel-Token': 'gateway-secret'})
+            assert response.status_code == 200
+        response = client.post('/ask', json={'question': 'What are your hours?', 'from_number': '+15550009'},
+                               headers={'X-Channel-Token': 'wrong'})
+        assert response.status_code == 429
+    finally:
+        main.CHANNEL_TOKEN = ''
+
+if __name__ == "__main__":
+    test_sender_burst_then_limited()
+    test_sender_bucket_refills()
+    test_scheduler_queues_over_rpm()
+    test_scheduler_rejects_waits_beyond_max()
+    test_cancelled_async_wait_returns_reservation()
+    test_agent_reserves_quota_once_within_deadline()
+    test_ask_endpoints_share_a_per_client_limit()
+    print("All rate limit tests passed")
@@ -0,0 +1,171 @@
+import sys
+import os
+import time
+import asyncio
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from fake_model import FakeModel, TransientModelError
+from resilience import ResilientCaller, LLMDeadlineExceeded, is_transient, iter_with_timeouts
+
+def test_retries_transient_failures():
+    """Transient failures are retried until an attempt succeeds."""
+    outcomes = [TransientModelError("503"), TransientModelError("503"), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    caller = ResilientCaller(deadline_seconds=5, max_retries=2, base_delay=0.01)
+    assert caller.call(flaky) == "ok"
+    assert caller.counters["retries"] == 2
+    assert caller.counters["attempts"] == 3
+
+def test_non_transient_errors_are_not_retried():
+    """Programming errors fail fast."""
+    caller = ResilientCaller(deadline_seconds=5, max_retries=3, base_delay=0.01)
+
+    def broken():
+        raise ValueError("bad prompt")
+
+    try:
+        caller.call(broken)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    assert caller.counters["attempts"] == 1
+    assert not is_transient(ValueError())
+
+def test_deadline_bounds_slow_calls():
+    """A slow upstream call is abandoned once the deadline budget runs out."""
+    model = FakeModel(latency=2.0)
+    caller = ResilientCaller(deadline_seconds=0.3, max_retries=2)
+    started = time.monotonic()
+    try:
+        caller.call(lambda: model.generate_content("hello").text)
+        assert False, "expected LLMDeadlineExceeded"
+    except LLMDeadlineExceeded:
+        pass
+    assert time.monotonic() - started < 1.0
+    assert caller.counters["deadline_exceeded"] == 1
+
+def test_hedged_request_beats_slow_primary():
+    """With hedging, a second request fired after the hedge delay can win."""
+    latencies = [1.5, 0.05]
+
+    def call():
+        time.sleep(latencies.pop(0))
+        return "answer"
+
+    caller = ResilientCaller(deadline_seconds=5, hedging=True, hedge_delay=0.1)
+    started = time.monotonic()
+    assert caller.call(call) == "answer"
+    assert time.monotonic() - started < 1.0
+    assert caller.counters["hedges_fired"] == 1
+    assert caller.counters["hedges_won"] == 1
+
+def test_async_retries_and_deadline():
+    """The async path applies the same retry and deadline rules."""
+    flaky = FakeModel(latency=0.01, failure_rate=0.5, seed=3)
+    slow = FakeModel(latency=2.0)
+    caller = ResilientCaller(deadline_seconds=0.5, max_retries=5, base_delay=0.01)
+
+    async def run():
+        answer = await caller.acall(lambda: flaky.generate_content_async("hi"))
+        try:
+            await caller.acall(lambda: slow.generate_content_async("hi"))
+            return answer, False
+        except LLMDeadlineExceeded:
+            return answer, True
+
+    answer, timed_out = asyncio.run(run())
+    assert answer.text.startswith("[fake answer")
+    assert timed_out
+
+def test_stream_timeouts_cut_off_stalled_streams():
+    """A stream that does not start, or stalls between chunks, fails instead of hanging."""
+    def stream(first_delay, interval, chunks=3):
+        time.sleep(first_delay)
+        for number in range(chunks):
+            if number:
+                time.sleep(interval)
+            yield number
+
+    assert list(iter_with_timeouts(lambda: stream(0.01, 0.01), 1, 1)) == [0, 1, 2]
+    for first_delay, interval, expected in ((2, 0, []), (0, 2, [0])):
+        received = []
+        started = time.monotonic()
+        try:
+            for item in iter_with_timeouts(lambda: stream(first_delay, interval), 0.1, 0.1):
+                received.append(item)
+            assert False, "expected LLMDeadlineExceeded"
+        except LLMDeadlineExceeded:
+            pass
+        assert received == expected
+        assert time.monotonic() - started < 1
+
+    def broken():
+        raise TransientModelError("503")
+    try:
+        list(iter_with_timeouts(broken, 1, 1))
+        assert False, "expected TransientModelError"
+    except TransientModelError:
+        pass
+
+def test_abandoned_calls_leave_nothing_running_upstream():
+    """Queued attempts are cancelled at the deadline, and a hung attempt ends at its transport timeout."""
+    started = []
+
+    def hung():
+        started.append(time.monotonic())
+        time.sleep(0.3)
+        return "late"
+
+    # One worker: the hedge queues behind the hung primary and must never start
+    caller = ResilientCaller(deadline_seconds=0.1, max_retries=0, hedging=True, hedge_delay=0.02, max_workers=1)
+    try:
+        caller.call(hung)
+        assert False, "expected LLMDeadlineExceeded"
+    except LLMDeadlineExceeded:
+        pass
+    time.sleep(0.4)
+    assert len(started) == 1
+
+    # The agent hands each attempt the time it has left as request_options timeout
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('FAQ_BANK', 'false')
+    os.environ.setdefault('SUMMARY_PREWARM', 'false')
+    from gemini_agent import GeminiAgent
+
+    timeouts = []
+
+    class SlowModel(FakeModel):
+        def generate_content(self, prompt, stream=False, request_options=None, **kwargs):
+            timeouts.append(request_options["timeout"])
+            try:
+                return super().generate_content(prompt, stream, request_options, **kwargs)
+            except TimeoutError:
+                timeouts.append(time.monotonic() - began)
+                raise
+
+    agent = GeminiAgent()
+    agent.set_business_context("BUSINESS HOURS\nWe are open Monday to Friday, 9 AM to 6 PM.", "Test Business")
+    agent.resilience = ResilientCaller(deadline_seconds=0.2, max_retries=0, hedging=False)
+    agent.model = SlowModel(latency=5)
+    began = time.monotonic()
+    assert agent.answer_question("When are you open?", include_history=False)["source"] != "llm"
+    time.sleep(0.2)
+    requested, ended_after = timeouts
+    assert 0 < requested <= 0.2 and ended_after < 0.3
+
+if __name__ == "__main__":
+    test_retries_transient_failures()
+    test_non_transient_errors_are_not_retried()
+    test_deadline_bounds_slow_calls()
+    test_hedged_request_beats_slow_primary()
+    test_async_retries_and_deadline()
+    test_stream_timeouts_cut_off_stalled_streams()
+    test_abandoned_calls_leave_nothing_running_upstream()
+    print("All resilience tests passed")
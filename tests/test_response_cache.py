@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from response_cache import ResponseCache, SemanticCache, content_words, normalize_question, same_content
+
+def test_response_cache_lru_and_ttl():
+    """The least recently used answer is evicted first and answers expire."""
+    cache = ResponseCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("a", "answer a")
+    cache.put("b", "answer b")
+    assert cache.get("a") == "answer a"
+    cache.put("c", "answer c")
+    assert cache.get("b") is None and cache.get("a") == "answer a"
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 2, 1)
+    assert normalize_question("  What are your HOURS?! ") == normalize_question("what are your hours")
+
+def test_semantic_cache_scope_ttl_and_eviction():
+    """Hits need the same scope, expired entries are dropped and eviction empties the buckets."""
+    cache = SemanticCache(max_entries=2, ttl_seconds=0.05, sample_rate=0)
+    cache.put("What are your opening hours?", "9 to 6", scope="v1")
+    assert cache.get("What are the opening hours", scope="v1") == "9 to 6"
+    assert cache.get("What are the opening hours", scope="v2") is None
+    time.sleep(0.06)
+    assert cache.get("What are the opening hours", scope="v1") is None
+    assert cache.stats()["entries"] == 0
+
+    cache.ttl_seconds = 60
+    for question in ("Do you offer refunds?", "Where are you located?", "How can I pay?"):
+        cache.put(question, question.upper())
+    assert cache.get("Do you offer refunds") is None
+    assert cache.get("How can I pay") == "HOW CAN I PAY?"
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert stats["buckets"]["occupied"] <= 2 * cache.bands
+
+def test_semantic_cache_refuses_questions_differing_in_one_word():
+    """Near-identical questions about a different product, plan or day are not answered from each other."""
+    pairs = [
+        ("Do you sell the iPhone 15?", "Do you sell the iPhone 14?"),
+        ("How much is plan B?", "How much is plan A?"),
+        ("Are you open on Sunday?", "Are you open on Monday?"),
+        ("What are your business hours?", "What are your business hours today?"),
+    ]
+    for stored, asked in pairs:
+        for threshold in (0.6, 0.75):
+            cache = SemanticCache(threshold=threshold, sample_rate=0)
+            cache.put(stored, "stored answer")
+            assert cache.get(asked) is None, (stored, asked, threshold)
+            assert cache.get(stored) == "stored answer"
+            assert not same_content(content_words(stored), content_words(asked))
+
+def test_semantic_cache_reuses_rephrasings():
+    """Stopword, punctuation, contraction and inflection changes still hit."""
+    pairs = [
+        ("What are your opening hours?", "What are the opening hours"),
+        ("What is your refund policy?", "what's your refund policy"),
+        ("Do you offer installation?", "Do you offer installations?"),
+        ("How much does web development cost?", "How much does web development costs?"),
+    ]
+    for stored, asked in pairs:
+        cache = SemanticCache(sample_rate=0)
+        cache.put(stored, "stored answer")
+        assert cache.get(asked) == "stored answer", (stored, asked)
+    assert cache.stats()["content_mismatches"] == 0
+
+def test_sampled_hits_keep_no_question_text_by_default():
+    """Samples shown in /health carry similarity numbers only, unless question text is opted in."""
+    for sample_text in (False, True):
+        cache = SemanticCache(sample_rate=1, sample_text=sample_text)
+        cache.put("What are your opening hours?", "9 to 6")
+        assert cache.get("What are the opening hours") == "9 to 6"
+        sample = cache.stats()["recent_samples"][0]
+        assert set(sample) >= {"estimated_similarity", "exact_similarity"}
+        assert ("question" in sample) == ("matched_question" in sample) == sample_text
+
+if __name__ == "__main__":
+    test_response_cache_lru_and_ttl()
+    test_semantic_cache_scope_ttl_and_eviction()
+    test_semantic_cache_refuses_questions_differing_in_one_word()
+    test_semantic_cache_reuses_rephrasings()
+    test_sampled_hits_keep_no_question_text_by_default()
+    print("All response cache tests passed")
@@ -0,0 +1,81 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('FAKE_LLM_LATENCY', '0')
+os.environ.setdefault('FAQ_BANK', 'false')
+os.environ.setdefault('SUMMARY_PREWARM', 'false')
+from retrieval import BM25Index, SegmentedBM25Index, chunk_text
+
+FILLER = "Our team is proud to serve the local community with friendly service every day. "
+
+def sections():
+    """Business sections padded to a realistic size, one topic each."""
+    topics = [
+        "OPENING HOURS\nWe are open Monday to Friday from 9 AM to 6 PM and Saturday from 10 AM to 2 PM.\n",
+        "DELIVERY\nWe deliver within 20 km for a flat fee of 5 euros; orders over 50 euros ship free.\n",
+        "REFUNDS\nUnused items can be returned within 30 days for a full refund to the original card.\n",
+        "PARKING\nFree customer parking is available behind the building on Elm Street.\n",
+    ]
+    return [topic + FILLER * 12 for topic in topics]
+
+def test_bm25_ranks_the_matching_chunk_first():
+    """Chunks sharing rare query terms outrank the rest; unrelated queries find nothing."""
+    chunks = sections()
+    index = BM25Index(chunks)
+    assert index.search("Do you offer a refund?", top_k=1)[0][0] == 2
+    assert index.search("Where can I park my car? parking", top_k=1)[0][0] == 3
+    ranked = index.search("delivery fee", top_k=4)
+    assert ranked[0][0] == 1 and len(ranked) == 1
+    assert index.search("xylophone", top_k=3) == []
+
+def test_segments_score_like_one_index():
+    """Splitting the chunks into per-document segments does not change the scores."""
+    chunks = sections()
+    whole = BM25Index(chunks)
+    segmented = SegmentedBM25Index([BM25Index(chunks[:1]), BM25Index(chunks[1:3]), BM25Index(chunks[3:])])
+    assert list(segmented.chunks) == chunks
+    for query in ["refund policy", "opening hours saturday", "free parking", "friendly service"]:
+        expected = whole.search(query, top_k=4)
+        actual = segmented.search(query, top_k=4)
+        assert [chunk_id for chunk_id, _ in actual] == [chunk_id for chunk_id, _ in expected]
+        for (_, a), (_, b) in zip(actual, expected):
+            assert abs(a - b) < 1e-9
+
+def test_context_selection_stays_within_the_budget():
+    """Large documents are cut to the best chunks that fit; small ones are sent whole."""
+    from gemini_agent import GeminiAgent
+
+    chunks = sections()
+    text = "".join(chunks)
+    agent = GeminiAgent()
+    agent.context_char_budget = len(chunks[0]) * 2
+    agent.set_business_context(text, "Test Business", chunks=chunks)
+
+    selected = agent._select_context("How do refunds work?")
+    assert selected[0] == (2, chunks[2])
+    assert sum(len(chunk) for _, chunk in selected) <= agent.context_char_budget
+
+    # No keyword overlap: the start of the document, still within the budget
+    selected = agent._select_context("Hi!")
+    assert [chunk_id for chunk_id, _ in selected] == [0, 1]
+
+    agent.context_char_budget = len(text)
+    assert agent._select_context("How do refunds work?") == [(0, text)]
+
+def test_chunk_windows_overlap():
+    """Fixed-size chunks overlap by the requested amount and cover the whole text."""
+    text = "".join(str(i % 10) for i in range(2500))
+    chunks = chunk_text(text, chunk_size=1000, overlap=100)
+    assert [len(chunk) for chunk in chunks] == [1000, 1000, 700]
+    assert chunks[1][:100] == chunks[0][-100:]
+    assert chunks[-1].endswith(text[-100:])
+
+if __name__ == "__main__":
+    test_bm25_ranks_the_matching_chunk_first()
+    test_segments_score_like_one_index()
+    test_context_selection_stays_within_the_budget()
+    test_chunk_windows_overlap()
+    print("All retrieval tests passed")
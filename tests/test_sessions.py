@@ -0,0 +1,124 @@
+import sys
+import os
+import time
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('LLM_BACKEND', 'fake')
+os.environ.setdefault('FAKE_LLM_LATENCY', '0')
+os.environ.setdefault('FAQ_BANK', 'false')
+os.environ.setdefault('SUMMARY_PREWARM', 'false')
+from gemini_agent import GeminiAgent, SessionStore
+
+def make_agent():
+    agent = GeminiAgent()
+    agent.set_business_context("BUSINESS HOURS\nWe are open Monday to Friday, 9 AM to 6 PM.", "Test Business")
+    return agent
+
+def memory_size(store):
+    """Characters actually held across all sessions."""
+    return sum(len(e['question']) + len(e['answer']) for memory in store._sessions.values()
+               for e in memory.history) + sum(len(memory.summary) for memory in store._sessions.values())
+
+def test_session_store_evicts_least_recently_used():
+    """Beyond max_sessions or max_total_chars the least recently used sessions go first."""
+    store = SessionStore(max_sessions=2, max_total_chars=90, max_history=2)
+    store.add_exchange("a", "q" * 10, "a" * 10)
+    store.add_exchange("b", "q" * 10, "a" * 10)
+    store.get("a")  # a is now the most recently used
+    store.add_exchange("c", "q" * 10, "a" * 10)
+    assert list(store._sessions) == ["a", "c"]
+    assert store.evictions == 1
+
+    # Old exchanges beyond max_history leave the accounting too
+    for _ in range(3):
+        store.add_exchange("a", "q" * 10, "a" * 10)
+    assert len(store.history("a")) == 2
+    assert store.total_chars == memory_size(store) == 60
+
+    # The character cap evicts other sessions, never the one being written
+    store.add_exchange("a", "q" * 30, "a" * 30)
+    assert list(store._sessions) == ["a"] and store.evictions == 2
+    assert store.total_chars == memory_size(store) == 80
+    store.clear("a")
+    assert store.total_chars == 0 and store.stats()["active_sessions"] == 0
+
+def test_session_store_expires_idle_sessions():
+    store = SessionStore(ttl_seconds=0.05)
+    store.add_exchange("idle", "When do you open?", "At 9 AM.")
+    assert store.get_context("idle")
+    time.sleep(0.06)
+    assert store.get_context("idle") == []
+    stats = store.stats()
+    assert (stats["active_sessions"], stats["expirations"], stats["total_chars"]) == (0, 1, 0)
+
+def test_compaction_keeps_exchanges_added_meanwhile():
+    """Exchanges added while a compaction runs survive it, and sizes stay accounted."""
+    store = SessionStore()
+    for number in range(4):
+        store.add_exchange("s", f"Question {number}?", f"Answer {number}.")
+    previous, folded = store.begin_compaction("s", keep_raw=2)
+    assert previous == "" and [e['question'] for e in folded] == ["Question 0?", "Question 1?"]
+    assert store.begin_compaction("s", keep_raw=2) is None  # already claimed
+    store.add_exchange("s", "Question 4?", "Answer 4.")
+    store.finish_compaction("s", folded, "Asked about 0 and 1.")
+    assert [e['question'] for e in store.history("s")] == ["Question 2?", "Question 3?", "Question 4?"]
+    assert store.get_summary("s") == "Asked about 0 and 1."
+    assert store.total_chars == memory_size(store)
+
+    # A failed compaction releases the claim and changes nothing
+    claim = store.begin_compaction("s", keep_raw=1)
+    store.finish_compaction("s", claim[1], None)
+    assert len(store.history("s")) == 3 and store.begin_compaction("s", keep_raw=1) is not None
+
+def test_agent_folds_history_into_summary():
+    """Long conversations are compacted into a summary that later prompts carry."""
+    agent = make_agent()
+    agent.history_compaction = True
+    agent.history_raw_turns = 2
+    agent._compaction_executor.submit = lambda fn, *args: fn(*args)
+    for number in range(4):
+        agent.answer_question(f"Question number {number}?", session_id="c1")
+    assert agent.compactions == 1
+    assert [e['question'] for e in agent.get_conversation_history("c1")] == ["Question number 2?",
+                                                                             "Question number 3?"]
+    assert agent.sessions.get_summary("c1")
+    assert "EARLIER CONVERSATION SUMMARY" in agent._build_prompt("And on Sunday?", True, "c1")
+    assert agent.sessions.total_chars == memory_size(agent.sessions)
+
+def test_session_less_questions_share_nothing():
+    """Questions without a session are not remembered, so they never turn into follow-ups."""
+    agent = make_agent()
+    sources = [agent.answer_question("What are your hours?", include_history=False, session_id=None)["source"]
+               for _ in range(3)]
+    assert sources == ["llm", "exact_cache", "exact_cache"]
+    assert "".join(agent.generate_response_stream("Do you open on weekends?", include_history=False,
+                                                  session_id=None))
+    assert agent.sessions.stats()["active_sessions"] == 0
+
+    # A caller with a session keeps history, and its follow-ups bypass the caches
+    agent.answer_question("What are your hours?", session_id="customer-1")
+    assert agent.answer_question("What are your hours?", session_id="customer-1")["source"] == "llm"
+    assert len(agent.get_conversation_history("customer-1")) == 2
+
+def test_batch_items_without_session_are_not_remembered():
+    """Session-less batch items leave session memory (and compaction) alone."""
+    agent = make_agent()
+    compactions = []
+    agent._compaction_executor.submit = lambda *args: compactions.append(args)
+    items = [{"question": f"Question number {i}?"} for i in range(40)]
+    items.append({"question": "What are your hours?", "session_id": "qa-1"})
+    results = agent.answer_batch(items)
+    assert not any(result["error"] for result in results)
+    assert agent.sessions.stats()["active_sessions"] == 1
+    assert len(agent.get_conversation_history("qa-1")) == 1
+    assert compactions == []
+
+if __name__ == "__main__":
+    test_session_store_evicts_least_recently_used()
+    test_session_store_expires_idle_sessions()
+    test_compaction_keeps_exchanges_added_meanwhile()
+    test_agent_folds_history_into_summary()
+    test_session_less_questions_share_nothing()
+    test_batch_items_without_session_are_not_remembered()
+    print("All session tests passed")
@@ -0,0 +1,119 @@
+import sys
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    """Callers arriving while a call is in flight get its result without calling again."""
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "answer"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        leader = pool.submit(flight.do, "key", slow)
+        started.wait()
+        followers = [pool.submit(flight.do, "key", slow) for _ in range(7)]
+        results = [leader.result()] + [f.result() for f in followers]
+    assert results == ["answer"] * 8 and len(calls) == 1
+    assert flight.stats() == {"upstream_calls": 1, "coalesced_calls": 7, "in_flight": 0}
+
+    # Once finished the key is free again; other keys never wait
+    assert flight.do("key", lambda: "fresh") == "fresh"
+    assert flight.do("other", lambda: "other") == "other"
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(call)
+        started.wait()
+        follower = pool.submit(call)
+        assert leader.result() == follower.result() == "upstream down"
+    assert flight.stats()["in_flight"] == 0
+
+def test_coroutines_and_threads_coalesce():
+    """An ASGI coroutine joins a call started by a thread, and coroutines coalesce with each other."""
+    flight = SingleFlight()
+    calls = []
+
+    async def acall():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "async answer"
+
+    async def run():
+        return await asyncio.gather(*(flight.ado("key", acall) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["async answer"] * 5 and len(calls) == 1
+
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.1)
+        return "thread answer"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(flight.do, "shared", slow)
+        started.wait()
+        assert asyncio.run(flight.ado("shared", acall)) == "thread answer"
+        assert leader.result() == "thread answer"
+    assert len(calls) == 1
+
+def test_agent_waiters_do_not_refill_the_caches():
+    """Identical concurrent questions make one call and one cache entry; waiters are counted as coalesced."""
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('FAQ_BANK', 'false')
+    os.environ.setdefault('SUMMARY_PREWARM', 'false')
+    from gemini_agent import GeminiAgent
+    from fake_model import FakeModel
+
+    agent = GeminiAgent()
+    agent.model = FakeModel(latency=0.2)
+    agent.set_business_context("BUSINESS HOURS\nWe are open Monday to Friday, 9 AM to 6 PM.", "Test Business")
+    ask = lambda _: agent.answer_question("What are your hours?", include_history=False, session_id=None)
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        results = list(pool.map(ask, range(20)))
+    assert len({result["response"] for result in results}) == 1
+    assert agent.model.calls == 1
+    assert agent.semantic_cache.stats()["entries"] == 1 and agent.response_cache.stats()["entries"] == 1
+    assert agent.answer_sources["llm"] == 1 and agent.answer_sources["coalesced"] == 19
+
+    async def ask_async():
+        return await asyncio.gather(*(agent.aanswer_question("Do you offer support plans?", include_history=False,
+                                                             session_id=None) for _ in range(10)))
+
+    sources = [result["source"] for result in asyncio.run(ask_async())]
+    assert sorted(sources) == ["coalesced"] * 9 + ["llm"]
+    assert agent.model.calls == 2 and agent.semantic_cache.stats()["entries"] == 2
+
+if __name__ == "__main__":
+    test_concurrent_callers_share_one_call()
+    test_errors_reach_every_waiter()
+    test_coroutines_and_threads_coalesce()
+    test_agent_waiters_do_not_refill_the_caches()
+    print("All single-flight tests passed")
@@ -0,0 +1,57 @@
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from token_budget import TokenBudget, TokenEstimator
+
+def exchange(number):
+    return {"question": f"Question {number}?", "answer": "word " * 20}
+
+def test_allocate_drops_lowest_value_pieces_first():
+    """The worst-ranked chunks and the oldest history go first; kept history stays contiguous."""
+    estimator = TokenEstimator()
+    chunks = ["chunk " * 40 for _ in range(5)]
+    history = [exchange(number) for number in range(4)]
+    chunk_tokens = estimator.estimate(chunks[0])
+    turn_tokens = estimator.count(TokenBudget()._history_text(history[0]))
+
+    budget = TokenBudget(max_tokens=10_000)
+    assert budget.allocate("Question?", chunks, history) == ([0, 1, 2, 3, 4], history)
+
+    # Room for the fixed text, three chunks and two turns
+    fixed = "CURRENT CUSTOMER QUESTION: When are you open?"
+    budget = TokenBudget(max_tokens=estimator.estimate(fixed) + 3 * chunk_tokens + 2 * turn_tokens + 1)
+    kept, kept_history = budget.allocate(fixed, chunks, history, channel="voice")
+    assert kept == [0, 1, 2]
+    assert kept_history == history[2:]
+    stats = budget.stats()["channels"]["voice"]
+    assert (stats["dropped_chunks"], stats["dropped_history"], stats["trimmed_requests"]) == (2, 2, 1)
+
+    # Tokens of the stable prefix passed as fixed_tokens take the same room
+    kept, kept_history = budget.allocate("", chunks, history, fixed_tokens=estimator.estimate(fixed))
+    assert (kept, kept_history) == ([0, 1, 2], history[2:])
+
+def test_fixed_text_is_not_cached():
+    """Per-question fixed text never enters the estimator's cache; chunks and history do."""
+    budget = TokenBudget(max_tokens=10_000)
+    for number in range(50):
+        budget.allocate(f"A one-off question number {number}?", ["shared chunk"], [exchange(0)],
+                        fixed_tokens=budget.estimator.count("SYSTEM PROMPT"))
+    assert len(budget.estimator._cache) == 3
+    assert budget.stats()["estimator_cache"]["hits"] >= 3 * 49
+
+def test_estimator_counts_words_and_punctuation():
+    estimator = TokenEstimator(cache_size=2)
+    assert estimator.estimate("") == 0
+    assert estimator.estimate("Hi, there!") == 5
+    assert estimator.estimate("internationalization") == 1 + 19 // 4
+    for text in ("a", "b", "c"):
+        estimator.count(text)
+    assert list(estimator._cache) == ["b", "c"]
+
+if __name__ == "__main__":
+    test_allocate_drops_lowest_value_pieces_first()
+    test_fixed_text_is_not_cached()
+    test_estimator_counts_words_and_punctuation()
+    print("All token budget tests passed")